@@ -1,14 +1,23 @@
 # Libs
 
+import uuid
 import pandas as pd
 import datetime as dt
 
-# libs gráficas
-import matplotlib.pyplot as plt
-
 # Streamlit
 import streamlit as st
 
+# Módulos do projeto
+from pipeline.cache import MB, estatisticas_caches, memoizar
+from pipeline.compacto import FORMATADORES, OHLCVCompacto
+from pipeline.consolidacao import abrir_canonico
+from pipeline.dados import versao_dados
+from pipeline.exportacao import FORMATOS, arquivo_exportacao, ler_exportacao
+from pipeline.graficos import DADOS, GRAFICOS, LARGURA, montar_grafico
+from pipeline.imagens import html_imagem
+from pipeline.instrumentacao import Execucao, instrumentar, medir, resumo
+from pipeline.tabela import TabelaPaginada
+
 # Configurando a página
 st.set_page_config(
     page_title="Tech-Challenge",
@@ -20,12 +29,36 @@ st.set_page_config(
     }
 )
 
-# Função para a leitura da base de dados
-@st.cache_data
-def read_csv_file(file):
-    return pd.read_csv(file)
-
-df_ibovespa = read_csv_file('Assets/DataFrames/ibov.csv')
+# Função para a leitura dos dados de um formato (pipeline/graficos.py) a partir do armazenamento canônico
+# (pipeline/consolidacao.py), a única origem dos dados do aplicativo. O cache limitado compartilha o mesmo
+# DataFrame entre as sessões, e a versão dos dados na chave faz com que uma nova versão seja lida automaticamente
+@instrumentar('read_data')
+@memoizar('tabelas', max_bytes=128 * MB, max_itens=8)
+def read_data(formato, versao):
+    return DADOS[formato]()
+
+# Função do botão de Download: o arquivo é gerado em disco uma vez por versão dos dados e período,
+# e só é lido quando o botão é clicado
+@instrumentar('convert_df')
+def convert_df(formato='csv', inicio=None, fim=None):
+    return lambda: exportar_df(formato, inicio, fim)
+
+@instrumentar('convert_df.download')
+def exportar_df(formato, inicio, fim):
+    return ler_exportacao(arquivo_exportacao(abrir_canonico(), formato, inicio, fim))
+
+# Tabela paginada sobre a representação compacta dos dados (datas, pontos int32, volume float32),
+# montada uma vez por versão dos dados
+@instrumentar('create_df')
+@memoizar('tabelas_paginadas', max_bytes=32 * MB)
+def create_df(versao):
+    return TabelaPaginada.de_compacto(OHLCVCompacto.de_armazem(abrir_canonico()), FORMATADORES)
+
+# Primeira e última data do armazenamento canônico, usadas nos textos que descrevem o período dos dados
+@memoizar('periodo_dados', max_itens=4)
+def periodo_dados(versao):
+    datas = abrir_canonico().datas()
+    return tuple(pd.Timestamp(data).strftime('%d/%m/%Y') for data in (datas[0], datas[-1]))
 
 # Titulo de Página
 st.title('Análise de dados: explorando dados do histórico de fechamento do índice Ibovespa (BVSP)')
@@ -46,21 +79,76 @@ st.markdown(
     """, unsafe_allow_html=True
 )
 
-# Carregamento de imagens por cach
-@st.cache_data
-def load_img(img):
-    return plt.imread(img)
+# Gráficos estáticos pelas variantes otimizadas (pipeline/imagens.py, servidas de static/graficos):
+# o navegador escolhe a largura e o formato (WebP ou PNG/JPEG) e o servidor não decodifica a imagem.
+# Sem variantes no manifesto, o arquivo original é passado ao st.image pelo caminho.
+@instrumentar('mostrar_imagem')
+def mostrar_imagem(img, descricao=''):
+    codigo = html_imagem(img, descricao)
+    if codigo is None:
+        st.image(img)
+    else:
+        st.markdown(codigo, unsafe_allow_html=True)
+
+# Especificação Vega-Lite de cada gráfico, memoizada pelo hash dos dados de origem, pelo período exibido e pela largura
+@instrumentar('spec_grafico')
+@memoizar('graficos', max_bytes=32 * MB, ttl=3600)
+def spec_grafico(nome, versao, intervalo=None, largura=LARGURA):
+    return montar_grafico(nome, read_data(GRAFICOS[nome][0], versao), largura, intervalo)
+
+# Gráficos montados diretamente dos DataFrames
+# Com zoom, um seletor de período recorta os dados e a série é reamostrada na resolução do período
+@instrumentar('mostrar_grafico')
+def mostrar_grafico(nome, zoom=False, largura=LARGURA):
+    versao = versao_dados()
+    intervalo = None
+    if zoom:
+        df = read_data(GRAFICOS[nome][0], versao)
+        datas = df['Data' if 'Data' in df else 'ds']
+        inicio, fim = datas.min().date(), datas.max().date()
+        periodo = st.slider('Período', min_value=inicio, max_value=fim, value=(inicio, fim),
+                            format='DD/MM/YYYY', key=f'periodo_{nome}')
+        if periodo != (inicio, fim):
+            intervalo = (str(periodo[0]), str(periodo[1]))
+    # O gráfico é desenhado com a mesma largura usada no orçamento de pontos da reamostragem
+    st.vega_lite_chart(spec_grafico(nome, versao, intervalo, largura), width='content')
 
 # Layout do aplicativo
-tab0, tab1, tab2, tab3, tab4, tab5 = st.tabs(["🔷Introdução",
-                                              "🌐Base de Dados",
-                                              "🔍Análise Exploratória dos Dados",
-                                              "📋ARIMA",
-                                              "📈XGB", 
-                                              "📑Referências"])
+ABAS = ["🔷Introdução",
+        "🌐Base de Dados",
+        "🔍Análise Exploratória dos Dados",
+        "📋ARIMA",
+        "📈XGB",
+        "📑Referências"]
+
+# A aba escolhida fica no endereço da página (?aba=N), permitindo links diretos para cada seção
+def selecionar_aba():
+    st.query_params['aba'] = str(ABAS.index(st.session_state['aba']))
+
+if 'aba' not in st.session_state:
+    indice = st.query_params.get('aba', '0')
+    st.session_state['aba'] = ABAS[int(indice)] if indice.isdigit() and int(indice) < len(ABAS) else ABAS[0]
+
+# Diferente do st.tabs, que executa o conteúdo de todas as abas a cada interação,
+# apenas a seção selecionada carrega seus dados e é renderizada
+aba = st.radio('Seção', ABAS, horizontal=True, label_visibility='collapsed', key='aba', on_change=selecionar_aba)
+
+# Medição do tempo de cada seção da aba (pipeline/instrumentacao.py)
+if 'sessao' not in st.session_state:
+    st.session_state['sessao'] = uuid.uuid4().hex[:12]
+execucao = Execucao(aba, sessao=st.session_state['sessao'])
+
+# Divisor entre as seções de uma aba, que também inicia a medição da seção seguinte
+def divisor(secao):
+    st.divider()
+    execucao.secao(secao)
+
+# Período coberto pelos dados, para os textos das abas
+inicio_dados, fim_dados = periodo_dados(versao_dados())
 
 # Separando as Tabs
-with tab0:
+if aba == ABAS[0]:
+    execucao.secao('Explorando dados')
     '''
     ## Explorando dados do histórico de fechamento do índice Ibovespa
 
@@ -83,7 +171,7 @@ with tab0:
     haendelf@hotmail.com - Email Haendel Oliveira
 
     '''
-    st.divider()
+    divisor('Resumo')
     '''
     
     ## Resumo
@@ -104,38 +192,43 @@ with tab0:
     A seguir, disponibilizamos os dados utilizados para a análise no momento da publicação deste documento.
 
     '''
-    st.divider()
+    divisor('DataFrame')
     '''
 
     #### DataFrame dos dados do histórico de fechamento do Ibovespa entre os anos de 2003 a 2023
     '''
 
-    # Função do botão de Download para converter o DataFrame em .csv
-    @st.cache_data
-    def convert_df(df):
-        return df.to_csv().encode('utf-8')
-
-    # Convertendo o DataFrame em .csv
-    csv = convert_df(df_ibovespa)
-
     # Adicionando o DataFrame
-    @st.cache_data
-    def create_df(df):
-        return pd.DataFrame(df)
-    
-    dataframe = create_df(df_ibovespa)
-    dataframe = dataframe.set_index(['Data'])
-    st.dataframe(dataframe, use_container_width=True)
-
-    # Botão de Download do DataFrame
+    # Apenas a página visível do período selecionado é enviada ao navegador
+    tabela = create_df(versao_dados())
+    col_periodo, col_tamanho, col_pagina = st.columns([2, 1, 1])
+    periodo = col_periodo.date_input('Período', value=(tabela.inicio, tabela.fim), min_value=tabela.inicio,
+                                     max_value=tabela.fim, format='DD/MM/YYYY', key='periodo_tabela')
+    inicio, fim = (periodo[0], periodo[-1]) if periodo else (None, None)
+    tamanho = col_tamanho.selectbox('Linhas por página', [25, 50, 100, 250], index=1, key='tamanho_tabela')
+    linhas, paginas = tabela.contar(inicio, fim, tamanho)
+    pagina = col_pagina.number_input(f'Página (de {paginas})', min_value=1, max_value=paginas, value=1,
+                                     key='pagina_tabela')
+    dataframe = tabela.pagina(min(pagina, paginas), tamanho, inicio, fim)
+    with medir('st.dataframe'):
+        st.dataframe(dataframe, use_container_width=True,
+                     column_config={'_index': st.column_config.DateColumn('Data', format='YYYY-MM-DD')})
+    st.caption(f'{linhas} linhas no período selecionado')
+
+    # Botão de Download do DataFrame, completo ou apenas do período selecionado
+    col_formato, col_recorte = st.columns([1, 2])
+    formato = col_formato.selectbox('Formato', list(FORMATOS), key='formato_download')
+    recorte = col_recorte.checkbox('Somente o período selecionado', key='recorte_download')
+    extensao, mime = FORMATOS[formato]
     st.download_button(
-        label="Download do CSV",
-        data=csv,
-        file_name='df_ibovespa.csv',
-        mime='text/csv',
+        label="Download do CSV" if formato == 'csv' else f"Download ({extensao})",
+        data=convert_df(formato, *((str(inicio), str(fim)) if recorte and inicio else (None, None))),
+        file_name='df_ibovespa' + extensao,
+        mime=mime,
+        on_click='ignore',
     )
 
-    st.divider()
+    divisor('Observação')
     '''
 
     ## Observação
@@ -143,14 +236,15 @@ with tab0:
     Os demais dados, DataFrames e outras análises mais aprofundadas podem ser encontradas na página de Github dos integrantes do grupo referenciadas no início desse documento.
     '''
 
-with tab1:
-    '''
+elif aba == ABAS[1]:
+    execucao.secao('Coleta e Manipulação dos dados')
+    f'''
 
     ## Coleta e Manipulação dos dados
 
     Inicialmente, realizamos o carregamento dos dados utilizados na análise.
 
-    Esses dados contém o histórico de fechamento do índice Ibovespa durante o período de 15/10/2003 a 15/08/2023.
+    Esses dados contém o histórico de fechamento do índice Ibovespa durante o período de {inicio_dados} a {fim_dados}.
 
     Os dados foram obtidos do site da investing.com que é uma plataforma e site de notícias sobre o mercado financeiro.
     ```python
@@ -159,7 +253,7 @@ with tab1:
     ```
 
     '''
-    st.divider()
+    divisor('Dados Nulos')
     '''
 
     ## Dados Nulos
@@ -199,7 +293,7 @@ with tab1:
     del df_ibovespa['Var%']
     ```
     '''
-    st.divider()
+    divisor('Dados Duplicados')
     '''
 
     ## Dados Duplicados
@@ -214,7 +308,7 @@ with tab1:
     ```
     Nenhum dado duplicado foi encontrado, o que significa que nossos dados estão íntegros.
     '''
-    st.divider()
+    divisor('Informações dos Dados')
     '''
 
     ## Informações dos Dados
@@ -248,7 +342,7 @@ with tab1:
     memory usage: 268.6+ KB
     ```
     '''
-    st.divider()
+    divisor('Conversão Datetime')
     '''
 
     ## Conversão Datetime
@@ -270,7 +364,7 @@ with tab1:
     | 2023-08-09 | 118.409 |  119.090 | 119.090 | 117.901 | 11,25M |
     ```
     '''
-    st.divider()
+    divisor('Conversão Inteiros')
     '''
 
     ## Conversão Inteiros
@@ -299,7 +393,7 @@ with tab1:
     | 2023-08-09 | 118409 |   119090 | 119090 | 117901 | 11,25M |
     ```
     '''
-    st.divider()
+    divisor('Conversão dos Valores de Volume')
     '''
 
     ## Conversão dos Valores de Volume
@@ -320,8 +414,8 @@ with tab1:
     | 2023-08-09 | 118409 |   119090 | 119090 | 117901 | 11250000 |
     ```
     '''
-    st.divider()
-    '''
+    divisor('Finalização')
+    f'''
 
     ## Finalização
 
@@ -336,19 +430,38 @@ with tab1:
     # Salvando o DataFrame
     df_ibovespa_indexData.to_csv('Assets/DataFrames/ibov_modelo.csv')
     ```
+    Todas essas etapas também estão reunidas no módulo `pipeline/ingestao.py`, que converte datas, pontos, volumes e variações
+    diretamente no formato brasileiro com operações vetorizadas, sem o `pd.eval` linha a linha.
+    Como os números são lidos de forma exata, o módulo também evita os arredondamentos para baixo da multiplicação por 1000 com `astype(int)`.
+    ```python
+    from pipeline.ingestao import ler_investing, preparar_modelo
+
+    # Leitura, limpeza e preparação do DataFrame do modelo em uma única etapa
+    df_ibovespa_indexData = preparar_modelo(ler_investing('Assets/Base/ibovespa.csv'))
+    ```
+    Para incluir novos pregões não é preciso repetir todas as etapas: o módulo `pipeline/atualizacao.py` lê apenas as linhas novas
+    de uma exportação mais recente, descarta as datas já existentes e acrescenta os novos dias ao armazenamento descrito abaixo.
+    ```python
+    python -m pipeline.atualizacao Assets/Base/ibovespa.csv
+    ```
+    As duas exportações da investing.com (2003 a 2023 e 2010 a 2023) também são consolidadas pelo módulo `pipeline/consolidacao.py`
+    em um único armazenamento ordenado por data, em pontos, que é a fonte da tabela, dos gráficos e dos modelos desta página.
+    Nas datas presentes nas duas exportações vale a mais recente, que traz o fechamento final de 15/08/2023
+    e estende a série até {fim_dados}.
+
     Agora nossos dados estão prontos para a próxima etapa de análise.
 
     Na análise, poderemos visualizar melhor as tendências e padrões de nossos dados.
     '''
-with tab2:
-    '''
+elif aba == ABAS[2]:
+    execucao.secao('Análise exploratória dos dados')
+    f'''
 
     ## Análise exploratória dos dados
 
-    Inicialmente iremos visualizar o fechamento diário do Ibovespa no período entre 15/10/2003 e 15/08/2023
+    Inicialmente iremos visualizar o fechamento diário do Ibovespa no período entre {inicio_dados} e {fim_dados}
     '''
-    graf_1 = load_img('Assets/Graficos/historico.jpg')
-    st.image(graf_1)
+    mostrar_grafico('historico', zoom=True)
     '''
 
     Analisando a série temporal do valor de fechamento diário do IBOVESPA, de maneira geral ficam evidentes seis momentos distintos, marcados por alguns grandes eventos socioeconômicos:
@@ -362,22 +475,21 @@ with tab2:
 
     Também podemos notar que a maioria dos dados se concentra na região entre os 40.000 a 80.000 pontos, porém precisamos de mais análises gráficas para poder confirmar essa nossa hipótese.
     '''
-    st.divider()
+    divisor('Densidade')
     '''
 
     ## Densidade
 
     Podemos então analisar a distribuição do nosso dataset através de um gráfico de densidade
     '''
-    graf_2 = load_img('Assets/Graficos/densidade.jpg')
-    st.image(graf_2)
+    mostrar_imagem('Assets/Graficos/densidade.jpg', 'Densidade do fechamento')
     '''
 
     Como suspeitamos, o gráfico de densidade indica uma concentração maior em torno dos 50.000 pontos.
 
     Isso nos indica que dentro dos nossos dados, durante a maior parte do tempo, o índice flutuou próximo desse valor.
     '''
-    st.divider()
+    divisor('Volume negociado')
     '''
     
     ## Volume negociado
@@ -385,8 +497,7 @@ with tab2:
     Além do valor de fechamento, analisar variáveis como o Volume negociado pode ser interessante para entendermos o contexto do mercado financeiro brasileiro.
 
     '''
-    graf_volume = load_img('Assets/Graficos/volume1.png')
-    st.image(graf_volume)
+    mostrar_grafico('volume', zoom=True)
     '''
     O gráfico ilustra bem a evolução do mercado variável no Brasil. É visível que, até meados de 2019, o volume de negociações sofreu pouca alteração com uma leve tendência de crescimento.
 
@@ -394,7 +505,7 @@ with tab2:
 
     https://www.cnnbrasil.com.br/economia/numero-de-investidores-na-bolsa-cresce-15-em-2022-apostando-na-diversificacao/
     '''
-    st.divider()
+    divisor('Volume x Fechamento')
     '''
 
     ## Volume x Fechamento
@@ -402,20 +513,18 @@ with tab2:
     Possivelmente, os valores de fechamento do índice IBOVESPA e volume total negociado no mercado estão positivamente correlacionados,
     tendo em vista que com ações mais valorizadas há mais chance de ocorrem negociações de compra e venda de ações.
     '''
-    graf_vol_fechamento = load_img('Assets/Graficos/volume_fechamento.png')
-    st.image(graf_vol_fechamento)
+    mostrar_imagem('Assets/Graficos/volume_fechamento.png', 'Volume x Fechamento')
     '''
     Neste gráfico de dispersão é possível visualizar uma forte correlação entre o valor do índice IBOVESPA e o volume negociado em bolsa. 
     Para estas duas variáveis, foi calculada uma correlação de aproximadamente 0.70, um valor bastante alto e que confirma a hipótese inicial.
     '''
-    st.divider()
+    divisor('Diferença entre mínimo e máximo')
     '''
     ## Diferença entre mínimo e máximo
 
     Uma maneira interessante de verificar comportamentos incomuns nesta série temporal é identificar os dias com maior diferença entre os valores diários mínimos e máximos
     '''
-    graf_dif_min_max = load_img('Assets/Graficos/dif_min_max1.png')
-    st.image(graf_dif_min_max)
+    mostrar_grafico('dif_min_max')
     '''
     **Número de dias com diferença entre mínimo e máximo maior que 5 pontos:**
 
@@ -431,15 +540,14 @@ with tab2:
     
     Possivelmente, 2021 e 2022 aparecem em seguida no ranking também por reflexo dos efeitos da crise causada pela pandemia.
     '''
-    st.divider()
+    divisor('Componentes da série temporal original')
     '''
     ## Componentes da série temporal original
 
     Para entender mais a fundo comportamento da variável target (Fechamento) ao longo do tempo, é uma opção visualizar os diferentes componentes da série temporal
 
     '''
-    graf_serie_componentes = load_img('Assets/Graficos/serie_temporal_componentes.png')
-    st.image(graf_serie_componentes)
+    mostrar_imagem('Assets/Graficos/serie_temporal_componentes.png', 'Componentes da série temporal original')
     '''
     Não foi possível extrair insights muito valiosos com a decomposição da série temporal em seus componentes. A tendência representa a mesma curva da própria série, porém um pouco mais suavizada.
 
@@ -447,7 +555,7 @@ with tab2:
 
     Já o resíduo reforça a ideia de 2020 ser um ano fora do padrão de comportamento da curva.
     '''
-    st.divider()
+    divisor('Transformação Logarítmica')
     '''
 
     ## Transformação Logarítmica
@@ -459,9 +567,8 @@ with tab2:
     ```
 
     '''
-    graf_3 = load_img('Assets/Graficos/log.jpg')
-    st.image(graf_3)
-    st.divider()
+    mostrar_grafico('log')
+    divisor('Média móvel & desvio padrão')
     '''
     
     ## Média móvel & desvio padrão
@@ -470,13 +577,12 @@ with tab2:
     A média móvel é um estimador calculado a partir de amostras sequenciais, podendo indicar tendências em um determinado período.
     Já o desvio padrão expressará o grau de dispersão do nosso conjunto de dados.
     '''
-    graf_4 = load_img('Assets/Graficos/mm_std.jpg')
-    st.image(graf_4)
+    mostrar_grafico('mm_std')
     '''
 
     Pelo gráfico, observamos uma certa tendência de ascensão dos pontos de fechamento ao longo do histórico dos dados.
     '''
-    st.divider()
+    divisor('Próximos passos')
     '''
 
     ## Próximos passos
@@ -489,7 +595,8 @@ with tab2:
 
     Em seguida, realizaremos uma outra análise aplicando o Extreme Gradient Boosting Regressor em nossos dados.
     '''
-with tab3:
+elif aba == ABAS[3]:
+    execucao.secao('ARIMA')
     '''
 
     ## ARIMA
@@ -531,15 +638,21 @@ with tab3:
     Foi obtido um p-valor de 0.756, muito maior que o valor crítico para um intervalo de confiança de 5%, ou seja, trata-se de uma série
     não estacionária.
 
+    O mesmo teste pode ser repetido em janelas móveis de dois anos ao longo de todo o histórico de 2003 a 2023 (pipeline/estacionariedade.py).
+    Todas as janelas são resolvidas de uma vez como mínimos quadrados em lote, com os mesmos resultados do `adfuller`.
+    '''
+    mostrar_grafico('adf_janelas', zoom=True)
+    '''
+    Na grande maioria das janelas o p-valor fica acima de 5%, ou seja, a série não é estacionária em praticamente nenhum período.
+
     Uma das formas de transformar a nossa série temporal em estacionária é aplicando a diferenciação dos dados.
     '''
-    st.divider()
+    divisor('Série temporal diferenciada')
     '''
     ## Série temporal diferenciada
 
     '''
-    graf_serie_diff = load_img('Assets/Graficos/serie_diff.png')
-    st.image(graf_serie_diff)
+    mostrar_grafico('serie_diff')
     '''
     Claramente a série obtida a partir da diferenciação dos dados originais tem resultado muito mais constante e aparentemente possui
     caráter estacionário
@@ -578,7 +691,7 @@ with tab3:
     H1 alternativa confirmada, é estacionária
     ```
     '''
-    st.divider()
+    divisor('ACF e PACF')
     """
     ## ACF e PACF
 
@@ -587,17 +700,15 @@ with tab3:
     Esta análise traz importantes resultados sobre a sazonalidade e a aleatoriedade da série temporal, bem como indica o grau de correlação entre os próprios intervalos de tempo existentes na série temporal.
 
     """
-    graf_acf_pacf = load_img('Assets/Graficos/acf_pacf.png')
-    st.image(graf_acf_pacf)
+    mostrar_grafico('acf_pacf', zoom=True)
 
-    graf_acf_lag5 = load_img('Assets/Graficos/acf_lag_5.png')
-    st.image(graf_acf_lag5)
+    mostrar_imagem('Assets/Graficos/acf_lag_5.png', 'ACF com 5 defasagens')
     '''
     Com os gráficos, confirma-se a existência de autocorrelação na série temporal, especialmente com lags pequenos, ou seja, em um intervalo de dias reduzido.
 
     É perceptível uma forte autocorrelação na série temporal do IBOVESPA em intervalos de 5 dias (lag = 5), ou seja, analisando um período de 5 dias geralmente serão observados valores do índice muito semelhantes.
     '''
-    st.divider()
+    divisor('Datasets de treino e teste')
     '''
     ## Datasets de treino e teste
 
@@ -621,7 +732,7 @@ with tab3:
     601
     ```
     '''
-    st.divider()
+    divisor('Modelos Naive')
     '''
     ## Modelos Naive
 
@@ -638,8 +749,7 @@ with tab3:
     - season_length = 7 (período considerado para cálculos de média móvel)
     - window_size = 3 (número de seasons utilizadas na média móvel sazonal)
     '''
-    graf_naive = load_img('Assets/Graficos/modelos_naive.png')
-    st.image(graf_naive)
+    mostrar_imagem('Assets/Graficos/modelos_naive.png', 'Modelos Naive')
     '''
     ```python
     print(f'{model_} WMAPE: {wmape_:.2%}')
@@ -674,7 +784,7 @@ with tab3:
 
     Em seguida, serão testados modelos mais complexos, como o ARIMA.
     '''
-    st.divider()
+    divisor('Modelo ARIMA padrão')
     '''
     ## Modelo ARIMA padrão
 
@@ -687,8 +797,7 @@ with tab3:
 
     Utilizando estes parãmetros, foram obtidos os seguintes resultados:
     '''
-    graf_arima_padrao = load_img('Assets/Graficos/modelo_arima_padrao.png')
-    st.image(graf_arima_padrao)
+    mostrar_grafico('modelo_arima_padrao')
     '''
     ```python
     print(f'{model_} WMAPE: {wmape_:.2%}')
@@ -711,7 +820,7 @@ with tab3:
 
     Em resumo será feito um modelo com treino dinâmico, atualizando a cada nova previsão o conjunto de treino.
     '''
-    st.divider()
+    divisor('Modelo ARIMA dinâmico')
     '''
     ## Modelo ARIMA dinâmico
 
@@ -743,10 +852,19 @@ with tab3:
         history = pd.concat([history, pd.DataFrame({'y':obs}, index=[test_set_date_index.index[i]])])
     ```
 
+    Como o laço reajusta o modelo a cada um dos 601 dias de teste, o mesmo backtest foi reescrito no módulo `pipeline/arima.py`:
+    o modelo é ajustado uma única vez e cada nova observação apenas atualiza o estado do filtro de Kalman, com reajuste opcional a cada k dias.
+
+    ```python
+    from pipeline.arima import arima_dinamico
+
+    # Previsões um passo à frente, reestimando os parâmetros a cada 30 dias
+    y_pred_step = arima_dinamico(train_set_date_index.y.values, test_set_date_index.y.values, order=(5,1,0), reajuste=30)
+    ```
+
     A seguir, é possível visualizar a série original do conjunto de teste e a curva prevista utilizando o método ARIMA de maneira dinâmica.
     '''
-    graf_arima_dinamico = load_img('Assets/Graficos/modelo_arima_dinamico.png')
-    st.image(graf_arima_dinamico)
+    mostrar_grafico('modelo_arima_dinamico')
     '''
     ```python
     print(f'{model_} WMAPE: {wmape_:.2%}')
@@ -762,6 +880,13 @@ with tab3:
 
     Agora, além de valores baixos de erro, foi alcançada uma curva prevista muito próxima da real.
 
+    A ordem (5,1,0) foi escolhida a partir do gráfico de PACF. Para compará-la com outras ordens, o módulo `pipeline/selecao.py` faz uma busca em grade
+    de (p, d, q) em paralelo, com triagem pelo AIC aproximado, descarte dos ajustes que não convergem e avaliação fora da amostra:
+
+    ```
+    python -m pipeline.selecao --p 0 5 --d 1 --q 0 3 --criterio WMAPE
+    ```
+
     Um ponto a se pensar é o real valor deste tipo de modelo, já que da maneira que foi construído prevê apenas um dia, um período muito curto apesar da sua boa assertividade.
 
     Vale ressaltar a dificuldade de prever séries temporais como a do índice IBOVESPA com base apenas no próprio comportamento da curva. 
@@ -769,7 +894,8 @@ with tab3:
     Talvez a maneira ideal de atacar esse problema seria a combinação de métodos de previsão de séries temporais e modelos de regressão tradicionais, utilizando variáveis econômicas, socais e políticas para ajustar a curva prevista.
     '''
 
-with tab4:
+elif aba == ABAS[4]:
+    execucao.secao('Modelo XGBRegressor')
     '''
 
     ## Modelo XGBRegressor
@@ -786,7 +912,7 @@ with tab4:
 
     Desse modo, julgamos o método como sendo de extrema utilidade para a previsão de dados sensíveis como os financeiros.
     '''
-    st.divider()
+    divisor('Separando treino e teste')
     '''
     
     ## Separando treino e teste
@@ -799,8 +925,7 @@ with tab4:
     teste = df_ibovespa_indexData.iloc[int(.85*len(df_ibovespa_indexData)):, :]
     ```
     '''
-    graf_5 = load_img('Assets/Graficos/treino_teste.jpg')
-    st.image(graf_5)
+    mostrar_grafico('treino_teste')
     '''
 
     Inicialmente, selecionamos as características e o target para o nosso modelo
@@ -833,7 +958,7 @@ with tab4:
     
     ```
     '''
-    st.divider()
+    divisor('Previsão')
     '''
 
     ## Previsão
@@ -892,7 +1017,7 @@ with tab4:
     ```
     Com um score de 0,8809057960319034 o modelo tem aproximadamente 88% de acurácia para prever as próximas observações de fechamento do mercado.
     '''
-    st.divider()
+    divisor('Plotando o gráfico')
     '''
 
     ## Plotando o gráfico
@@ -911,9 +1036,8 @@ with tab4:
     plt.grid()
     plt.show()
     '''
-    graf_6 = load_img('Assets/Graficos/previsao_target.jpg')
-    st.image(graf_6)
-    st.divider()
+    mostrar_grafico('previsao_target', zoom=True)
+    divisor('Conclusão')
     '''
 
     ## Conclusão:
@@ -922,7 +1046,8 @@ with tab4:
     
     Provavelmente, o modelo em questão seria capaz de prever alguma das próximas observações mantendo uma boa precisão em relação aos dados futuros.
     '''
-with tab5:
+elif aba == ABAS[5]:
+    execucao.secao('Referências')
     '''
 
     ## Referências
@@ -946,3 +1071,14 @@ with tab5:
     9. BROWNLEE, Jason. XGBoost for Regression, 2021. Disponível em: https://machinelearningmastery.com/xgboost-for-regression/. Acessado em: 15, agosto de 2023.
     '''
 
+execucao.encerrar()
+
+# Painel de instrumentação, oculto: aparece na barra lateral com ?instrumentacao=1 no endereço.
+# Mostra os percentis das medições de todas as sessões do processo e os contadores dos caches.
+if st.query_params.get('instrumentacao') == '1':
+    with st.sidebar:
+        st.subheader('Instrumentação')
+        st.caption('Tempo de relógio e de CPU por seção e função (percentis entre as sessões)')
+        st.dataframe(resumo(), use_container_width=True)
+        st.caption('Caches')
+        st.dataframe(estatisticas_caches(), use_container_width=True, hide_index=True)
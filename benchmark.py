@@ -0,0 +1,314 @@
+# Libs
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from pipeline.ingestao import COLUNAS_PRECO, formatar_percentual, formatar_volume, ler_investing, preparar_modelo
+
+
+# Suíte de benchmarks do pipeline e do aplicativo.
+#
+# Mede o tempo das etapas que antes eram repetidas à mão nos notebooks:
+#   ingestao: leitura e limpeza da exportação da investing.com (aba Base de Dados);
+#   naive:    previsões dos quatro modelos Naive e suas métricas;
+#   arima:    ajuste e previsão dinâmica (walk-forward) do ARIMA(5,1,0) nos 15% finais;
+#   xgb:      treino e previsão do XGBRegressor da aba XGB, na divisão de 85% e 15%;
+#   app:      execução completa do app.py sem navegador (streamlit AppTest), uma medição por seção.
+# Os conjuntos de dados são os dados do projeto (Assets/Base/ibovespa.csv) e exportações sintéticas de
+# 5 mil, 100 mil e 1 milhão de pregões, geradas localmente com semente fixa no mesmo formato da exportação.
+#
+# Cada caso é repetido. A primeira repetição encontra os caches do aplicativo e do pipeline vazios
+# (primeira_s, execução fria) e as seguintes já preenchidos (melhor_s e mediana_s, execuções quentes).
+# Para que a execução fria não reaproveite o Assets/Cache do projeto, o cache em disco do pipeline
+# (variável DIRETORIO_CACHE, lida por pipeline/colunar.py) aponta para um diretório temporário vazio,
+# removido ao final (as exportações sintéticas e os resultados continuam em Assets/Cache/benchmark).
+# As duas medidas são comparadas em separado com o arquivo de referência: acima de
+# referência * (1 + tolerância) + folga o caso é marcado como regressão e o script termina com erro.
+# A referência guarda também o ambiente em que foi gravada; quando ele difere do atual, o script avisa
+# que os tempos podem não ser comparáveis.
+#
+# Exemplo:  python benchmark.py --conjuntos assets 5k --repeticoes 5
+#           python benchmark.py --atualizar-referencia   (grava os tempos medidos como nova referência)
+
+DIRETORIO_BENCHMARK = 'Assets/Cache/benchmark'
+CAMINHO_REFERENCIA = 'benchmark_referencia.json'
+CAMINHO_ASSETS = 'Assets/Base/ibovespa.csv'
+
+TAMANHOS = {'5k': 5_000, '100k': 100_000, '1m': 1_000_000}
+CONJUNTOS = ['assets'] + list(TAMANHOS)
+ETAPAS = ['ingestao', 'naive', 'arima', 'xgb', 'app']
+
+SEMENTE = 2023
+PROPORCAO_TREINO = .85
+
+# Tolerância relativa e folga absoluta (para os casos de poucos milissegundos) sobre a referência
+TOLERANCIA = .25
+FOLGA_S = .005
+
+# Medidas comparadas com a referência: execução fria e melhor execução quente
+MEDIDAS = ('primeira_s', 'melhor_s')
+
+
+# Função para gerar uma exportação sintética com n pregões, do mais recente para o mais antigo.
+# O log do fechamento segue um processo AR(1) em torno de 100 mil pontos, para que a série não
+# exploda nem se aproxime de zero mesmo com 1 milhão de pregões.
+def gerar_sintetico(n, semente=SEMENTE):
+    gerador = np.random.default_rng(semente)
+    datas = np.busday_offset('1990-01-01', np.arange(n), roll='forward')
+    log_fechamento = np.log(100_000) + lfilter([1.0], [1.0, -0.999], gerador.normal(0, .015, n))
+    fechamento = np.exp(log_fechamento)
+    abertura = np.r_[fechamento[0], fechamento[:-1]] * np.exp(gerador.normal(0, .003, n))
+    maxima = np.maximum(abertura, fechamento) * np.exp(np.abs(gerador.normal(0, .005, n)))
+    minima = np.minimum(abertura, fechamento) * np.exp(-np.abs(gerador.normal(0, .005, n)))
+    volume = np.round(gerador.lognormal(np.log(10e6), .5, n), -4)
+    # Alguns dias sem volume, como na exportação real
+    volume[gerador.random(n) < .001] = np.nan
+    precos = {nome: np.round(v).astype(np.int64) for nome, v in
+              zip(COLUNAS_PRECO, (fechamento, abertura, maxima, minima))}
+    variacao = np.r_[np.nan, np.diff(precos['Último']) / precos['Último'][:-1] * 100]
+
+    texto_datas = np.datetime_as_string(datas)
+    df = pd.DataFrame({'Data': [f'{d[8:10]}.{d[5:7]}.{d[:4]}' for d in texto_datas]})
+    for nome, valores in precos.items():
+        df[nome] = [f'{v:,}'.replace(',', '.') for v in valores]
+    df['Vol.'] = formatar_volume(volume)
+    df['Var%'] = formatar_percentual(variacao)
+    return df.iloc[::-1]
+
+
+# Função para obter o caminho da exportação sintética, gerando o arquivo apenas na primeira vez
+def arquivo_sintetico(n, semente=SEMENTE, diretorio=DIRETORIO_BENCHMARK):
+    caminho = os.path.join(diretorio, f'sintetico_{n}_{semente}.csv')
+    if not os.path.exists(caminho):
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = caminho + '.tmp'
+        gerar_sintetico(n, semente).to_csv(temporario, index=False, quoting=1, encoding='utf-8-sig')
+        os.replace(temporario, caminho)
+    return caminho
+
+
+# Etapas medidas: cada uma recebe os dados já preparados fora da medição
+def _etapa_ingestao(dados):
+    preparar_modelo(ler_investing(dados['caminho']))
+
+
+def _etapa_naive(dados):
+    from pipeline.metricas import avaliar_lote
+    from pipeline.naive import prever_naive
+
+    treino, teste = dados['treino'], dados['teste']
+    previsoes = prever_naive(treino, len(teste))
+    avaliar_lote(teste, np.stack(list(previsoes.values())), nomes=list(previsoes), treino=treino)
+
+
+def _etapa_arima(dados):
+    from pipeline.arima import arima_dinamico
+
+    arima_dinamico(dados['treino'], dados['teste'])
+
+
+def _etapa_xgb(dados):
+    from pipeline.xgb import prever_xgb
+
+    prever_xgb(dados['modelo'], PROPORCAO_TREINO)
+
+
+FUNCOES = {
+    'ingestao': _etapa_ingestao,
+    'naive': _etapa_naive,
+    'arima': _etapa_arima,
+    'xgb': _etapa_xgb,
+}
+
+
+# Função para preparar os dados de um conjunto: a exportação e, a partir dela, o DataFrame
+# do modelo e a série do fechamento (em milhares de pontos, como na aba ARIMA) dividida em treino e teste
+def preparar_conjunto(nome):
+    caminho = CAMINHO_ASSETS if nome == 'assets' else arquivo_sintetico(TAMANHOS[nome])
+    modelo = preparar_modelo(ler_investing(caminho))
+    serie = modelo['Último'].to_numpy(dtype=float) / 1000
+    corte = int(PROPORCAO_TREINO * len(serie))
+    return {'caminho': caminho, 'linhas': len(modelo), 'modelo': modelo,
+            'treino': serie[:corte], 'teste': serie[corte:]}
+
+
+def _medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+# Função para medir o aplicativo: a primeira execução do script e a troca para cada seção
+def medir_app(repeticoes):
+    from streamlit.testing.v1 import AppTest
+
+    tempos = {}
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        app = AppTest.from_file('app.py', default_timeout=600).run()
+        tempos.setdefault('abertura', []).append(time.perf_counter() - inicio)
+        radio = app.radio(key='aba')
+        for i, secao in enumerate(radio.options):
+            inicio = time.perf_counter()
+            app.radio(key='aba').set_value(secao).run()
+            tempos.setdefault(f'secao_{i}', []).append(time.perf_counter() - inicio)
+            if len(app.exception):
+                raise RuntimeError(f'Erro na seção {secao}: {app.exception[0].value}')
+    return tempos
+
+
+def _resumo(tempos, linhas=None):
+    # Com uma única repetição, a execução fria é também a única quente
+    quentes = tempos[1:] or tempos
+    resumo = {'tempos_s': [round(t, 6) for t in tempos], 'primeira_s': round(tempos[0], 6),
+              'melhor_s': round(min(quentes), 6), 'mediana_s': round(float(np.median(quentes)), 6)}
+    if linhas is not None:
+        resumo['linhas'] = linhas
+    return resumo
+
+
+# Função principal: executa os casos (conjunto/etapa) e devolve os resumos por caso
+def executar(conjuntos=CONJUNTOS, etapas=ETAPAS, repeticoes=3):
+    casos = {}
+    for conjunto in conjuntos:
+        if conjunto == 'assets' and 'app' in etapas:
+            for nome, tempos in medir_app(repeticoes).items():
+                casos[f'assets/app/{nome}'] = _resumo(tempos)
+                print(f"assets/app/{nome}: {casos[f'assets/app/{nome}']['melhor_s']:.3f}s", file=sys.stderr)
+
+        medidas = [etapa for etapa in etapas if etapa in FUNCOES]
+        if not medidas:
+            continue
+        dados = preparar_conjunto(conjunto)
+        for etapa in medidas:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                tempos = _medir(lambda: FUNCOES[etapa](dados), repeticoes)
+            casos[f'{conjunto}/{etapa}'] = _resumo(tempos, dados['linhas'])
+            print(f"{conjunto}/{etapa}: {casos[f'{conjunto}/{etapa}']['melhor_s']:.3f}s", file=sys.stderr)
+    return casos
+
+
+# Função para comparar a execução fria e a melhor execução quente de cada caso com a referência
+# e marcar as regressões
+def comparar(casos, referencia, tolerancia=TOLERANCIA, folga=FOLGA_S):
+    for chave, caso in casos.items():
+        anterior = referencia.get(chave, {})
+        caso['regressao'] = False
+        for medida in MEDIDAS:
+            limite = f'limite_{medida}'
+            if medida not in anterior:
+                caso[limite] = None
+                continue
+            caso[f'referencia_{medida}'] = anterior[medida]
+            caso[limite] = round(anterior[medida] * (1 + tolerancia) + folga, 6)
+            caso['regressao'] = caso['regressao'] or caso[medida] > caso[limite]
+    return [chave for chave, caso in casos.items() if caso['regressao']]
+
+
+def _processador():
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('model name'):
+                    return linha.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def ambiente():
+    import xgboost
+
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'xgboost': xgboost.__version__, 'plataforma': platform.platform(), 'processador': _processador(),
+            'cpus': os.cpu_count()}
+
+
+# Função para listar as diferenças entre o ambiente atual e o da referência: chave -> (referência, atual)
+def diferencas_ambiente(atual, gravado):
+    return {chave: (gravado.get(chave), valor) for chave, valor in atual.items() if gravado.get(chave) != valor}
+
+
+# Função para apontar o cache em disco do pipeline para um diretório temporário vazio. Precisa ser
+# chamada antes de o pipeline.colunar ser importado (o app.py e as etapas o importam na primeira execução).
+def cache_temporario():
+    if 'pipeline.colunar' in sys.modules:
+        raise RuntimeError('pipeline.colunar já foi importado: o cache temporário não teria efeito')
+    diretorio = tempfile.mkdtemp(prefix='benchmark_cache_')
+    os.environ['DIRETORIO_CACHE'] = diretorio
+    return diretorio
+
+
+def _ler_json(caminho):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _gravar_json(caminho, conteudo):
+    if os.path.dirname(caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(conteudo, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks do pipeline e do aplicativo')
+    parser.add_argument('--conjuntos', nargs='+', default=CONJUNTOS, choices=CONJUNTOS)
+    parser.add_argument('--etapas', nargs='+', default=ETAPAS, choices=ETAPAS)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', default=os.path.join(DIRETORIO_BENCHMARK, 'resultado.json'))
+    parser.add_argument('--referencia', default=CAMINHO_REFERENCIA)
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA, help='aumento relativo aceito')
+    parser.add_argument('--atualizar-referencia', action='store_true',
+                        help='grava os tempos medidos no arquivo de referência')
+    args = parser.parse_args()
+
+    gravada = _ler_json(args.referencia)
+    referencia = gravada.get('casos', {})
+    diferencas = diferencas_ambiente(ambiente(), gravada.get('ambiente', {})) if gravada else {}
+    if diferencas and not args.atualizar_referencia:
+        detalhes = '; '.join(f'{chave}: {antes} -> {depois}' for chave, (antes, depois) in diferencas.items())
+        print(f'Aviso: a referência foi gravada em outro ambiente ({detalhes}); os tempos podem não ser comparáveis',
+              file=sys.stderr)
+
+    # Com DIRETORIO_CACHE definido no ambiente, o cache indicado é usado como está
+    temporario = None if 'DIRETORIO_CACHE' in os.environ else cache_temporario()
+    try:
+        casos = executar(args.conjuntos, args.etapas, args.repeticoes)
+    finally:
+        if temporario:
+            shutil.rmtree(temporario, ignore_errors=True)
+    regressoes = comparar(casos, referencia, args.tolerancia)
+
+    resultado = {'ambiente': ambiente(), 'ambiente_diferente': sorted(diferencas), 'repeticoes': args.repeticoes,
+                 'tolerancia': args.tolerancia, 'folga_s': FOLGA_S, 'casos': casos, 'regressoes': regressoes}
+    _gravar_json(args.saida, resultado)
+    if args.atualizar_referencia:
+        # Os casos não medidos nesta execução mantêm a referência anterior
+        _gravar_json(args.referencia, {'ambiente': resultado['ambiente'], 'casos': {
+            **referencia, **{chave: {medida: caso[medida] for medida in MEDIDAS} for chave, caso in casos.items()}}})
+
+    tabela = pd.DataFrame(casos).T[['primeira_s', 'limite_primeira_s', 'melhor_s', 'limite_melhor_s', 'mediana_s',
+                                    'regressao']]
+    print(tabela.to_string())
+    print(f'Resultado gravado em {args.saida}')
+    if regressoes and not args.atualizar_referencia:
+        print(f'Regressões acima do limite: {", ".join(regressoes)}')
+        sys.exit(1)
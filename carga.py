@@ -0,0 +1,108 @@
+# Libs
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+# Teste de carga do serviço de previsão (servico.py).
+#
+# Abre várias conexões HTTP/1.1 persistentes e dispara as requisições de forma concorrente, medindo a
+# latência de cada uma. Ao final mostra vazão e percentis (a meta do serviço é p99 abaixo de 10ms).
+# Com --iniciar o próprio script sobe o serviço em um subprocesso antes do teste.
+#
+# Exemplo:  python carga.py --iniciar --requisicoes 5000 --conexoes 32
+
+ROTAS_PADRAO = ['/previsao?modelo=arima&h=1', '/previsao?modelo=arima&h=30',
+                '/previsao?modelo=xgb&h=1', '/previsao?modelo=xgb&h=5']
+
+
+async def _ler_resposta(leitor):
+    status = int((await leitor.readline()).split()[1])
+    tamanho = 0
+    while (linha := await leitor.readline()) not in (b'\r\n', b''):
+        nome, _, valor = linha.partition(b':')
+        if nome.lower() == b'content-length':
+            tamanho = int(valor)
+    return status, await leitor.readexactly(tamanho)
+
+
+# Conexão que envia as requisições em sequência, sorteando a rota de cada uma
+async def _conexao(host, porta, rotas, quantidade, latencias, erros, semente):
+    gerador = np.random.default_rng(semente)
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    pedidos = [f'GET {rota} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode() for rota in rotas]
+    for i in gerador.integers(0, len(rotas), size=quantidade):
+        inicio = time.perf_counter()
+        escritor.write(pedidos[i])
+        status, _ = await _ler_resposta(leitor)
+        latencias.append(time.perf_counter() - inicio)
+        if status != 200:
+            erros.append(status)
+    escritor.close()
+
+
+async def executar(url, rotas, requisicoes, conexoes):
+    partes = urlsplit(url)
+    latencias, erros = [], []
+    por_conexao = [requisicoes // conexoes + (i < requisicoes % conexoes) for i in range(conexoes)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_conexao(partes.hostname, partes.port or 80, rotas, n, latencias, erros, i)
+                           for i, n in enumerate(por_conexao)))
+    duracao = time.perf_counter() - inicio
+    latencias = np.array(latencias) * 1000
+    return {
+        'requisicoes': len(latencias),
+        'conexoes': conexoes,
+        'erros': len(erros),
+        'duracao_s': round(duracao, 3),
+        'vazao_rps': round(len(latencias) / duracao, 1),
+        **{f'p{q}_ms': round(float(np.percentile(latencias, q)), 3) for q in (50, 90, 99)},
+        'max_ms': round(float(latencias.max()), 3),
+    }
+
+
+# Função para subir o serviço em um subprocesso e esperar a rota de saúde responder
+def iniciar_servico(porta, espera=120):
+    processo = subprocess.Popen([sys.executable, 'servico.py', '--port', str(porta)])
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        try:
+            asyncio.run(executar(f'http://127.0.0.1:{porta}', ['/saude'], 1, 1))
+            return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise TimeoutError(f'O serviço não respondeu em {espera}s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Teste de carga do serviço de previsão')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--rotas', nargs='+', default=ROTAS_PADRAO)
+    parser.add_argument('--requisicoes', type=int, default=5000)
+    parser.add_argument('--conexoes', type=int, default=16)
+    parser.add_argument('--aquecimento', type=int, default=200, help='requisições descartadas antes da medição')
+    parser.add_argument('--iniciar', action='store_true', help='sobe o serviço antes do teste')
+    parser.add_argument('--meta-p99', type=float, default=10.0, help='meta de p99 em ms')
+    args = parser.parse_args()
+
+    processo = iniciar_servico(urlsplit(args.url).port or 80) if args.iniciar else None
+    try:
+        asyncio.run(executar(args.url, args.rotas, args.aquecimento, args.conexoes))
+        resultado = asyncio.run(executar(args.url, args.rotas, args.requisicoes, args.conexoes))
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+    print(json.dumps(resultado, indent=2))
+    if resultado['erros'] or resultado['p99_ms'] > args.meta_p99:
+        print(f'Meta não atingida (p99 <= {args.meta_p99}ms, sem erros)')
+        sys.exit(1)
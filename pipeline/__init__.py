@@ -0,0 +1 @@
+# Pacote com as rotinas de dados e modelos utilizadas pelo aplicativo e pelos notebooks
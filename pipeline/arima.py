@@ -0,0 +1,204 @@
+# Libs
+
+import warnings
+from math import comb
+
+import numpy as np
+
+
+# Modelo ARIMA dinâmico em espaço de estados.
+#
+# O laço original do notebook reajustava ARIMA(history, order=(5,1,0)) a cada dia de teste e
+# recriava o histórico com pd.concat. Aqui o modelo é ajustado uma única vez (ou a cada
+# `reajuste` observações) e, entre os reajustes, cada nova observação apenas atualiza o estado
+# do filtro de Kalman da parte ARMA da série diferenciada, com custo constante por passo.
+class ARIMADinamico:
+
+    def __init__(self, order=(5, 1, 0), reajuste=None, params=None):
+        self.order = tuple(order)
+        self.reajuste = reajuste
+        self.params = None if params is None else dict(params)
+        self._historico = np.empty(0)
+        self._n = 0
+        self._desde_ajuste = 0
+
+    # Ajuste inicial do modelo sobre o histórico de treino
+    def fit(self, y):
+        y = np.asarray(y, dtype=float).ravel()
+        self._historico = np.empty(max(2 * len(y), 16))
+        self._historico[:len(y)] = y
+        self._n = len(y)
+        if self.params is None:
+            self.params = _estimar_parametros(y, self.order)
+        self._montar_matrizes()
+        self._filtrar_historico()
+        return self
+
+    # Previsão de um passo à frente a partir do estado atual
+    def forecast(self):
+        w_prev = self._a[0] + self._media
+        return w_prev + self._nivel_integrado()
+
+    # Previsão de h passos à frente sem alterar o estado do modelo
+    def forecast_passos(self, h):
+        a = self._a.copy()
+        niveis = np.concatenate([self._historico[self._n - self._d:self._n], np.empty(h)])
+        previsoes = niveis[self._d:]
+        for i in range(h):
+            nivel = float(self._coef_nivel @ niveis[i:i + self._d]) if self._d else 0.0
+            previsoes[i] = a[0] + self._media + nivel
+            a = self._T @ a
+        return previsoes.copy()
+
+    # Atualização do estado com o valor observado no dia
+    def update(self, obs):
+        obs = float(obs)
+        self._acrescentar(obs)
+        w = _diferenciar(self._historico[self._n - self._d - 1:self._n], self._d)
+        self._passo_filtro(w - self._media)
+
+        self._desde_ajuste += 1
+        if self.reajuste and self._desde_ajuste >= self.reajuste:
+            self._reajustar()
+
+    # Laço de previsão dinâmica: prevê cada dia de teste e incorpora a observação em seguida
+    def walk_forward(self, teste):
+        teste = np.asarray(teste, dtype=float).ravel()
+        previsoes = np.empty(len(teste))
+        for i, obs in enumerate(teste):
+            previsoes[i] = self.forecast()
+            self.update(obs)
+        return previsoes
+
+    @property
+    def historico(self):
+        return self._historico[:self._n]
+
+    def _acrescentar(self, obs):
+        # Buffer pré-alocado que dobra de tamanho, evitando o pd.concat a cada passo
+        if self._n == len(self._historico):
+            novo = np.empty(2 * len(self._historico))
+            novo[:self._n] = self._historico[:self._n]
+            self._historico = novo
+        self._historico[self._n] = obs
+        self._n += 1
+
+    def _reajustar(self):
+        self.params = _estimar_parametros(self.historico, self.order, self.params)
+        self._montar_matrizes()
+        self._filtrar_historico()
+
+    def _montar_matrizes(self):
+        p, d, q = self.order
+        ar = np.array([self.params.get(f'ar.L{i}', 0.0) for i in range(1, p + 1)])
+        ma = np.array([self.params.get(f'ma.L{i}', 0.0) for i in range(1, q + 1)])
+        sigma2 = self.params['sigma2']
+        r = max(p, q + 1)
+
+        # Representação de Harvey: w_t = Z a_t, a_{t+1} = T a_t + R e_{t+1}
+        T = np.zeros((r, r))
+        T[:p, 0] = ar
+        T[:-1, 1:] = np.eye(r - 1)
+        R = np.zeros(r)
+        R[0] = 1.0
+        R[1:q + 1] = ma
+
+        self._d = d
+        self._media = self.params.get('const', 0.0)
+        self._T = T
+        self._RQR = sigma2 * np.outer(R, R)
+        self._P0 = _covariancia_estacionaria(T, self._RQR)
+        # Coeficientes para desfazer a diferenciação: y_t = w_t - sum_k (-1)^k C(d,k) y_{t-k}
+        self._coef_nivel = np.array([-(-1) ** k * comb(d, k) for k in range(d, 0, -1)])
+
+    def _filtrar_historico(self):
+        self._a = np.zeros(self._T.shape[0])
+        self._P = self._P0.copy()
+        w = np.diff(self.historico, n=self._d) - self._media
+        for valor in w:
+            self._passo_filtro(valor)
+        self._desde_ajuste = 0
+
+    def _passo_filtro(self, v_obs):
+        # Atualização do filtro de Kalman (sem ruído de observação) seguida da predição
+        a, P = self._a, self._P
+        F = P[0, 0]
+        v = v_obs - a[0]
+        if F > 1e-12:
+            K = P[:, 0] / F
+            a = a + K * v
+            P = P - np.outer(K, P[0, :])
+        self._a = self._T @ a
+        self._P = self._T @ P @ self._T.T + self._RQR
+
+    def _nivel_integrado(self):
+        if self._d == 0:
+            return 0.0
+        return float(self._coef_nivel @ self._historico[self._n - self._d:self._n])
+
+
+# Função para estimar os parâmetros por máxima verossimilhança com o statsmodels
+def _estimar_parametros(y, order, start_params=None):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        modelo = ARIMA(y, order=order)
+        if start_params is not None:
+            start_params = [start_params[nome] for nome in modelo.param_names]
+        resultado = modelo.fit(start_params=start_params)
+    return dict(zip(resultado.model.param_names, resultado.params))
+
+
+# Diferença de ordem d do último ponto de uma janela com d + 1 valores
+def _diferenciar(janela, d):
+    return float(np.diff(janela, n=d)[-1]) if d else float(janela[-1])
+
+
+# Covariância inicial do estado (distribuição estacionária da parte ARMA)
+def _covariancia_estacionaria(T, RQR):
+    r = T.shape[0]
+    try:
+        vec = np.linalg.solve(np.eye(r * r) - np.kron(T, T), RQR.ravel())
+        P0 = vec.reshape(r, r)
+        if np.all(np.isfinite(P0)) and np.all(np.diag(P0) >= 0):
+            return P0
+    except np.linalg.LinAlgError:
+        pass
+    # Inicialização difusa aproximada quando a parte AR não é estacionária
+    return np.eye(r) * 1e6
+
+
+# Função que reproduz o modelo ARIMA dinâmico da aba ARIMA sobre séries de treino e teste
+def arima_dinamico(treino, teste, order=(5, 1, 0), reajuste=None):
+    modelo = ARIMADinamico(order=order, reajuste=reajuste).fit(treino)
+    return modelo.walk_forward(teste)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from pipeline.dados import carregar_serie_arima, carregar_serie_modelo, separar_treino_teste
+    from pipeline.metricas import avaliar_lote
+
+    parser = argparse.ArgumentParser(description='Backtest do modelo ARIMA dinâmico')
+    parser.add_argument('--order', type=int, nargs=3, default=(5, 1, 0))
+    parser.add_argument('--reajuste', type=int, default=None, help='reestimar os parâmetros a cada k dias')
+    parser.add_argument('--completa', action='store_true', help='utilizar a série de 2003 a 2023 (ibov_modelo.csv)')
+    parser.add_argument('--corte', default='2022-01-01')
+    args = parser.parse_args()
+
+    serie = carregar_serie_modelo() if args.completa else carregar_serie_arima()
+    treino, teste = separar_treino_teste(serie, args.corte)
+
+    inicio = time.perf_counter()
+    y_pred = arima_dinamico(treino.y.values, teste.y.values, order=args.order, reajuste=args.reajuste)
+    duracao = time.perf_counter() - inicio
+
+    metricas = avaliar_lote(teste.y.values, y_pred).iloc[0]
+    model_ = 'ARIMA dinâmico'
+    print(f'{model_} WMAPE: {metricas["WMAPE"]:.2%}')
+    print(f'{model_} Test RMSE: %.2f' % metricas['RMSE'])
+    print(f'{model_} MAE: %.2f' % metricas['MAE'])
+    print(f'Tempo: {duracao:.2f}s ({len(treino)} treino, {len(teste)} teste)')
@@ -0,0 +1,181 @@
+# Libs
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from pipeline.colunar import DIRETORIO_CACHE, hash_arquivo
+
+
+# Armazenamento em disco de uma série diária, ordenado por data e apenas com acréscimos.
+#
+# Cada coluna é um arquivo binário simples ({i}.bin) com os valores em sequência, e o meta.json guarda
+# o tipo de cada coluna, o número de linhas válidas e o histórico de alterações. Acrescentar dias novos
+# escreve apenas os bytes das linhas novas no fim de cada arquivo, em tempo proporcional às linhas
+# novas e não ao histórico inteiro. O meta.json é trocado de forma atômica depois dos dados: se a
+# gravação for interrompida, os bytes excedentes são ignorados (e descartados no próximo acréscimo).
+#
+# Cada acréscimo gera uma nova versão com a primeira data alterada. Quem guardou a versão sobre a qual
+# foi construído (recortes, caches, modelos) consulta afetado(versao, fim) para saber se o período que
+# utilizou mudou, em vez de ser descartado a cada atualização.
+
+DIRETORIO_ARMAZEM = os.path.join(DIRETORIO_CACHE, 'armazem')
+
+# Número de alterações mantidas no histórico do meta.json
+MAX_ALTERACOES = 1000
+
+
+class ArmazemSerie:
+
+    def __init__(self, diretorio, coluna_data='Data'):
+        self.diretorio = diretorio
+        self.coluna_data = coluna_data
+        self.meta = {'colunas': {}, 'linhas': 0, 'versao': 0, 'alteracoes': []}
+        caminho = os.path.join(diretorio, 'meta.json')
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as arquivo:
+                self.meta = json.load(arquivo)
+
+    def __len__(self):
+        return self.meta['linhas']
+
+    @property
+    def versao(self):
+        return self.meta['versao']
+
+    # Hash do meta.json, que muda a cada alteração: identifica o conteúdo mesmo que o diretório seja recriado
+    @property
+    def hash(self):
+        return hash_arquivo(os.path.join(self.diretorio, 'meta.json'))
+
+    @property
+    def colunas(self):
+        return list(self.meta['colunas'])
+
+    def _arquivo(self, nome):
+        return os.path.join(self.diretorio, f'{self.colunas.index(nome)}.bin')
+
+    # Visão somente leitura de uma coluna, mapeada do disco
+    def coluna(self, nome):
+        tipo = np.dtype(self.meta['colunas'][nome])
+        if not len(self):
+            return np.empty(0, dtype=tipo)
+        return np.memmap(self._arquivo(nome), dtype=tipo, mode='r', shape=(len(self),))
+
+    def __getitem__(self, nome):
+        return self.coluna(nome)
+
+    def datas(self):
+        return self.coluna(self.coluna_data)
+
+    @property
+    def ultima_data(self):
+        return self.datas()[-1] if len(self) else None
+
+    # Função para ler o período [inicio, fim] como DataFrame, por busca binária nas datas
+    def ler(self, inicio=None, fim=None):
+        datas = self.datas()
+        esquerda = 0 if inicio is None else int(np.searchsorted(datas, np.datetime64(inicio, 'D'), side='left'))
+        direita = len(datas) if fim is None else int(np.searchsorted(datas, np.datetime64(fim, 'D'), side='right'))
+        return pd.DataFrame({nome: np.array(self.coluna(nome)[esquerda:direita]) for nome in self.colunas})
+
+    # Primeira data alterada desde a versão informada (None quando nada mudou)
+    def alterado_desde(self, versao):
+        if versao >= self.versao:
+            return None
+        historico = [inicio for v, inicio in self.meta['alteracoes'] if v > versao]
+        if len(historico) < self.versao - versao:
+            # Histórico mais curto que o intervalo pedido: considera tudo alterado
+            return self.datas()[0]
+        return min(np.datetime64(inicio, 'D') for inicio in historico)
+
+    # Função para saber se o período até `fim`, lido na versão informada, mudou desde então
+    def afetado(self, versao, fim=None):
+        inicio = self.alterado_desde(versao)
+        return inicio is not None and (fim is None or inicio <= np.datetime64(fim, 'D'))
+
+    # Função para acrescentar linhas, descartando as datas já armazenadas.
+    # Devolve a alteração ({versao, inicio, fim, linhas}) ou None quando não há datas novas.
+    def acrescentar(self, df):
+        novas = self._preparar(df)
+        if len(self):
+            datas = self.datas()
+            posicoes = np.searchsorted(datas, novas[self.coluna_data])
+            encontradas = datas[np.minimum(posicoes, len(datas) - 1)]
+            existentes = (posicoes < len(datas)) & (encontradas == novas[self.coluna_data])
+            novas = {nome: valores[~existentes] for nome, valores in novas.items()}
+        quantidade = len(novas[self.coluna_data])
+        if not quantidade:
+            return None
+
+        inicio = novas[self.coluna_data][0]
+        os.makedirs(self.diretorio, exist_ok=True)
+        if len(self) and inicio <= self.ultima_data:
+            # Datas anteriores ao fim do armazenamento: as colunas são reescritas com a intercalação
+            self._reescrever(novas)
+        else:
+            for nome, valores in novas.items():
+                with open(self._arquivo(nome), 'ab') as arquivo:
+                    # Descarta bytes de uma gravação interrompida antes de acrescentar
+                    arquivo.truncate(len(self) * valores.dtype.itemsize)
+                    arquivo.write(valores.tobytes())
+            self.meta['linhas'] += quantidade
+
+        self.meta['versao'] += 1
+        alteracao = {'versao': self.versao, 'inicio': str(inicio),
+                     'fim': str(novas[self.coluna_data][-1]), 'linhas': quantidade}
+        self.meta['alteracoes'] = (self.meta['alteracoes'] + [[self.versao, alteracao['inicio']]])[-MAX_ALTERACOES:]
+        self._gravar_meta()
+        return alteracao
+
+    # Função para substituir todo o conteúdo (consolidação completa), também como uma nova versão
+    def substituir(self, df):
+        if not len(df):
+            raise ValueError('Nenhuma linha para armazenar')
+        self.meta['colunas'] = {}
+        novas = self._preparar(df)
+        os.makedirs(self.diretorio, exist_ok=True)
+        for nome, valores in novas.items():
+            temporario = self._arquivo(nome) + '.tmp'
+            valores.tofile(temporario)
+            os.replace(temporario, self._arquivo(nome))
+        self.meta['linhas'] = len(novas[self.coluna_data])
+        self.meta['versao'] += 1
+        inicio = str(novas[self.coluna_data][0])
+        self.meta['alteracoes'] = (self.meta['alteracoes'] + [[self.versao, inicio]])[-MAX_ALTERACOES:]
+        self._gravar_meta()
+        return self
+
+    def _preparar(self, df):
+        # Ordena por data e mantém a última ocorrência de cada data do próprio lote
+        df = df.sort_values(self.coluna_data, kind='stable').drop_duplicates(self.coluna_data, keep='last')
+        if not self.meta['colunas']:
+            colunas = [self.coluna_data] + [c for c in df.columns if c != self.coluna_data]
+            self.meta['colunas'] = {
+                nome: ('datetime64[D]' if nome == self.coluna_data else np.asarray(df[nome]).dtype.str)
+                for nome in colunas
+            }
+        faltantes = set(self.colunas) - set(df.columns)
+        if faltantes:
+            raise ValueError(f'Colunas ausentes: {sorted(faltantes)}')
+        return {nome: np.ascontiguousarray(np.asarray(df[nome]).astype(tipo))
+                for nome, tipo in self.meta['colunas'].items()}
+
+    def _reescrever(self, novas):
+        atuais = {nome: np.array(self.coluna(nome)) for nome in self.colunas}
+        ordem = np.argsort(np.concatenate([atuais[self.coluna_data], novas[self.coluna_data]]), kind='stable')
+        for nome in self.colunas:
+            valores = np.concatenate([atuais[nome], novas[nome]])[ordem]
+            temporario = self._arquivo(nome) + '.tmp'
+            valores.tofile(temporario)
+            os.replace(temporario, self._arquivo(nome))
+        self.meta['linhas'] = len(ordem)
+
+    def _gravar_meta(self):
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix='.tmp-', suffix='.json')
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.meta, arquivo, ensure_ascii=False)
+        os.replace(temporario, os.path.join(self.diretorio, 'meta.json'))
@@ -0,0 +1,95 @@
+# Libs
+
+import os
+
+import pandas as pd
+
+from pipeline.armazem import ArmazemSerie
+from pipeline.colunar import hash_arquivo
+from pipeline.consolidacao import COLUNAS, DIRETORIO_CANONICO, FONTES, consolidar, fontes_alteradas
+from pipeline.exportacao import preservar_recortes
+from pipeline.ingestao import COLUNAS_PRECO, _ler_bruto, processar_investing
+
+
+# Atualização incremental dos dados a partir de uma nova exportação da investing.com.
+#
+# Em vez de processar de novo os 20 anos de histórico, apenas as linhas novas da exportação são lidas
+# (o arquivo vem do dia mais recente para o mais antigo, então a leitura para ao alcançar a última data
+# já armazenada). As datas já existentes são descartadas e as novas são acrescentadas ao armazenamento
+# canônico (pipeline/consolidacao.py), a única origem dos dados do aplicativo, dos modelos e do serviço.
+# Quando a exportação é uma das fontes da consolidação, o novo hash dela é registrado junto com o
+# acréscimo, e a próxima abertura do armazenamento não consolida tudo de novo. Sem datas novas, o hash
+# não é registrado: a exportação mudou apenas em datas já armazenadas e a próxima abertura a consolida.
+# Os caches derivados (tabelas, gráficos, modelos, exportações) são indexados pelo hash do meta.json do
+# armazenamento e passam para a nova versão sozinhos. Só os recortes de exportação que terminam antes da
+# primeira data alterada são aproveitados: os caches de gráficos e modelos são invalidados por qualquer
+# acréscimo, mesmo fora do período que utilizam, porque todos cobrem a série até a última data.
+
+CAMINHO_EXPORTACAO = 'Assets/Base/ibovespa.csv'
+
+# Linhas lidas por vez da exportação
+TAMANHO_LOTE = 64
+
+
+# Função para ler da exportação apenas as linhas posteriores à última data armazenada
+def ler_novas_linhas(caminho, ultima_data=None, tamanho_lote=TAMANHO_LOTE):
+    partes = []
+    for i, bloco in enumerate(_ler_bruto(caminho, chunksize=tamanho_lote)):
+        # Como na consolidação, os dias sem volume são mantidos (Vol. ausente) e só os dias sem preço são
+        # descartados: removidos aqui, ficariam para trás da última data e nunca seriam lidos de novo
+        df = processar_investing(bloco, remover_nulos=False).reindex(columns=COLUNAS)
+        partes.append(df.dropna(subset=COLUNAS_PRECO))
+        datas = df['Data'].to_numpy()
+        # Só é possível parar cedo quando a exportação está em ordem descendente
+        descendente = i > 0 or len(datas) < 2 or datas[0] >= datas[-1]
+        if ultima_data is not None and descendente and len(datas) and datas.min() <= ultima_data:
+            break
+    if not partes:
+        return pd.DataFrame(columns=['Data'])
+    return pd.concat(partes, ignore_index=True)
+
+def _mesmo_caminho(a, b):
+    return os.path.normpath(a) == os.path.normpath(b)
+
+
+# Função para registrar o hash atual da exportação, quando ela é uma das fontes da consolidação
+def _registrar_fonte(armazem, exportacao):
+    for fonte in armazem.meta.get('fontes', []):
+        if _mesmo_caminho(fonte['caminho'], exportacao):
+            fonte['hash'] = hash_arquivo(exportacao)
+
+
+# Função principal: ingere as linhas novas da exportação no armazenamento canônico.
+# Com completa=True a exportação inteira é lida, para preencher lacunas no meio do histórico.
+# Devolve a alteração do armazenamento (None quando não há datas novas).
+def atualizar(exportacao=CAMINHO_EXPORTACAO, diretorio=DIRETORIO_CANONICO, completa=False, fontes=FONTES):
+    # Armazenamento vazio ou outra fonte alterada: todas as fontes são consolidadas antes do acréscimo
+    armazem = ArmazemSerie(diretorio)
+    if not len(armazem) or [c for c in fontes_alteradas(armazem, fontes) if not _mesmo_caminho(c, exportacao)]:
+        armazem = consolidar(fontes, diretorio)
+    hash_anterior = armazem.hash
+    novas = ler_novas_linhas(exportacao, None if completa else armazem.ultima_data)
+    _registrar_fonte(armazem, exportacao)
+    alteracao = armazem.acrescentar(novas) if len(novas) else None
+    if alteracao is None:
+        return None
+    return {**alteracao, 'recortes_preservados': preservar_recortes(armazem, hash_anterior, alteracao['inicio'])}
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Atualiza os dados com as linhas novas de uma exportação')
+    parser.add_argument('exportacao', nargs='?', default=CAMINHO_EXPORTACAO)
+    parser.add_argument('--completa', action='store_true', help='lê a exportação inteira (preenche lacunas)')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    alteracao = atualizar(args.exportacao, completa=args.completa)
+    duracao = time.perf_counter() - inicio
+    if alteracao is None:
+        print(f'Nenhuma data nova ({duracao * 1000:.1f}ms)')
+    else:
+        print(f"{alteracao['linhas']} linhas novas de {alteracao['inicio']} a {alteracao['fim']} "
+              f"(versão {alteracao['versao']}) em {duracao * 1000:.1f}ms")
@@ -0,0 +1,108 @@
+# Libs
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Funções de autocorrelação (ACF) e autocorrelação parcial (PACF) para escolher as ordens dos modelos ARIMA.
+#
+# - acf: autocovariâncias de todas as defasagens de uma vez pela FFT, em O(n log n) em vez de uma
+#   correlação por defasagem;
+# - pacf: recursão de Durbin-Levinson sobre a ACF, em O(nlags²), sem uma regressão por defasagem.
+# Séries (n,) ou lotes (m, n) são aceitos (as séries ficam no último eixo), e janelas() monta o lote
+# de janelas móveis de uma série sem copiar os dados. Os resultados são iguais aos do statsmodels
+# com acf(fft=True, adjusted=False) e pacf(method='ldb'), o padrão do plot_pacf.
+
+
+def _quantil_normal(alfa):
+    from scipy.stats import norm
+
+    return norm.ppf(1 - alfa / 2)
+
+
+# Função para montar o lote (m, tamanho) das janelas móveis de uma série, sem cópia
+def janelas(x, tamanho, passo=1):
+    return sliding_window_view(np.asarray(x, dtype=float), tamanho, axis=-1)[..., ::passo, :]
+
+
+# Função para calcular as autocovariâncias (divididas por n) das defasagens 0 a nlags pela FFT
+def autocovariancia(x, nlags):
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    c = x - x.mean(axis=-1, keepdims=True)
+    # Com o preenchimento até 2n - 1 a correlação circular da FFT fica igual à correlação linear
+    tamanho = 1 << int(np.ceil(np.log2(2 * n - 1)))
+    espectro = np.fft.rfft(c, tamanho, axis=-1)
+    return np.fft.irfft(espectro * np.conj(espectro), tamanho, axis=-1)[..., :nlags + 1] / n
+
+
+# Função para calcular a ACF e, opcionalmente, o intervalo de confiança pela fórmula de Bartlett
+def acf(x, nlags=40, alfa=None):
+    x = np.asarray(x, dtype=float)
+    nlags = min(nlags, x.shape[-1] - 1)
+    covariancia = autocovariancia(x, nlags)
+    correlacao = covariancia / covariancia[..., :1]
+    if alfa is None:
+        return correlacao
+
+    n = x.shape[-1]
+    variancia = np.ones_like(correlacao) / n
+    variancia[..., 0] = 0
+    variancia[..., 2:] *= 1 + 2 * np.cumsum(correlacao[..., 1:-1] ** 2, axis=-1)
+    margem = _quantil_normal(alfa) * np.sqrt(variancia)
+    return correlacao, np.stack([correlacao - margem, correlacao + margem], axis=-1)
+
+
+# Função para obter a PACF a partir da ACF pela recursão de Durbin-Levinson, para todo o lote de uma vez
+def durbin_levinson(correlacao, nlags):
+    correlacao = np.asarray(correlacao, dtype=float)
+    lote = correlacao.shape[:-1]
+    parcial = np.ones(lote + (nlags + 1,))
+    if nlags == 0:
+        return parcial
+    phi = np.zeros(lote + (nlags + 1,))
+    phi[..., 1] = correlacao[..., 1]
+    parcial[..., 1] = correlacao[..., 1]
+    for k in range(2, nlags + 1):
+        anteriores = phi[..., 1:k]
+        numerador = correlacao[..., k] - np.sum(anteriores * correlacao[..., k - 1:0:-1], axis=-1)
+        denominador = 1 - np.sum(anteriores * correlacao[..., 1:k], axis=-1)
+        phi_kk = numerador / denominador
+        phi[..., 1:k] = anteriores - phi_kk[..., None] * anteriores[..., ::-1]
+        phi[..., k] = phi_kk
+        parcial[..., k] = phi_kk
+    return parcial
+
+
+# Função para calcular a PACF e, opcionalmente, o intervalo de confiança (±z/√n)
+def pacf(x, nlags=40, alfa=None):
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    nlags = min(nlags, n // 2 - 1)
+    parcial = durbin_levinson(acf(x, nlags), nlags)
+    if alfa is None:
+        return parcial
+
+    margem = np.full(parcial.shape, _quantil_normal(alfa) / np.sqrt(n))
+    margem[..., 0] = 0
+    return parcial, np.stack([parcial - margem, parcial + margem], axis=-1)
+
+
+if __name__ == '__main__':
+    import time
+
+    from pipeline.dados import carregar_serie_arima
+
+    diferenciada = np.diff(carregar_serie_arima()['y'].to_numpy())
+
+    inicio = time.perf_counter()
+    lote = janelas(diferenciada, 500)
+    correlacoes = acf(lote, nlags=200)
+    parciais = durbin_levinson(correlacoes, 200)
+    duracao = time.perf_counter() - inicio
+    print(f'ACF e PACF de {len(lote)} janelas com 200 defasagens em {duracao * 1000:.0f}ms')
+
+    correlacao, intervalo = acf(diferenciada, nlags=20, alfa=0.05)
+    parcial, _ = pacf(diferenciada, nlags=20, alfa=0.05)
+    fora = np.abs(correlacao[1:]) > intervalo[1:, 1] - correlacao[1:]
+    print('Defasagens com ACF significativa (5%):', (np.flatnonzero(fora) + 1).tolist())
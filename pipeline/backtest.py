@@ -0,0 +1,180 @@
+# Libs
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from pipeline.metricas import AcumuladorMetricas
+
+
+# Backtest com múltiplas origens de previsão (rolling origin).
+#
+# A série é copiada uma única vez para um bloco de memória compartilhada; cada processo do pool
+# apenas cria uma visão NumPy sobre esse bloco, sem receber cópias dos dados a cada tarefa.
+
+
+# Modelos disponíveis: cada função recebe o treino e o horizonte e devolve as previsões
+def _arima_padrao(treino, teste, order=(5, 1, 0)):
+    from pipeline.arima import ARIMADinamico
+
+    # Sem atualização do filtro: previsão de vários passos a partir do fim do treino
+    return ARIMADinamico(order=order).fit(treino).forecast_passos(len(teste))
+
+
+def _arima_dinamico(treino, teste, order=(5, 1, 0), reajuste=None):
+    from pipeline.arima import arima_dinamico
+
+    return arima_dinamico(treino, teste, order=order, reajuste=reajuste)
+
+
+def _modelo_naive(nome):
+    def prever(treino, teste, **parametros):
+        from pipeline import naive
+
+        return getattr(naive, nome)(treino, len(teste), **parametros)
+    return prever
+
+
+MODELOS = {
+    'arima': _arima_padrao,
+    'arima_dinamico': _arima_dinamico,
+    'naive': _modelo_naive('naive'),
+    'seasonal_naive': _modelo_naive('seasonal_naive'),
+    'window_average': _modelo_naive('window_average'),
+    'seas_wa': _modelo_naive('seasonal_window_average'),
+}
+
+
+# Variáveis do processo de trabalho, preenchidas pelo inicializador do pool
+_serie_worker = None
+_shm_worker = None
+
+
+def _iniciar_worker(nome, tamanho, dtype):
+    global _serie_worker, _shm_worker
+    warnings.filterwarnings('ignore')
+    # Os processos do pool compartilham o resource_tracker do processo principal,
+    # que é o único responsável por remover o bloco ao final do backtest
+    _shm_worker = shared_memory.SharedMemory(name=nome)
+    _serie_worker = np.ndarray((tamanho,), dtype=dtype, buffer=_shm_worker.buf)
+    _serie_worker.flags.writeable = False
+
+
+def _executar_origem(serie, origem, h, modelo, parametros):
+    treino = serie[:origem]
+    teste = serie[origem:origem + h]
+    previsoes = MODELOS[modelo](treino, teste, **parametros)
+    return origem, np.asarray(teste, dtype=float), np.asarray(previsoes, dtype=float)
+
+
+def _tarefa_worker(origem, h, modelo, parametros):
+    return _executar_origem(_serie_worker, origem, h, modelo, parametros)
+
+
+# Função para converter datas de origem em posições na série
+def posicoes_origens(serie, origens):
+    if _sao_inteiros(origens):
+        return [int(o) for o in origens]
+    return serie.index.searchsorted(pd.to_datetime(origens)).astype(int).tolist()
+
+
+def _sao_inteiros(origens):
+    return all(isinstance(o, (int, np.integer)) for o in origens)
+
+
+# Função para gerar origens igualmente espaçadas ao longo da série
+def gerar_origens(n, inicio, h, passo):
+    return list(range(inicio, n - h + 1, passo))
+
+
+# Função principal do backtest: executa o modelo em cada origem e agrega os erros
+def backtest(serie, origens, h, modelo='arima_dinamico', parametros=None, n_jobs=None):
+    if modelo not in MODELOS:
+        raise ValueError(f'Modelo desconhecido: {modelo}. Opções: {sorted(MODELOS)}')
+    parametros = parametros or {}
+    posicoes = posicoes_origens(serie, origens)
+    valores = np.ascontiguousarray(np.asarray(serie, dtype=float).ravel())
+
+    for origem in posicoes:
+        if origem <= 0 or origem >= len(valores):
+            raise ValueError(f'Origem fora da série: {origem}')
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(posicoes) == 1:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            resultados = [_executar_origem(valores, o, h, modelo, parametros) for o in posicoes]
+    else:
+        resultados = _executar_em_paralelo(valores, posicoes, h, modelo, parametros, n_jobs)
+
+    return _consolidar(serie, resultados)
+
+
+def _executar_em_paralelo(valores, posicoes, h, modelo, parametros, n_jobs):
+    shm = shared_memory.SharedMemory(create=True, size=valores.nbytes)
+    try:
+        compartilhada = np.ndarray(valores.shape, dtype=valores.dtype, buffer=shm.buf)
+        compartilhada[:] = valores
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_iniciar_worker,
+                                 initargs=(shm.name, len(valores), valores.dtype.str)) as pool:
+            futuros = [pool.submit(_tarefa_worker, o, h, modelo, parametros) for o in posicoes]
+            resultados = [f.result() for f in futuros]
+        del compartilhada
+    finally:
+        shm.close()
+        shm.unlink()
+    return resultados
+
+
+def _consolidar(serie, resultados):
+    indice = serie.index if isinstance(serie, (pd.Series, pd.DataFrame)) else None
+    valores = np.asarray(serie, dtype=float).ravel()
+    # Cada origem é um período do acumulador: as métricas por origem e as agregadas saem das mesmas somas
+    acumulador = AcumuladorMetricas()
+    for origem, teste, previsoes in resultados:
+        anterior = np.concatenate([valores[origem - 1:origem], teste[:-1]])
+        acumulador.update(teste, previsoes, anterior=anterior, periodos=np.full(len(teste), origem))
+
+    por_origem = acumulador.resultado_por_periodo().loc[0].reset_index()
+    por_origem = por_origem.rename(columns={'periodo': 'origem', 'n': 'h'})
+    if indice is not None:
+        por_origem['origem'] = indice[por_origem['origem'].to_numpy()]
+    por_origem = por_origem[['origem', 'h', 'WMAPE', 'RMSE', 'MAE', 'acuracia_direcao']]
+
+    # Métricas agregadas sobre todas as previsões de todas as origens
+    agregado = acumulador.resultado().iloc[0][['WMAPE', 'RMSE', 'MAE', 'acuracia_direcao']].to_dict()
+    return por_origem, agregado
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from pipeline.dados import carregar_serie_arima, carregar_serie_modelo
+
+    parser = argparse.ArgumentParser(description='Backtest com múltiplas origens de previsão')
+    parser.add_argument('--modelo', default='arima_dinamico', choices=sorted(MODELOS))
+    parser.add_argument('--h', type=int, default=30, help='horizonte de cada origem em dias')
+    parser.add_argument('--passo', type=int, default=90, help='distância entre origens em dias')
+    parser.add_argument('--inicio', default='2012-01-01')
+    parser.add_argument('--completa', action='store_true', help='utilizar a série de 2003 a 2023 (ibov_modelo.csv)')
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    serie = carregar_serie_modelo() if args.completa else carregar_serie_arima()
+    inicio = posicoes_origens(serie, [args.inicio])[0]
+    origens = gerar_origens(len(serie), inicio, args.h, args.passo)
+
+    t0 = time.perf_counter()
+    por_origem, agregado = backtest(serie.y, origens, args.h, modelo=args.modelo, n_jobs=args.n_jobs)
+    duracao = time.perf_counter() - t0
+
+    print(por_origem.to_string(index=False))
+    print(f'{args.modelo} WMAPE: {agregado["WMAPE"]:.2%}')
+    print(f'{args.modelo} Test RMSE: %.2f' % agregado['RMSE'])
+    print(f'{args.modelo} MAE: %.2f' % agregado['MAE'])
+    print(f'Tempo: {duracao:.2f}s ({len(origens)} origens)')
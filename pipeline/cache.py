@@ -0,0 +1,227 @@
+# Libs
+
+import functools
+import hashlib
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# Cache em memória com limite de bytes, usado pelo aplicativo e pelo pipeline.
+#
+# Diferente do @st.cache_data, que guarda um resultado por combinação de argumentos sem limite
+# de tamanho, cada cache aqui tem um teto em bytes (e opcionalmente de itens e de tempo de vida).
+# Ao passar do teto, os itens usados há mais tempo são removidos (LRU). As chaves são calculadas
+# a partir do conteúdo dos argumentos e cada cache mantém contadores de acertos, falhas e remoções.
+#
+# Os valores são devolvidos sem cópia: quem usa o cache não deve modificá-los.
+
+MB = 1 << 20
+
+# Caches criados, para a consulta das estatísticas
+_caches = {}
+_trava_registro = threading.RLock()
+
+# Consultas feitas pela thread atual, anotadas apenas enquanto a instrumentação do aplicativo
+# (pipeline/instrumentacao.py) estiver medindo uma seção: lista de (cache, acerto)
+_consultas_thread = threading.local()
+
+
+def consultas_thread():
+    return getattr(_consultas_thread, 'registro', None)
+
+
+def definir_consultas_thread(registro):
+    _consultas_thread.registro = registro
+
+
+def _anotar_consulta(nome, acerto):
+    registro = getattr(_consultas_thread, 'registro', None)
+    if registro is not None:
+        registro.append((nome, acerto))
+
+
+# Função para estimar quantos bytes um objeto ocupa em memória
+def tamanho_bytes(obj):
+    if isinstance(obj, np.memmap):
+        # Páginas mapeadas de arquivo ficam no cache do sistema e são compartilhadas entre processos
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum() if hasattr(uso, 'sum') else uso)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+    if isinstance(obj, str):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(tamanho_bytes(k) + tamanho_bytes(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(tamanho_bytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def _atualizar_hash(sha, obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        sha.update(type(obj).__name__.encode())
+        sha.update(repr(list(obj.columns) if isinstance(obj, pd.DataFrame) else obj.name).encode())
+        sha.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        sha.update(f'{obj.dtype.str}{obj.shape}'.encode())
+        sha.update(np.ascontiguousarray(obj).view(np.uint8).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        sha.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for item in obj:
+            _atualizar_hash(sha, item)
+    elif isinstance(obj, dict):
+        sha.update(f'dict{len(obj)}'.encode())
+        for chave in sorted(obj, key=repr):
+            _atualizar_hash(sha, chave)
+            _atualizar_hash(sha, obj[chave])
+    elif isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        sha.update(repr(obj).encode())
+    else:
+        sha.update(pickle.dumps(obj))
+
+
+# Função para calcular a chave de cache a partir do conteúdo dos argumentos
+def chave_conteudo(*args, **kwargs):
+    sha = hashlib.sha256()
+    _atualizar_hash(sha, args)
+    _atualizar_hash(sha, kwargs)
+    return sha.hexdigest()
+
+
+class CacheLimitado:
+
+    def __init__(self, nome, max_bytes=64 * MB, max_itens=None, ttl=None):
+        self.nome = nome
+        self.max_bytes = max_bytes
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.RLock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.expirados = 0
+        with _trava_registro:
+            _caches[nome] = self
+
+    def get(self, chave, padrao=None):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                _anotar_consulta(self.nome, False)
+                return padrao
+            valor, tamanho, criado = item
+            if self.ttl is not None and time.monotonic() - criado > self.ttl:
+                self._remover(chave)
+                self.expirados += 1
+                self.falhas += 1
+                _anotar_consulta(self.nome, False)
+                return padrao
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            _anotar_consulta(self.nome, True)
+            return valor
+
+    def set(self, chave, valor):
+        tamanho = tamanho_bytes(valor)
+        with self._trava:
+            if chave in self._itens:
+                self._remover(chave)
+            # Itens maiores que o cache inteiro não são guardados
+            if tamanho > self.max_bytes:
+                return valor
+            self._itens[chave] = (valor, tamanho, time.monotonic())
+            self._bytes += tamanho
+            self._liberar()
+        return valor
+
+    def __contains__(self, chave):
+        with self._trava:
+            return chave in self._itens
+
+    def __len__(self):
+        with self._trava:
+            return len(self._itens)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+
+    def _remover(self, chave):
+        _, tamanho, _ = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+    def _liberar(self):
+        while self._itens and (self._bytes > self.max_bytes
+                               or (self.max_itens is not None and len(self._itens) > self.max_itens)):
+            chave = next(iter(self._itens))
+            self._remover(chave)
+            self.remocoes += 1
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                'cache': self.nome,
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'expirados': self.expirados,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            }
+
+
+# Função para obter o cache registrado com o nome, criando-o na primeira vez.
+# Scripts executados de novo a cada interação (como o app.py no Streamlit) declaram os caches outra vez
+# e assim reaproveitam os itens guardados nas execuções anteriores, em vez de começar vazios.
+def obter_cache(nome, max_bytes=64 * MB, max_itens=None, ttl=None):
+    with _trava_registro:
+        cache = _caches.get(nome)
+        if cache is None:
+            return CacheLimitado(nome, max_bytes, max_itens, ttl)
+    with cache._trava:
+        cache.max_bytes, cache.max_itens, cache.ttl = max_bytes, max_itens, ttl
+        cache._liberar()
+    return cache
+
+
+# Decorador que guarda os resultados da função em um CacheLimitado próprio
+def memoizar(nome=None, max_bytes=64 * MB, max_itens=None, ttl=None):
+    def decorador(funcao):
+        cache = obter_cache(nome or f'{funcao.__module__}.{funcao.__qualname__}', max_bytes, max_itens, ttl)
+        faltando = object()
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            chave = chave_conteudo(args, kwargs)
+            valor = cache.get(chave, faltando)
+            if valor is faltando:
+                valor = cache.set(chave, funcao(*args, **kwargs))
+            return valor
+
+        envoltorio.cache = cache
+        return envoltorio
+    return decorador
+
+
+# Função para consultar as estatísticas de todos os caches criados
+def estatisticas_caches():
+    with _trava_registro:
+        caches = list(_caches.values())
+    return pd.DataFrame([cache.estatisticas() for cache in caches])
@@ -0,0 +1,186 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pipeline.cache import MB, memoizar
+from pipeline.colunar import hash_arquivo, ler_tabela
+from pipeline.dados import carregar_canonica, versao_dados
+from pipeline.janelas import media_desvio_moveis
+
+
+# Características para os modelos de previsão (defasagens, retornos, janelas móveis e calendário).
+#
+# Todas as séries de base ficam em um único buffer float32 contíguo, uma linha por série, com NaN
+# antes do início (para as defasagens) e depois do fim (para os alvos de cada horizonte). Cada
+# característica defasada e cada alvo é uma visão dessa linha deslocada, sem cópia; a matriz
+# contígua só é montada no momento do treino, com as colunas escolhidas.
+# As colunas Amanhã e Target do ibov_modelo.csv equivalem a alvo(1) e alvo_direcao(1): o Amanhã da
+# última linha (fechamento do pregão seguinte ao fim dos dados) é gravado logo depois do fim do fechamento.
+
+# Colunas do ibov_modelo.csv -> nome da série de base
+COLUNAS_BASE = {
+    'Último': 'fechamento',
+    'Abertura': 'abertura',
+    'Máxima': 'maxima',
+    'Mínima': 'minima',
+    'Vol.': 'volume',
+}
+
+
+class MatrizCaracteristicas:
+
+    def __init__(self, datas, buffer, linhas, margem, horizonte, defasagens):
+        self.datas = datas
+        self.buffer = buffer
+        self.linhas = linhas
+        self.margem = margem
+        self.horizonte = horizonte
+        self.defasagens = defasagens
+        self.n = len(datas)
+
+    def __len__(self):
+        return self.n
+
+    def __sizeof__(self):
+        return self.buffer.nbytes + self.datas.nbytes
+
+    @property
+    def series(self):
+        return list(self.linhas)
+
+    # Visão da série defasada em k períodos: valor de t - k na linha t
+    def coluna(self, nome, defasagem=0):
+        if not 0 <= defasagem <= self.margem:
+            raise ValueError(f'Defasagem fora do intervalo [0, {self.margem}]: {defasagem}')
+        inicio = self.margem - defasagem
+        return self.buffer[self.linhas[nome], inicio:inicio + self.n]
+
+    # Visão (n, k) com as defasagens 1 a k da série, sem cópia (passo negativo entre as colunas)
+    def bloco_defasagens(self, nome, k):
+        if not 1 <= k <= self.margem:
+            raise ValueError(f'Número de defasagens fora do intervalo [1, {self.margem}]: {k}')
+        inicio = self.margem - k
+        janelas = sliding_window_view(self.buffer[self.linhas[nome], inicio:self.margem + self.n - 1], k)
+        return janelas[:, ::-1]
+
+    # Visão do valor da série h períodos à frente (NaN quando ultrapassa o fim dos dados)
+    def alvo(self, h=1, nome='fechamento'):
+        if not 1 <= h <= self.horizonte:
+            raise ValueError(f'Horizonte fora do intervalo [1, {self.horizonte}]: {h}')
+        inicio = self.margem + h
+        return self.buffer[self.linhas[nome], inicio:inicio + self.n]
+
+    # Alvo de direção: 1 quando o valor h períodos à frente é maior que o atual
+    def alvo_direcao(self, h=1, nome='fechamento'):
+        futuro = self.alvo(h, nome)
+        return np.where(np.isnan(futuro), np.nan, (futuro > self.coluna(nome)).astype(np.float32))
+
+    # Nomes de todas as características disponíveis: série de base com cada defasagem
+    def nomes(self, defasagens=None):
+        defasagens = self.defasagens if defasagens is None else defasagens
+        nomes = []
+        for nome in self.linhas:
+            nomes += [nome] + [f'{nome}_lag{k}' for k in range(1, defasagens + 1)]
+        return nomes
+
+    def _resolver(self, nome):
+        base, _, lag = nome.rpartition('_lag')
+        if base and lag.isdigit():
+            return self.coluna(base, int(lag))
+        return self.coluna(nome)
+
+    # Função para montar a matriz contígua (linhas, características) de treino e o alvo do horizonte h.
+    # Com remover_nulos=True ficam apenas as linhas com todas as características e o alvo definidos.
+    def matriz(self, h=1, caracteristicas=None, alvo='fechamento', remover_nulos=True):
+        caracteristicas = caracteristicas or self.nomes()
+        x = np.empty((self.n, len(caracteristicas)), dtype=np.float32)
+        for j, nome in enumerate(caracteristicas):
+            x[:, j] = self._resolver(nome)
+        y = np.array(self.alvo(h, alvo))
+        datas = self.datas
+        if remover_nulos:
+            validas = np.isfinite(x).all(axis=1) & np.isfinite(y)
+            x, y, datas = x[validas], y[validas], datas[validas]
+        return x, y, datas
+
+    # DataFrame para inspeção (com cópia dos dados)
+    def frame(self, h=1, caracteristicas=None, alvo='fechamento'):
+        caracteristicas = caracteristicas or self.nomes()
+        x, y, datas = self.matriz(h, caracteristicas, alvo, remover_nulos=False)
+        df = pd.DataFrame(x, columns=caracteristicas, index=pd.DatetimeIndex(datas, name='Data'))
+        df[f'alvo_{alvo}_h{h}'] = y
+        return df
+
+
+# Função para construir as características a partir do DataFrame do ibov_modelo.csv
+def construir_caracteristicas(df, coluna_data='Data', colunas=COLUNAS_BASE, defasagens=5, retornos=(1, 5, 21),
+                              janelas=(5, 21), horizonte=5, coluna_seguinte='Amanhã'):
+    ordem = np.argsort(np.asarray(df[coluna_data]), kind='stable')
+    datas = np.asarray(df[coluna_data])[ordem].astype('datetime64[D]')
+    n = len(datas)
+    bases = {nome: np.asarray(df[coluna], dtype=np.float64)[ordem] for coluna, nome in colunas.items()}
+
+    # Séries derivadas calculadas em float64 e gravadas uma única vez no buffer
+    log_fechamento = np.log(bases['fechamento'])
+    retorno_diario = np.diff(log_fechamento, prepend=np.nan)
+    derivadas = {}
+    for k in retornos:
+        # Com k >= n não há nenhum retorno de k dias e a coluna fica inteira ausente, com o tamanho da série
+        retorno = np.full(n, np.nan)
+        retorno[k:] = log_fechamento[k:] - log_fechamento[:max(n - k, 0)]
+        derivadas[f'retorno_{k}'] = retorno
+    for janela, (media, _) in media_desvio_moveis(bases['fechamento'], janelas).items():
+        derivadas[f'media_{janela}'] = media / bases['fechamento'] - 1
+    for janela, (_, desvio) in media_desvio_moveis(retorno_diario, janelas).items():
+        derivadas[f'volatilidade_{janela}'] = desvio
+    calendario = pd.DatetimeIndex(datas)
+    derivadas['dia_semana'] = calendario.dayofweek.to_numpy()
+    derivadas['dia_mes'] = calendario.day.to_numpy()
+    derivadas['mes'] = calendario.month.to_numpy()
+
+    series = {**bases, **derivadas}
+    margem = defasagens
+    buffer = np.full((len(series), margem + n + horizonte), np.nan, dtype=np.float32)
+    linhas = {}
+    for i, (nome, valores) in enumerate(series.items()):
+        buffer[i, margem:margem + n] = valores
+        linhas[nome] = i
+    if coluna_seguinte in df and n and horizonte:
+        buffer[linhas['fechamento'], margem + n] = np.asarray(df[coluna_seguinte], dtype=np.float64)[ordem[-1]]
+    buffer.flags.writeable = False
+    return MatrizCaracteristicas(datas, buffer, linhas, margem, horizonte, defasagens)
+
+
+# Características guardadas em cache pela versão (hash) dos dados e pelas opções. Sem caminho, os dados vêm
+# do armazenamento canônico, até o último pregão; com caminho, de um CSV no formato do ibov_modelo.csv
+@memoizar('caracteristicas', max_bytes=64 * MB, max_itens=16)
+def _caracteristicas_versao(caminho, versao, opcoes):
+    df = carregar_canonica() if caminho is None else ler_tabela(caminho)
+    return construir_caracteristicas(df, **dict(opcoes))
+
+
+def caracteristicas_arquivo(caminho=None, **opcoes):
+    versao = versao_dados() if caminho is None else hash_arquivo(caminho)
+    return _caracteristicas_versao(caminho, versao, tuple(sorted(opcoes.items())))
+
+
+if __name__ == '__main__':
+    import time
+
+    from pipeline.cache import estatisticas_caches
+
+    for _ in range(2):
+        inicio = time.perf_counter()
+        matriz = caracteristicas_arquivo(defasagens=10, horizonte=5)
+        duracao = time.perf_counter() - inicio
+        print(f'Características montadas em {duracao * 1000:.1f}ms')
+    print(f'{len(matriz)} linhas, {len(matriz.series)} séries de base, {len(matriz.nomes())} características, '
+          f'buffer de {matriz.buffer.nbytes / MB:.2f}MB')
+
+    inicio = time.perf_counter()
+    x, y, datas = matriz.matriz(h=5)
+    duracao = time.perf_counter() - inicio
+    print(f'Matriz de treino {x.shape} (alvo h=5) em {duracao * 1000:.1f}ms')
+    print(estatisticas_caches().to_string(index=False))
@@ -0,0 +1,174 @@
+# Libs
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+# Cache colunar binário dos DataFrames em Assets/DataFrames.
+#
+# Cada CSV é convertido uma única vez em um diretório com um arquivo .npy por coluna (já com o
+# tipo final) e um meta.json com a ordem das colunas. O diretório é identificado pelo hash do
+# conteúdo do CSV: quando o arquivo muda, uma nova versão é gerada e a anterior é removida.
+# A leitura usa np.load(mmap_mode='r'), de modo que várias réplicas do aplicativo compartilham
+# as mesmas páginas do sistema operacional em vez de manter cópias próprias dos dados.
+
+# Diretório de todos os caches em disco do pipeline; a variável de ambiente permite usar outro (benchmark.py)
+DIRETORIO_CACHE = os.environ.get('DIRETORIO_CACHE', 'Assets/Cache')
+
+_TAMANHO_BLOCO = 1 << 20
+_VERSAO_FORMATO = 4
+
+
+# Hashes já calculados, indexados pelo caminho, data de modificação e tamanho do arquivo
+_hashes = {}
+
+
+# Função para calcular o hash SHA-256 do conteúdo de um arquivo.
+# Enquanto o arquivo não for modificado, o hash é reaproveitado sem reler o conteúdo.
+def hash_arquivo(caminho):
+    estado = os.stat(caminho)
+    chave = (os.path.abspath(caminho), estado.st_mtime_ns, estado.st_size)
+    if chave not in _hashes:
+        _hashes[chave] = _calcular_hash(caminho)
+    return _hashes[chave]
+
+
+def _calcular_hash(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(_TAMANHO_BLOCO), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+# Tabela aberta a partir do cache: cada coluna é um array NumPy somente leitura
+class TabelaColunar:
+
+    def __init__(self, diretorio, colunas, meta):
+        self.diretorio = diretorio
+        self.colunas = colunas
+        self.meta = meta
+
+    def __getitem__(self, coluna):
+        return self.colunas[coluna]
+
+    def __len__(self):
+        return self.meta['linhas']
+
+    @property
+    def hash(self):
+        return self.meta['hash']
+
+    # Função para montar um DataFrame sem copiar as colunas numéricas. As datas são copiadas: o pandas
+    # converte as colunas datetime64[D] para datetime64[s]
+    def to_frame(self):
+        return pd.DataFrame({nome: self.colunas[nome] for nome in self.meta['colunas']}, copy=False)
+
+
+def _converter_coluna(serie):
+    # Datas no formato ISO viram datetime64[D]; textos viram unicode de largura fixa (mapeável),
+    # com os valores ausentes gravados como texto vazio (como no CSV de origem)
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy()
+    # Os ausentes viram texto vazio antes da conversão: no pandas 2.x o astype(str) os grava como 'nan'
+    texto = serie.fillna('').astype(str)
+    if texto.str.fullmatch(r'\d{4}-\d{2}-\d{2}').all():
+        return pd.to_datetime(texto, format='%Y-%m-%d').to_numpy().astype('datetime64[D]')
+    # A conversão passa por object: com o tipo str do pandas, to_numpy(dtype=str) pode truncar os textos
+    return texto.to_numpy(dtype=object).astype(str)
+
+
+def _diretorio_versao(caminho, digest, diretorio_cache):
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    return os.path.join(diretorio_cache, nome), digest[:16]
+
+
+# Função para converter o CSV em colunas binárias dentro do diretório de cache
+def construir_cache(caminho, digest=None, diretorio_cache=DIRETORIO_CACHE, leitor=pd.read_csv):
+    digest = digest or hash_arquivo(caminho)
+    base, versao = _diretorio_versao(caminho, digest, diretorio_cache)
+    destino = os.path.join(base, versao)
+    os.makedirs(base, exist_ok=True)
+
+    df = leitor(caminho)
+    temporario = tempfile.mkdtemp(dir=base, prefix='.tmp-')
+    try:
+        for i, nome in enumerate(df.columns):
+            np.save(os.path.join(temporario, f'{i}.npy'), _converter_coluna(df[nome]), allow_pickle=False)
+        meta = {
+            'formato': _VERSAO_FORMATO,
+            'origem': os.path.abspath(caminho),
+            'hash': digest,
+            'linhas': len(df),
+            'colunas': [str(nome) for nome in df.columns],
+        }
+        with open(os.path.join(temporario, 'meta.json'), 'w', encoding='utf-8') as arquivo:
+            json.dump(meta, arquivo, ensure_ascii=False)
+        # Troca atômica: leitores nunca enxergam uma versão parcialmente escrita
+        try:
+            os.rename(temporario, destino)
+        except OSError:
+            # Outro processo publicou a mesma versão primeiro
+            shutil.rmtree(temporario, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    _remover_versoes_antigas(base, versao)
+    return destino
+
+
+def _remover_versoes_antigas(base, versao_atual):
+    for nome in os.listdir(base):
+        if nome != versao_atual and not nome.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(base, nome), ignore_errors=True)
+
+
+# Função para abrir um CSV pelo cache colunar, reconstruindo o cache se o conteúdo mudou
+def abrir_tabela(caminho, diretorio_cache=DIRETORIO_CACHE, leitor=pd.read_csv):
+    digest = hash_arquivo(caminho)
+    base, versao = _diretorio_versao(caminho, digest, diretorio_cache)
+    diretorio = os.path.join(base, versao)
+    meta_caminho = os.path.join(diretorio, 'meta.json')
+
+    if not os.path.exists(meta_caminho):
+        diretorio = construir_cache(caminho, digest, diretorio_cache, leitor)
+
+    with open(meta_caminho, encoding='utf-8') as arquivo:
+        meta = json.load(arquivo)
+    if meta.get('formato') != _VERSAO_FORMATO:
+        shutil.rmtree(diretorio, ignore_errors=True)
+        return abrir_tabela(caminho, diretorio_cache, leitor)
+
+    colunas = {
+        nome: np.load(os.path.join(diretorio, f'{i}.npy'), mmap_mode='r', allow_pickle=False)
+        for i, nome in enumerate(meta['colunas'])
+    }
+    return TabelaColunar(diretorio, colunas, meta)
+
+
+# Função de conveniência para abrir o CSV diretamente como DataFrame
+def ler_tabela(caminho, diretorio_cache=DIRETORIO_CACHE):
+    return abrir_tabela(caminho, diretorio_cache).to_frame()
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    caminhos = sys.argv[1:] or [
+        'Assets/DataFrames/ibov.csv',
+        'Assets/DataFrames/ibov_modelo.csv',
+        'Assets/DataFrames/ARIMA_dados_ibovespa_2010-2023_processed.csv',
+    ]
+    for caminho in caminhos:
+        inicio = time.perf_counter()
+        tabela = abrir_tabela(caminho)
+        duracao = time.perf_counter() - inicio
+        print(f'{caminho}: {len(tabela)} linhas em {duracao * 1000:.1f}ms -> {tabela.diretorio}')
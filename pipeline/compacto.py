@@ -0,0 +1,169 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+
+from pipeline.ingestao import (COLUNAS_PRECO, converter_percentual, converter_volume, formatar_percentual,
+                               formatar_volume)
+
+
+# Representação compacta dos dados OHLCV (abertura, máxima, mínima, fechamento e volume).
+#
+# Lido com os tipos padrão do pandas, o ibov.csv ocupa datas como object, pontos como int64 e
+# Vol./Var% como textos ("11,79M", "-0,22%"). Aqui cada coluna vira um array NumPy contíguo e
+# somente leitura, no menor tipo que representa os dados sem perda:
+#   Data: datetime64[D]; pontos: int32 (valor * escala, escala 1 para pontos inteiros);
+#   Vol.: float32; Var%: int16 em centésimos de ponto percentual (a exportação tem duas casas), ou
+#   int32 quando alguma variação passa de ±327,67%.
+# Recortes por período são visões dos mesmos arrays (sem cópia) e o DataFrame só é montado
+# quando pedido. Os textos da exportação são gerados de novo apenas para as linhas exibidas.
+
+TIPO_PRECO = np.int32
+TIPO_VOLUME = np.float32
+# Tipos possíveis da Var%, do menor para o maior; o menor valor de cada tipo é o marcador de ausentes
+TIPOS_VARIACAO = (np.int16, np.int32)
+ESCALA_VARIACAO = 100
+
+
+def _somente_leitura(valores, tipo):
+    valores = np.ascontiguousarray(valores, dtype=tipo)
+    valores.flags.writeable = False
+    return valores
+
+
+def _para_inteiro(valores, escala, tipo):
+    escalados = np.rint(np.asarray(valores, dtype=float) * escala)
+    limites = np.iinfo(tipo)
+    if np.nanmax(np.abs(escalados), initial=0) > limites.max:
+        raise OverflowError(f'Valores fora do intervalo de {np.dtype(tipo).name} com escala {escala}')
+    return escalados
+
+
+# Função para escolher o menor tipo inteiro que representa os valores já escalados
+def _menor_tipo(escalados, tipos):
+    maior = np.nanmax(np.abs(escalados), initial=0)
+    for tipo in tipos:
+        if maior <= np.iinfo(tipo).max:
+            return tipo
+    raise OverflowError(f'Valores fora do intervalo de {np.dtype(tipos[-1]).name}')
+
+
+# Função para converter os centésimos da Var% em percentual, com o marcador do tipo da coluna como ausente
+def _percentual(centesimos):
+    return np.where(centesimos == np.iinfo(centesimos.dtype).min, np.nan, centesimos / ESCALA_VARIACAO)
+
+
+class OHLCVCompacto:
+
+    def __init__(self, datas, colunas, escala=1):
+        self.datas = _somente_leitura(datas, 'datetime64[D]')
+        self.colunas = colunas
+        self.escala = escala
+
+    # Função para montar a representação a partir de um DataFrame no formato do ibov.csv ou do armazenamento
+    @classmethod
+    def de_frame(cls, df, coluna_data='Data', escala=1):
+        datas = np.asarray(df[coluna_data]).astype('datetime64[D]')
+        ordem = np.argsort(datas, kind='stable')
+        colunas = {}
+        for nome in COLUNAS_PRECO:
+            if nome in df:
+                colunas[nome] = _somente_leitura(_para_inteiro(np.asarray(df[nome])[ordem], escala, TIPO_PRECO),
+                                                 TIPO_PRECO)
+        if 'Vol.' in df:
+            volume = df['Vol.'] if pd.api.types.is_numeric_dtype(df['Vol.']) else converter_volume(df['Vol.'])
+            colunas['Vol.'] = _somente_leitura(np.asarray(volume, dtype=float)[ordem], TIPO_VOLUME)
+        if 'Var%' in df:
+            variacao = df['Var%'] if pd.api.types.is_numeric_dtype(df['Var%']) else converter_percentual(df['Var%'])
+            # int16 enquanto as variações cabem nele, senão int32; ausentes viram o menor valor do tipo (marcador)
+            centesimos = np.rint(np.asarray(variacao, dtype=float)[ordem] * ESCALA_VARIACAO)
+            tipo = _menor_tipo(centesimos, TIPOS_VARIACAO)
+            marcador = np.iinfo(tipo).min
+            colunas['Var%'] = _somente_leitura(np.where(np.isnan(centesimos), marcador, centesimos), tipo)
+        return cls(datas[ordem], colunas, escala)
+
+    # Função para montar a representação a partir do armazenamento canônico (pipeline/consolidacao.py)
+    @classmethod
+    def de_armazem(cls, armazem, inicio=None, fim=None):
+        return cls.de_frame(armazem.ler(inicio, fim))
+
+    def __len__(self):
+        return len(self.datas)
+
+    def __contains__(self, nome):
+        return nome in self.colunas
+
+    def __getitem__(self, nome):
+        return self.colunas[nome]
+
+    @property
+    def nbytes(self):
+        return self.datas.nbytes + sum(valores.nbytes for valores in self.colunas.values())
+
+    def __sizeof__(self):
+        return self.nbytes
+
+    # Valores de uma coluna nas unidades originais (pontos e percentual), em float64
+    def valores(self, nome):
+        if nome == 'Var%':
+            return _percentual(self.colunas[nome])
+        if nome in COLUNAS_PRECO:
+            return self.colunas[nome] / self.escala
+        return self.colunas[nome].astype(float)
+
+    # Função para localizar as posições [esquerda, direita) do período por busca binária
+    def intervalo(self, inicio=None, fim=None):
+        esquerda = 0 if inicio is None else int(np.searchsorted(self.datas, np.datetime64(inicio, 'D'), side='left'))
+        direita = len(self) if fim is None else int(np.searchsorted(self.datas, np.datetime64(fim, 'D'), side='right'))
+        return esquerda, max(esquerda, direita)
+
+    # Recorte do período como visão dos mesmos arrays
+    def periodo(self, inicio=None, fim=None):
+        fatia = slice(*self.intervalo(inicio, fim))
+        return OHLCVCompacto(self.datas[fatia], {nome: v[fatia] for nome, v in self.colunas.items()}, self.escala)
+
+    # DataFrame indexado pela data, sem copiar as colunas compactas
+    def to_frame(self, colunas=None):
+        colunas = colunas or list(self.colunas)
+        indice = pd.DatetimeIndex(self.datas, name='Data')
+        return pd.DataFrame({nome: self.colunas[nome] for nome in colunas}, index=indice, copy=False)
+
+
+# Formatadores de exibição das colunas compactas, no formato da exportação ("11,79M", "-0,22%")
+FORMATADORES = {
+    'Vol.': formatar_volume,
+    'Var%': lambda centesimos: formatar_percentual(_percentual(centesimos)),
+}
+
+
+# Função para comparar, coluna a coluna, os bytes de um DataFrame com os da representação compacta
+def relatorio_memoria(df, compacto, coluna_data='Data'):
+    antes = df.memory_usage(deep=True, index=False)
+    linhas = []
+    for nome, valores in {coluna_data: compacto.datas, **compacto.colunas}.items():
+        linhas.append({'coluna': nome, 'tipo_antes': str(df[nome].dtype), 'bytes_antes': int(antes[nome]),
+                       'tipo_depois': str(valores.dtype), 'bytes_depois': valores.nbytes})
+    relatorio = pd.DataFrame(linhas)
+    total = relatorio[['bytes_antes', 'bytes_depois']].sum()
+    relatorio.loc[len(relatorio)] = {'coluna': 'Total', 'tipo_antes': '', 'bytes_antes': total['bytes_antes'],
+                                     'tipo_depois': '', 'bytes_depois': total['bytes_depois']}
+    relatorio['reducao'] = (relatorio['bytes_antes'] / relatorio['bytes_depois']).round(1)
+    return relatorio
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Relatório de memória da representação compacta dos dados OHLCV')
+    parser.add_argument('caminho', nargs='?', default='Assets/DataFrames/ibov.csv')
+    args = parser.parse_args()
+
+    # Antes: leitura com os tipos padrão do pandas, como no aplicativo original
+    df = pd.read_csv(args.caminho)
+    compacto = OHLCVCompacto.de_frame(df)
+    print(relatorio_memoria(df, compacto).to_string(index=False))
+
+    # Conferência: a representação compacta guarda os mesmos valores
+    for nome in COLUNAS_PRECO:
+        original = np.asarray(df[nome], dtype=float)[np.argsort(np.asarray(df['Data']), kind='stable')]
+        assert np.array_equal(compacto.valores(nome), original)
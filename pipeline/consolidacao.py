@@ -0,0 +1,119 @@
+# Libs
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline.armazem import DIRETORIO_ARMAZEM, ArmazemSerie
+from pipeline.colunar import hash_arquivo
+from pipeline.ingestao import COLUNAS_PRECO, ler_investing
+
+
+# Consolidação das exportações da investing.com em um único armazenamento canônico.
+#
+# As exportações (Assets/Base/ibovespa.csv, de 2003, e dados_ibovespa_2010-2023.csv, de 2010) se
+# sobrepõem e antes eram processadas por caminhos separados, com unidades e nomes de colunas
+# diferentes (pontos em ibov_modelo.csv, milhares de pontos em 'y' no CSV do ARIMA). Aqui cada
+# exportação é lida uma única vez e convertida para o mesmo esquema, em pontos:
+#   Data, Último, Abertura, Máxima, Mínima (inteiros), Vol. (quantidade) e Var% (percentual)
+# As séries já ordenadas são intercaladas por data (ordenação estável sobre sequências já ordenadas,
+# em tempo linear). Nas datas presentes em mais de uma exportação vale a linha da fonte de maior
+# prioridade (a primeira da lista); campos ausentes nela são completados pelas fontes seguintes.
+# O resultado é gravado no armazenamento ordenado (pipeline/armazem.py), a única origem dos dados lidos
+# pelo aplicativo, pelos modelos e pelo serviço por meio de pipeline/dados.py; as unidades e o formato
+# de cada uso são aplicados apenas na leitura. O meta.json guarda o hash de cada fonte: quando uma
+# exportação é substituída, a próxima abertura consolida tudo de novo.
+
+DIRETORIO_CANONICO = os.path.join(DIRETORIO_ARMAZEM, 'ibovespa')
+
+# Exportações em ordem de prioridade: a mais recente (com o fechamento final de 15/08/2023) primeiro
+FONTES = [
+    'Assets/Base/dados_ibovespa_2010-2023.csv',
+    'Assets/Base/ibovespa.csv',
+]
+
+COLUNAS = ['Data'] + COLUNAS_PRECO + ['Vol.', 'Var%']
+
+
+# Função para ler uma exportação no esquema canônico, em ordem ascendente de data
+def ler_fonte(caminho):
+    df = ler_investing(caminho, remover_nulos=False)
+    df = df.sort_values('Data', kind='stable').drop_duplicates('Data', keep='last')
+    return df.reindex(columns=COLUNAS)
+
+
+# Função para intercalar as fontes (já ordenadas) por data, resolvendo as datas repetidas pela prioridade
+def intercalar(fontes):
+    datas = np.concatenate([np.asarray(f['Data'], dtype='datetime64[D]') for f in fontes])
+    prioridades = np.concatenate([np.full(len(f), i) for i, f in enumerate(fontes)])
+    # Ordenação estável de sequências já ordenadas: custo linear, e em cada data a fonte de maior
+    # prioridade fica na frente porque as fontes foram concatenadas nessa ordem
+    ordem = np.argsort(datas, kind='stable')
+    datas, prioridades = datas[ordem], prioridades[ordem]
+    inicios = np.flatnonzero(np.r_[True, datas[1:] != datas[:-1]])
+
+    consolidado = {'Data': datas[inicios]}
+    posicoes = np.arange(len(datas))
+    for coluna in COLUNAS[1:]:
+        valores = np.concatenate([np.asarray(f[coluna], dtype=float) for f in fontes])[ordem]
+        # Primeiro valor presente de cada data, na ordem de prioridade
+        candidatos = np.where(np.isnan(valores), len(valores), posicoes)
+        primeiro = np.minimum.reduceat(candidatos, inicios)
+        consolidado[coluna] = np.where(primeiro < len(valores), valores[np.minimum(primeiro, len(valores) - 1)],
+                                       np.nan)
+    consolidado['Fonte'] = prioridades[inicios]
+
+    df = pd.DataFrame(consolidado)
+    # Pontos sem valor não têm representação inteira: as datas sem preço em nenhuma fonte são descartadas
+    df = df.dropna(subset=COLUNAS_PRECO).reset_index(drop=True)
+    df[COLUNAS_PRECO] = df[COLUNAS_PRECO].round().astype(np.int64)
+    return df
+
+
+# Função para consolidar as exportações e gravar o armazenamento canônico.
+# O meta.json registra o hash de cada fonte e quantas linhas vieram dela.
+def consolidar(fontes=FONTES, diretorio=DIRETORIO_CANONICO):
+    leituras = [ler_fonte(caminho) for caminho in fontes]
+    df = intercalar(leituras)
+    por_fonte = np.bincount(df['Fonte'], minlength=len(fontes))
+    armazem = ArmazemSerie(diretorio)
+    armazem.meta['fontes'] = [
+        {'caminho': caminho, 'hash': hash_arquivo(caminho), 'linhas': len(leitura), 'utilizadas': int(n)}
+        for caminho, leitura, n in zip(fontes, leituras, por_fonte)
+    ]
+    return armazem.substituir(df.drop(columns='Fonte'))
+
+
+# Função para listar as fontes cujo conteúdo difere do registrado no meta.json (ou que não foram registradas)
+def fontes_alteradas(armazem, fontes=FONTES):
+    registradas = {os.path.normpath(f['caminho']): f['hash'] for f in armazem.meta.get('fontes', [])}
+    return [caminho for caminho in fontes if registradas.get(os.path.normpath(caminho)) != hash_arquivo(caminho)]
+
+
+# Função para abrir o armazenamento canônico, consolidando as fontes na primeira vez e sempre que alguma
+# delas mudar (o hash de cada fonte fica em cache enquanto o arquivo não é modificado)
+def abrir_canonico(diretorio=DIRETORIO_CANONICO, fontes=FONTES):
+    armazem = ArmazemSerie(diretorio)
+    if not len(armazem) or fontes_alteradas(armazem, fontes):
+        armazem = consolidar(fontes, diretorio)
+    return armazem
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Consolida as exportações no armazenamento canônico')
+    parser.add_argument('fontes', nargs='*', default=FONTES, help='exportações em ordem de prioridade')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    armazem = consolidar(args.fontes)
+    duracao = time.perf_counter() - inicio
+
+    for fonte in armazem.meta['fontes']:
+        print(f"{fonte['caminho']}: {fonte['linhas']} linhas, {fonte['utilizadas']} utilizadas")
+    datas = armazem.datas()
+    print(f'{len(armazem)} linhas consolidadas de {datas[0]} a {datas[-1]} (versão {armazem.versao}) '
+          f'em {duracao * 1000:.1f}ms')
@@ -0,0 +1,82 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+
+from pipeline.colunar import ler_tabela
+from pipeline.consolidacao import abrir_canonico
+from pipeline.ingestao import preparar_modelo
+
+# Todos os dados vêm do armazenamento canônico (pipeline/consolidacao.py). Os CSVs de Assets/DataFrames
+# (ibov.csv, ibov_modelo.csv e o do ARIMA) são os DataFrames originais do notebook e não são mais lidos:
+# os formatos de cada um são montados aqui a partir do armazenamento.
+
+# Primeiro pregão da série utilizada nos modelos ARIMA
+INICIO_ARIMA = '2010-01-04'
+
+# Data de corte entre treino e teste utilizada na aba ARIMA
+DATA_CORTE = '2022-01-01'
+
+
+# Função para montar a série diária do fechamento, preenchendo os dias sem pregão com o último valor observado
+def serie_diaria(df, coluna_data, coluna_valor):
+    serie = df[[coluna_data, coluna_valor]].copy()
+    serie.index = pd.to_datetime(serie[coluna_data], format='%Y-%m-%d')
+    serie = serie.drop(columns=[coluna_data]).sort_index()
+    serie = serie.asfreq('d').ffill()
+    serie.index.name = 'ds'
+    serie.columns = ['y']
+    return serie
+
+
+# Função para ler do armazenamento canônico (pipeline/consolidacao.py) as linhas do período [inicio, fim]
+def carregar_canonica(inicio=None, fim=None):
+    return abrir_canonico().ler(inicio, fim)
+
+
+# Versão dos dados (hash do meta.json do armazenamento canônico), utilizada nas chaves dos caches
+def versao_dados():
+    return abrir_canonico().hash
+
+
+# Função para montar os dados no formato do ibov_modelo.csv: ordem ascendente, sem Var% e sem os dias
+# sem volume, com o fechamento do dia seguinte (Amanhã) e o indicador de alta (Target)
+def carregar_dados_modelo():
+    df = carregar_canonica().dropna(subset=['Vol.']).astype({'Vol.': np.int64})
+    return preparar_modelo(df).reset_index()
+
+
+# Função para montar os dados no formato do CSV do ARIMA: de 2010 em diante, pontos em milhares e
+# volume em milhões
+def carregar_dados_arima():
+    df = carregar_canonica(inicio=INICIO_ARIMA)
+    return pd.DataFrame({
+        'ds': df['Data'],
+        'y': df['Último'] / 1000,
+        'abertura': df['Abertura'] / 1000,
+        'max': df['Máxima'] / 1000,
+        'min': df['Mínima'] / 1000,
+        'volume': df['Vol.'] / 1e6,
+        'variacao': df['Var%'],
+    })
+
+
+# Função para carregar a série utilizada nos modelos ARIMA (2010 a 2023, em milhares de pontos).
+# Sem caminho, a série vem do armazenamento canônico; com caminho, de um CSV no formato do ARIMA.
+def carregar_serie_arima(caminho=None):
+    df = carregar_dados_arima() if caminho is None else ler_tabela(caminho)
+    return serie_diaria(df, 'ds', 'y')
+
+
+# Função para carregar a série completa do fechamento (2003 a 2023, em pontos).
+# Sem caminho, a série vem do armazenamento canônico; com caminho, de um CSV no formato do ibov_modelo.csv.
+def carregar_serie_modelo(caminho=None):
+    df = carregar_canonica() if caminho is None else ler_tabela(caminho)
+    return serie_diaria(df, 'Data', 'Último')
+
+
+# Função para separar treino e teste pela data de corte
+def separar_treino_teste(serie, data_corte=DATA_CORTE):
+    treino = serie.loc[serie.index < data_corte]
+    teste = serie.loc[serie.index >= data_corte]
+    return treino, teste
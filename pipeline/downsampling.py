@@ -0,0 +1,166 @@
+# Libs
+
+import numpy as np
+
+
+# Redução do número de pontos das séries antes de enviá-las aos gráficos.
+#
+# Um gráfico com L pixels de largura não consegue mostrar mais do que alguns pontos por pixel,
+# então cada série é reduzida para um orçamento de pontos proporcional à largura do gráfico
+# que será desenhado (informada por quem monta o gráfico):
+# - lttb: Largest-Triangle-Three-Buckets, mantém o formato visual da curva (1 ponto por pixel);
+# - minmax: mantém o mínimo e o máximo de cada faixa, preservando picos (2 pontos por pixel);
+# - minmax_lttb: pré-seleção min/max seguida de LTTB, para séries muito longas.
+# Todas as funções devolvem os índices dos pontos selecionados, em ordem crescente.
+
+PONTOS_POR_PIXEL = {'lttb': 1, 'minmax': 2, 'minmax_lttb': 1}
+
+# Tamanho médio das faixas a partir do qual o LTTB percorre as faixas uma a uma: com faixas longas
+# cada iteração já processa um trecho contíguo grande e o laço custa menos que as matrizes completadas
+TAMANHO_FAIXA_LACO = 128
+
+
+def _como_float(x, y):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    return np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+
+# Função para selecionar, em cada faixa, os índices do menor e do maior valor
+def minmax(x, y, n_saida):
+    _, y = _como_float(x, y)
+    n = len(y)
+    if n_saida >= n or n_saida < 4:
+        return np.arange(n)
+
+    # Faixas de mesmo tamanho: os dados são completados com NaN e reorganizados em (faixas, tamanho)
+    n_faixas = (n_saida - 2) // 2
+    tamanho = -(-(n - 2) // n_faixas)
+    interno = np.full(n_faixas * tamanho, np.nan)
+    interno[:n - 2] = y[1:-1]
+    faixas = interno.reshape(n_faixas, tamanho)
+    vazias = np.isnan(faixas)
+
+    base = np.arange(n_faixas) * tamanho + 1
+    menores = np.where(vazias, np.inf, faixas).argmin(axis=1) + base
+    maiores = np.where(vazias, -np.inf, faixas).argmax(axis=1) + base
+    validas = ~vazias.all(axis=1)
+
+    indices = np.concatenate([[0], menores[validas], maiores[validas], [n - 1]])
+    return np.unique(indices)
+
+
+# Função para selecionar os índices pelo algoritmo Largest-Triangle-Three-Buckets
+def lttb(x, y, n_saida):
+    x, y = _como_float(x, y)
+    n = len(x)
+    if n_saida >= n or n_saida < 3:
+        return np.arange(n)
+
+    # Limites das faixas internas (o primeiro e o último ponto são sempre mantidos)
+    passo = (n - 2) / (n_saida - 2)
+    bordas = (np.arange(n_saida - 1) * passo).astype(np.int64) + 1
+    bordas[-1] = n - 1
+
+    # Média de cada faixa calculada de uma vez com somas acumuladas
+    soma_x = np.concatenate([[0.0], np.cumsum(x)])
+    soma_y = np.concatenate([[0.0], np.cumsum(y)])
+    contagem = bordas[1:] - bordas[:-1]
+    media_x = (soma_x[bordas[1:]] - soma_x[bordas[:-1]]) / contagem
+    media_y = (soma_y[bordas[1:]] - soma_y[bordas[:-1]]) / contagem
+    # O terceiro vértice do triângulo é a média da faixa seguinte (ou o último ponto)
+    proximo_x = np.append(media_x[1:], x[-1])
+    proximo_y = np.append(media_y[1:], y[-1])
+
+    if (n - 2) / (n_saida - 2) >= TAMANHO_FAIXA_LACO:
+        escolhidos = _lttb_laco(x, y, bordas, proximo_x, proximo_y)
+    else:
+        escolhidos = _lttb_vetorizado(x, y, bordas, media_x, media_y, proximo_x, proximo_y)
+    return np.concatenate([[0], escolhidos, [n - 1]])
+
+
+# O primeiro vértice do triângulo de cada faixa é o ponto escolhido na faixa anterior, então as faixas
+# dependem umas das outras e o LTTB não é vetorizável em uma única passada. As áreas de todas as faixas
+# são calculadas juntas, em uma matriz (faixas, pontos) completada com área -1: a primeira passada usa
+# como vértice a média da faixa anterior e as seguintes recalculam, com o vértice correto, apenas as
+# faixas cujo ponto anterior mudou. Quando nada muda, cada faixa tem o ponto que o LTTB sequencial
+# escolheria (a faixa i está correta a partir da passada i); na prática bastam poucas passadas.
+def _lttb_vetorizado(x, y, bordas, media_x, media_y, proximo_x, proximo_y):
+    n_faixas = len(bordas) - 1
+    deslocamentos = np.arange((bordas[1:] - bordas[:-1]).max())
+
+    def escolher(faixas, vertice_x, vertice_y):
+        indices = bordas[faixas, None] + deslocamentos
+        fora = indices >= bordas[faixas + 1, None]
+        indices = np.minimum(indices, len(x) - 1)
+        vertice_x, vertice_y = vertice_x[:, None], vertice_y[:, None]
+        area = np.abs((vertice_x - proximo_x[faixas, None]) * (y[indices] - vertice_y)
+                      - (vertice_x - x[indices]) * (proximo_y[faixas, None] - vertice_y))
+        area[fora] = -1
+        return indices[np.arange(len(faixas)), area.argmax(axis=1)]
+
+    todas = np.arange(n_faixas)
+    escolhidos = escolher(todas, np.append(x[0], media_x[:-1]), np.append(y[0], media_y[:-1]))
+    pendentes = todas[1:]
+    while len(pendentes):
+        anteriores = escolhidos[pendentes - 1]
+        novos = escolher(pendentes, x[anteriores], y[anteriores])
+        mudaram = pendentes[novos != escolhidos[pendentes]]
+        escolhidos[pendentes] = novos
+        pendentes = mudaram[mudaram < n_faixas - 1] + 1
+    return escolhidos
+
+
+# LTTB sequencial, uma faixa por iteração (faixas longas)
+def _lttb_laco(x, y, bordas, proximo_x, proximo_y):
+    escolhidos = np.empty(len(bordas) - 1, dtype=np.int64)
+    a = 0
+    for i in range(len(escolhidos)):
+        inicio, fim = bordas[i], bordas[i + 1]
+        xs, ys = x[inicio:fim], y[inicio:fim]
+        area = np.abs((x[a] - proximo_x[i]) * (ys - y[a]) - (x[a] - xs) * (proximo_y[i] - y[a]))
+        a = inicio + int(np.argmax(area))
+        escolhidos[i] = a
+    return escolhidos
+
+
+# Função que aplica o LTTB sobre uma pré-seleção min/max, reduzindo o custo em séries muito longas
+def minmax_lttb(x, y, n_saida, razao=4):
+    n = len(y)
+    if n_saida * razao >= n:
+        return lttb(x, y, n_saida)
+    x, y = _como_float(x, y)
+    pre = minmax(x, y, n_saida * razao)
+    return pre[lttb(x[pre], y[pre], n_saida)]
+
+
+METODOS = {'lttb': lttb, 'minmax': minmax, 'minmax_lttb': minmax_lttb}
+
+
+# Função para calcular o orçamento de pontos a partir da largura do gráfico em pixels
+def orcamento_pontos(largura, metodo='lttb'):
+    return max(int(largura * PONTOS_POR_PIXEL[metodo]), 4)
+
+
+# Função que recorta a série no intervalo de datas pedido e reduz os pontos para a largura do gráfico.
+# Com o recorte feito antes da redução, aproximar o gráfico de um período devolve mais detalhes.
+def reamostrar(x, y, largura, intervalo=None, metodo='lttb'):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    validos = ~np.isnan(y)
+    if not validos.all():
+        x, y = x[validos], y[validos]
+    if len(x) > 1 and not (x[1:] >= x[:-1]).all():
+        ordem = np.argsort(x, kind='stable')
+        x, y = x[ordem], y[ordem]
+
+    if intervalo is not None:
+        # As datas estão ordenadas: o recorte é feito por busca binária
+        inicio, fim = (None if v is None else np.asarray(v, dtype=x.dtype) for v in intervalo)
+        esquerda = 0 if inicio is None else np.searchsorted(x, inicio, side='left')
+        direita = len(x) if fim is None else np.searchsorted(x, fim, side='right')
+        x, y = x[esquerda:direita], y[esquerda:direita]
+
+    indices = METODOS[metodo](x, y, orcamento_pontos(largura, metodo))
+    return x[indices], y[indices]
@@ -0,0 +1,190 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Teste de Dickey-Fuller aumentado (ADF) em milhares de janelas da série de uma só vez.
+#
+# A regressão do ADF com constante para a janela [inicio, fim) e p defasagens é
+#   Δy_t = c + β·y_(t-1) + γ_1·Δy_(t-1) + ... + γ_p·Δy_(t-p) + ε_t,   t = inicio + p + 1, ..., fim - 1
+# e a estatística do teste é a razão t de β. Em vez de rodar um adfuller por janela:
+# - a matriz de regressores é montada uma única vez para a série inteira, com as defasagens de Δy
+#   tiradas de uma sliding_window_view (sem cópias por janela);
+# - as somas X'X e X'y de cada janela saem da diferença de somas acumuladas dos produtos por linha;
+# - os sistemas de todas as janelas e ordens de defasagem são resolvidos juntos (np.linalg.inv em lote).
+# Com as mesmas opções, o resultado de cada janela é igual ao do statsmodels.tsa.stattools.adfuller.
+
+CONFIANCA = ('1%', '5%', '10%')
+
+
+# Número máximo de defasagens usado pelo adfuller quando maxlag não é informado
+def maxlag_padrao(nobs):
+    return int(np.ceil(12 * (nobs / 100) ** 0.25))
+
+
+def _regressores(y, maxlag):
+    # Colunas [constante, y_(t-1), Δy_(t-1), ..., Δy_(t-maxlag)] e resposta Δy_t para t = 1, ..., n - 1.
+    # As defasagens anteriores ao início da série ficam com zero; elas nunca entram nas janelas.
+    dy = np.diff(y)
+    # O nível é centralizado: com a constante no modelo, isso não altera β e melhora o condicionamento
+    nivel = y[:-1] - y.mean()
+    preenchido = np.concatenate([np.zeros(maxlag), dy])
+    defasagens = sliding_window_view(preenchido, maxlag + 1)[:, ::-1][:, 1:]
+    x = np.column_stack([np.ones(len(dy)), nivel, defasagens])
+    return x, dy
+
+
+def _somas_acumuladas(x, dy):
+    # Somas acumuladas de x_t·x_t', x_t·Δy_t e Δy_t², com uma linha de zeros no início
+    k = x.shape[1]
+    xx = np.zeros((len(dy) + 1, k, k))
+    xy = np.zeros((len(dy) + 1, k))
+    yy = np.zeros(len(dy) + 1)
+    np.cumsum(x[:, :, None] * x[:, None, :], axis=0, out=xx[1:])
+    np.cumsum(x * dy[:, None], axis=0, out=xy[1:])
+    np.cumsum(dy * dy, out=yy[1:])
+    return xx, xy, yy
+
+
+def _ajustar(somas, primeira, ultima, p):
+    # Mínimos quadrados em lote para as linhas [primeira, ultima) com as colunas [constante, nível, p defasagens]
+    xx, xy, yy = somas
+    k = p + 2
+    sxx = xx[ultima, :k, :k] - xx[primeira, :k, :k]
+    sxy = xy[ultima, :k] - xy[primeira, :k]
+    syy = yy[ultima] - yy[primeira]
+    nobs = ultima - primeira
+    inversa = np.linalg.inv(sxx)
+    beta = np.einsum('wij,wj->wi', inversa, sxy)
+    ssr = np.maximum(syy - np.einsum('wi,wi->w', beta, sxy), 0.0)
+    sigma2 = ssr / (nobs - k)
+    estatistica = beta[:, 1] / np.sqrt(sigma2 * inversa[:, 1, 1])
+    return estatistica, ssr, nobs
+
+
+def _criterio(ssr, nobs, k, autolag):
+    # Critério de informação do OLS (a menos de constantes comuns a todas as ordens)
+    penalidade = 2 * k if autolag == 'AIC' else k * np.log(nobs)
+    return nobs * np.log(ssr / nobs) + penalidade
+
+
+# P-valor aproximado de MacKinnon (1994) para todas as estatísticas de uma vez. O mackinnonp do statsmodels
+# aceita uma estatística por chamada (perto de um segundo no gráfico de janelas móveis), então as suas
+# tabelas internas são avaliadas em lote; a versão do statsmodels é limitada no requirements.txt e a
+# paridade é verificada nos testes. Sem as tabelas, o cálculo volta ao mackinnonp público.
+def _p_valores(estatistica):
+    from scipy.stats import norm
+    from statsmodels.tsa import adfvalues
+
+    try:
+        pequenos, grandes = adfvalues._tau_smallps['c'][0], adfvalues._tau_largeps['c'][0]
+        estrela, maximo, minimo = (adfvalues._tau_stars['c'][0], adfvalues._tau_maxs['c'][0],
+                                   adfvalues._tau_mins['c'][0])
+    except (AttributeError, KeyError, IndexError):
+        unicos, inversos = np.unique(estatistica, return_inverse=True)
+        return np.array([adfvalues.mackinnonp(t, regression='c', N=1) for t in unicos])[inversos]
+    p_valor = norm.cdf(np.where(estatistica <= estrela, np.polyval(pequenos[::-1], estatistica),
+                                np.polyval(grandes[::-1], estatistica)))
+    p_valor = np.where(estatistica > maximo, 1.0, p_valor)
+    return np.where(estatistica < minimo, 0.0, p_valor)
+
+
+# Função para calcular o p-valor aproximado de MacKinnon (1994) e os valores críticos de MacKinnon (2010)
+def valores_mackinnon(estatistica, nobs):
+    from statsmodels.tsa.adfvalues import mackinnoncrit
+
+    p_valor = _p_valores(np.asarray(estatistica, dtype=float))
+    criticos = {n: mackinnoncrit(N=1, regression='c', nobs=n) for n in np.unique(nobs)}
+    return p_valor, np.array([criticos[n] for n in nobs]).reshape(-1, len(CONFIANCA))
+
+
+# Função para rodar o ADF em janelas da série.
+# Com janela=None as janelas são expansivas (todas começam no início da série e a menor tem `minimo`
+# observações); com um tamanho de janela, são móveis. As janelas terminam a cada `passo` observações.
+# Para cada ordem em `lags` o teste é feito com o número fixo de defasagens; com autolag='AIC' ou 'BIC'
+# a ordem de cada janela é escolhida entre 0 e maxlag, como no adfuller.
+def adf_janelas(y, janela=None, lags=(0,), passo=1, minimo=100, autolag=None, maxlag=None, datas=None):
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if janela is None:
+        fins = np.arange(min(minimo, n), n + 1, passo)
+        inicios = np.zeros_like(fins)
+    else:
+        inicios = np.arange(0, n - janela + 1, passo)
+        fins = inicios + janela
+    tamanho_menor = int((fins - inicios).min())
+
+    if autolag is not None:
+        maxlag = maxlag_padrao(tamanho_menor) if maxlag is None else maxlag
+        lags = range(maxlag + 1)
+    lags = list(lags)
+    maior = max(lags)
+    if tamanho_menor - 1 - maior <= maior + 2:
+        raise ValueError('Janelas curtas demais para o número de defasagens pedido')
+
+    x, dy = _regressores(y, maior)
+    somas = _somas_acumuladas(x, dy)
+    # A resposta Δy_t está na linha t - 1; a janela [inicio, fim) com p defasagens usa t de inicio + p + 1 a fim - 1
+    resultados = {p: _ajustar(somas, inicios + p, fins - 1, p) for p in lags}
+
+    if autolag is None:
+        partes = [(np.full(len(fins), p), *resultados[p]) for p in lags]
+        lag_usado = np.concatenate([parte[0] for parte in partes])
+        estatistica = np.concatenate([parte[1] for parte in partes])
+        nobs = np.concatenate([parte[3] for parte in partes])
+        posicao = np.tile(np.arange(len(fins)), len(lags))
+    else:
+        # Como no adfuller, as ordens são comparadas na mesma amostra (descartando maxlag observações)
+        criterios = np.stack([
+            _criterio(*_ajustar(somas, inicios + maior, fins - 1, p)[1:], p + 2, autolag) for p in lags
+        ])
+        lag_usado = np.asarray(lags)[np.argmin(criterios, axis=0)]
+        escolhida = np.stack([resultados[p][0] for p in lags])
+        estatistica = np.take_along_axis(escolhida, np.searchsorted(lags, lag_usado)[None], axis=0)[0]
+        nobs = fins - inicios - 1 - lag_usado
+        posicao = np.arange(len(fins))
+
+    p_valor, criticos = valores_mackinnon(estatistica, nobs)
+    tabela = pd.DataFrame({
+        'inicio': inicios[posicao],
+        'fim': fins[posicao],
+        'lag': lag_usado,
+        'nobs': nobs,
+        'estatistica': estatistica,
+        'p_valor': p_valor,
+        **{f'critico_{nivel}': criticos[:, i] for i, nivel in enumerate(CONFIANCA)},
+    })
+    tabela['estacionaria'] = tabela['p_valor'] < 0.05
+    if datas is not None:
+        datas = np.asarray(datas)
+        tabela.insert(2, 'data_inicio', datas[tabela['inicio']])
+        tabela.insert(3, 'data_fim', datas[tabela['fim'] - 1])
+    return tabela
+
+
+# Função para o teste ADF da série inteira, equivalente ao adfuller com regressão 'c'
+def adf(y, maxlag=None, autolag='AIC'):
+    y = np.asarray(y, dtype=float)
+    if maxlag is None:
+        maxlag = min(maxlag_padrao(len(y)), len(y) // 2 - 2)
+    resultado = adf_janelas(y, janela=len(y), lags=(maxlag,), autolag=autolag, maxlag=maxlag)
+    return resultado.iloc[0].to_dict()
+
+
+if __name__ == '__main__':
+    import time
+
+    from pipeline.dados import carregar_serie_arima
+
+    serie = carregar_serie_arima()['y']
+    print('Série inteira:', adf(serie.to_numpy()))
+
+    inicio = time.perf_counter()
+    moveis = adf_janelas(serie.to_numpy(), janela=750, lags=(0, 1, 5, 12), datas=serie.index)
+    duracao = time.perf_counter() - inicio
+    print(f'{len(moveis)} testes em janelas móveis de 750 dias em {duracao * 1000:.0f}ms')
+    resumo = moveis.groupby('lag')['estacionaria'].mean()
+    print('Proporção de janelas estacionárias por ordem de defasagem:')
+    print(resumo.to_string())
@@ -0,0 +1,175 @@
+# Libs
+
+import gzip
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from pipeline.armazem import ArmazemSerie
+from pipeline.colunar import DIRETORIO_CACHE, _remover_versoes_antigas, abrir_tabela, hash_arquivo
+
+
+# Arquivos de download dos dados: do armazenamento canônico (pipeline/consolidacao.py), usado pelo
+# aplicativo, ou de um CSV qualquer pelo cache colunar.
+#
+# Cada formato é gerado uma única vez por versão dos dados (hash do CSV ou do meta.json do armazenamento)
+# e gravado em disco, em vez de montar o conteúdo em memória a cada execução do aplicativo. Os recortes
+# por período também ficam em disco, ao lado da versão completa. O aplicativo só lê o arquivo quando o
+# botão de download é clicado; a linha de comando o envia à saída padrão em blocos.
+
+DIRETORIO_EXPORTACAO = os.path.join(DIRETORIO_CACHE, 'exportacao')
+
+# Formato -> (extensão, tipo MIME)
+FORMATOS = {
+    'csv': ('.csv', 'text/csv'),
+    'csv.gz': ('.csv.gz', 'application/gzip'),
+    'npz': ('.npz', 'application/octet-stream'),
+}
+
+TAMANHO_BLOCO = 1 << 16
+
+# Número máximo de recortes por período mantidos em disco para cada versão
+MAX_RECORTES = 32
+
+
+def _gravar_csv(tabela, linhas, destino):
+    df = pd.DataFrame({nome: tabela[nome][linhas] for nome in tabela.meta['colunas']}, copy=False)
+    # Números sem casas decimais desnecessárias (volume do armazenamento em float) e ausentes como texto vazio
+    df.to_csv(destino, index=False, chunksize=10_000, float_format='%.15g')
+
+
+def _gravar_gzip(origem, destino):
+    # Compressão do CSV já gravado, sem gerar o texto novamente
+    with open(origem, 'rb') as entrada, gzip.open(destino, 'wb', compresslevel=6) as saida:
+        shutil.copyfileobj(entrada, saida, TAMANHO_BLOCO)
+
+
+def _gravar_npz(tabela, linhas, destino):
+    with open(destino, 'wb') as arquivo:
+        np.savez(arquivo, **{nome: np.asarray(tabela[nome][linhas]) for nome in tabela.meta['colunas']})
+
+
+# Função para selecionar, na ordem original, as linhas do período [inicio, fim] por busca binária
+def _linhas_periodo(tabela, coluna_data, inicio, fim):
+    if inicio is None and fim is None:
+        return slice(None)
+    datas = np.asarray(tabela[coluna_data])
+    ordem = np.argsort(datas, kind='stable')
+    ordenadas = datas[ordem]
+    esquerda = 0 if inicio is None else np.searchsorted(ordenadas, np.datetime64(inicio, 'D'), side='left')
+    direita = len(datas) if fim is None else np.searchsorted(ordenadas, np.datetime64(fim, 'D'), side='right')
+    return np.sort(ordem[esquerda:direita])
+
+
+def _nome_arquivo(inicio, fim):
+    if inicio is None and fim is None:
+        return 'completo'
+    return f"{inicio or 'inicio'}_{fim or 'fim'}"
+
+
+def _remover_recortes_antigos(diretorio):
+    recortes = [os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+                if not nome.startswith(('completo', '.tmp-'))]
+    if len(recortes) > MAX_RECORTES * len(FORMATOS):
+        recortes.sort(key=os.path.getmtime)
+        for caminho in recortes[:len(recortes) - MAX_RECORTES * len(FORMATOS)]:
+            os.remove(caminho)
+
+
+# Nome e hash do conteúdo de uma origem: armazenamento (ArmazemSerie) ou caminho de um CSV
+def _identificar(origem):
+    if isinstance(origem, ArmazemSerie):
+        return os.path.basename(os.path.normpath(origem.diretorio)), origem.hash
+    return os.path.splitext(os.path.basename(origem))[0], hash_arquivo(origem)
+
+
+# Função para gerar os três formatos de um período e devolver o caminho de cada um
+def construir_exportacao(origem, inicio=None, fim=None, coluna_data='Data', diretorio=DIRETORIO_EXPORTACAO):
+    nome_origem, digest = _identificar(origem)
+    base = os.path.join(diretorio, nome_origem)
+    versao = digest[:16]
+    destino = os.path.join(base, versao)
+    nome = _nome_arquivo(inicio, fim)
+    caminhos = {formato: os.path.join(destino, nome + extensao) for formato, (extensao, _) in FORMATOS.items()}
+    if all(os.path.exists(c) for c in caminhos.values()):
+        return caminhos
+
+    os.makedirs(destino, exist_ok=True)
+    tabela = origem if isinstance(origem, ArmazemSerie) else abrir_tabela(origem)
+    linhas = _linhas_periodo(tabela, coluna_data, inicio, fim)
+    temporario = tempfile.mkdtemp(dir=destino, prefix='.tmp-')
+    try:
+        provisorios = {formato: os.path.join(temporario, os.path.basename(c)) for formato, c in caminhos.items()}
+        _gravar_csv(tabela, linhas, provisorios['csv'])
+        _gravar_gzip(provisorios['csv'], provisorios['csv.gz'])
+        _gravar_npz(tabela, linhas, provisorios['npz'])
+        # Troca atômica de cada arquivo: leitores nunca enxergam um arquivo parcialmente escrito
+        for formato, provisorio in provisorios.items():
+            os.replace(provisorio, caminhos[formato])
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+
+    _remover_versoes_antigas(base, versao)
+    _remover_recortes_antigos(destino)
+    return caminhos
+
+
+# Função para levar para a versão atual da origem os recortes da versão anterior que terminam antes da
+# primeira data alterada: o conteúdo desses períodos não mudou e não precisa ser gerado de novo
+def preservar_recortes(origem, hash_anterior, inicio_alteracao, diretorio=DIRETORIO_EXPORTACAO):
+    nome_origem, digest = _identificar(origem)
+    base = os.path.join(diretorio, nome_origem)
+    anterior = os.path.join(base, hash_anterior[:16])
+    destino = os.path.join(base, digest[:16])
+    if anterior == destino or not os.path.isdir(anterior):
+        return 0
+    os.makedirs(destino, exist_ok=True)
+    preservados = 0
+    for nome in os.listdir(anterior):
+        fim = nome.split('.')[0].partition('_')[2]
+        if fim in ('', 'fim') or nome.startswith('.tmp-'):
+            continue
+        if np.datetime64(fim, 'D') < np.datetime64(inicio_alteracao, 'D'):
+            os.replace(os.path.join(anterior, nome), os.path.join(destino, nome))
+            preservados += 1
+    return preservados
+
+
+# Função para obter o caminho do arquivo de um formato, gerando-o se ainda não existir
+def arquivo_exportacao(origem, formato='csv', inicio=None, fim=None, coluna_data='Data'):
+    return construir_exportacao(origem, inicio, fim, coluna_data)[formato]
+
+
+# Função geradora que lê um arquivo de exportação em blocos
+def iterar_blocos(caminho, tamanho=TAMANHO_BLOCO):
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho), b''):
+            yield bloco
+
+
+# Função para ler um arquivo de exportação, usada pelo botão de download no momento do clique.
+# O arquivo inteiro vai para a memória: o st.download_button aceita apenas str, bytes ou arquivo
+# (também quando recebe uma função) e converte tudo em bytes antes do envio, sem aceitar um iterador.
+def ler_exportacao(caminho, tamanho=TAMANHO_BLOCO):
+    return b''.join(iterar_blocos(caminho, tamanho))
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    from pipeline.consolidacao import abrir_canonico
+
+    parser = argparse.ArgumentParser(description='Gera e envia para a saída padrão um arquivo de exportação')
+    parser.add_argument('caminho', nargs='?', default=None, help='CSV de origem (padrão: armazenamento canônico)')
+    parser.add_argument('--formato', choices=list(FORMATOS), default='csv')
+    parser.add_argument('--inicio')
+    parser.add_argument('--fim')
+    args = parser.parse_args()
+
+    origem = abrir_canonico() if args.caminho is None else args.caminho
+    for bloco in iterar_blocos(arquivo_exportacao(origem, args.formato, args.inicio, args.fim)):
+        sys.stdout.buffer.write(bloco)
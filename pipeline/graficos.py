@@ -0,0 +1,241 @@
+# Libs
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from pipeline.dados import DATA_CORTE, carregar_dados_arima, carregar_dados_modelo, serie_diaria
+from pipeline.downsampling import reamostrar
+from pipeline.janelas import media_desvio_moveis
+
+
+# Gráficos das abas de análise exploratória, ARIMA e XGB construídos diretamente dos DataFrames.
+#
+# Cada função recebe os dados no formato do DataFrame de origem do notebook (ibov_modelo.csv ou CSV do
+# ARIMA), montados a partir do armazenamento canônico, e devolve um gráfico do Altair (Vega-Lite),
+# que é enviado ao navegador como especificação JSON em vez de uma imagem decodificada no servidor.
+# Antes de entrar no gráfico, cada série é recortada no período pedido e reduzida para o número
+# de pontos que cabe na largura do gráfico (pipeline/downsampling.py). A mesma largura é declarada
+# na especificação, de modo que o orçamento de pontos corresponde à área desenhada.
+
+ALTURA = 350
+# Largura da área de plotagem, em pixels: coluna do layout "centered" do Streamlit (704px) sem o eixo y
+LARGURA = 640
+
+# Cores dos gráficos originais do notebook
+CORES = {
+    'Original': 'steelblue',
+    'Fechamento': 'steelblue',
+    'Média Móvel': 'red',
+    'Desvio Padrão': 'black',
+    'Treino': 'green',
+    'Teste': 'blue',
+    'Previsão': 'orange',
+}
+
+
+# Função para montar um gráfico de linhas com uma ou mais séries compartilhando o eixo de datas
+def _linhas(series, titulo, eixo_y, eixo_x='Data', cores=None, metodo='lttb', largura=LARGURA, intervalo=None):
+    partes = []
+    for nome, (datas_serie, valores) in series.items():
+        datas_serie, valores = reamostrar(np.asarray(datas_serie), valores, largura, intervalo, metodo)
+        partes.append(pd.DataFrame({'Data': datas_serie, 'Série': nome, 'Valor': valores}))
+    dados = pd.concat(partes, ignore_index=True).dropna()
+
+    nomes = list(series)
+    cores = cores or CORES
+    cor = alt.Color('Série:N', sort=nomes, title=None,
+                    scale=alt.Scale(domain=nomes, range=[cores.get(n, 'steelblue') for n in nomes]),
+                    legend=alt.Legend(orient='top-left') if len(nomes) > 1 else None)
+
+    return alt.Chart(dados, title=titulo, width=largura, height=ALTURA).mark_line(strokeWidth=1).encode(
+        x=alt.X('Data:T', title=eixo_x),
+        y=alt.Y('Valor:Q', title=eixo_y, scale=alt.Scale(zero=False)),
+        color=cor,
+        tooltip=[alt.Tooltip('Data:T', format='%d/%m/%Y'), 'Série:N', alt.Tooltip('Valor:Q', format=',.2f')],
+    )
+
+
+# Histórico do fechamento do Ibovespa
+def grafico_historico(df, **opcoes):
+    return _linhas({'Fechamento': (df['Data'], df['Último'])},
+                   'Histórico Fechamento Ibovespa', 'Preço no fechamento', **opcoes)
+
+
+# Fechamento em escala logarítmica
+def grafico_log(df, **opcoes):
+    return _linhas({'Fechamento': (df['Data'], np.log(df['Último']))},
+                   'Fechamento Escala Log', 'Preço no fechamento (Log)', **opcoes)
+
+
+# Fechamento com média móvel e desvio padrão de 12 períodos
+def grafico_mm_std(df, janela=12, **opcoes):
+    fechamento = np.asarray(df['Último'], dtype=float)
+    media, desvio = media_desvio_moveis(fechamento, [janela])[janela]
+    return _linhas({
+        'Original': (df['Data'], fechamento),
+        'Média Móvel': (df['Data'], media),
+        'Desvio Padrão': (df['Data'], desvio),
+    }, 'Média Móvel & Desvio Padrão', 'Preço no fechamento', **opcoes)
+
+
+# Divisão de treino e teste do modelo XGB (85% e 15%)
+def grafico_treino_teste(df, **opcoes):
+    from pipeline.xgb import separar_treino_teste
+
+    treino, teste = separar_treino_teste(df)
+    return _linhas({
+        'Treino': (treino['Data'], treino['Último']),
+        'Teste': (teste['Data'], teste['Último']),
+    }, 'Treino & Teste', 'Preço no fechamento', **opcoes)
+
+
+# Previsão do modelo XGB sobre o conjunto de teste
+def grafico_previsao_xgb(df, **opcoes):
+    from pipeline.xgb import prever_xgb
+
+    treino, teste, previsoes = prever_xgb(df)
+    return _linhas({
+        'Treino': (treino['Data'], treino['Último']),
+        'Teste': (teste['Data'], teste['Último']),
+        'Previsão': (teste['Data'], previsoes),
+    }, 'Previsão do modelo', 'Preço no fechamento', **opcoes)
+
+
+# Volume negociado (em milhões)
+def grafico_volume(df, **opcoes):
+    return _linhas({'Volume': (df['ds'], np.asarray(df['volume'], dtype=float))},
+                   'Volume negociado segundo índice IBOVESPA de 2010 a 2023', 'Volume (milhões R$)', eixo_x='',
+                   metodo='minmax', **opcoes)
+
+
+# Diferença entre os valores máximo e mínimo diários
+def grafico_dif_min_max(df, **opcoes):
+    return _linhas({'Diferença': (df['ds'], df['max'] - df['min'])},
+                   'Diferença entre valor mínimo e máximo diário do índice IBOVESPA de 2010 a 2023',
+                   'Pontos índice IBOVESPA', eixo_x='', metodo='minmax', **opcoes)
+
+
+# Série logarítmica subtraída da média móvel e diferenciada, com média móvel e desvio padrão
+def grafico_serie_diff(df, janela=12, **opcoes):
+    serie = serie_diaria(df, 'ds', 'y')['y']
+    serie_log = np.log(serie.to_numpy())
+    serie_diff = np.diff(serie_log - media_desvio_moveis(serie_log, [janela])[janela][0], prepend=np.nan)
+    media, desvio = media_desvio_moveis(serie_diff, [janela])[janela]
+    datas = serie.index
+    return _linhas({
+        'y': (datas, serie_diff),
+        'Média Móvel': (datas, media),
+        'Desvio Padrão': (datas, desvio),
+    }, 'Fechamento, média móvel e desvio padrão do índice IBOVESPA de 2010 a 2023\n(Série temporal diferenciada)',
+        'Pontos índice IBOVESPA', eixo_x='', cores={**CORES, 'y': 'steelblue'}, **opcoes)
+
+
+# P-valor do teste ADF em janelas móveis da série diária do fechamento (2003 a 2023)
+def grafico_adf_janelas(df, janela=730, lags=(0, 12), **opcoes):
+    from pipeline.estacionariedade import adf_janelas
+
+    serie = serie_diaria(df, 'Data', 'Último')['y']
+    resultado = adf_janelas(serie.to_numpy(), janela=janela, lags=lags, datas=serie.index)
+    series = {f'p-valor ({lag} defasagens)': (grupo['data_fim'], grupo['p_valor'].to_numpy())
+              for lag, grupo in resultado.groupby('lag')}
+    cores = dict(zip(series, ['steelblue', 'orange', 'green', 'purple']))
+    datas = resultado['data_fim'].iloc[[0, -1]]
+    series['Nível de 5%'] = (datas, np.full(2, 0.05))
+    return _linhas(series, f'Teste ADF em janelas móveis de {janela} dias', 'P-value', eixo_x='',
+                   cores={**cores, 'Nível de 5%': 'red'}, **opcoes)
+
+
+# Gráfico de hastes de uma função de autocorrelação, com a faixa do intervalo de confiança
+def _correlograma(valores, intervalo_confianca, titulo, largura=LARGURA):
+    defasagens = np.arange(len(valores))
+    dados = pd.DataFrame({
+        'Lag': defasagens,
+        'Valor': valores,
+        'Inferior': intervalo_confianca[:, 0] - valores,
+        'Superior': intervalo_confianca[:, 1] - valores,
+    })
+    base = alt.Chart(dados, title=titulo, width=largura, height=ALTURA // 2)
+    eixo_y = alt.Y('Valor:Q', title=None, scale=alt.Scale(domain=[-1, 1]))
+    faixa = base.transform_filter('datum.Lag > 0').mark_area(opacity=0.3, color='steelblue').encode(
+        x='Lag:Q', y='Inferior:Q', y2='Superior:Q')
+    hastes = base.mark_rule(color='steelblue').encode(x='Lag:Q', y=eixo_y, y2=alt.datum(0))
+    pontos = base.mark_circle(size=40, color='steelblue', opacity=1).encode(
+        x=alt.X('Lag:Q', title='Lag'), y=eixo_y, tooltip=['Lag:Q', alt.Tooltip('Valor:Q', format='.4f')])
+    return faixa + hastes + pontos
+
+
+# ACF e PACF da série diária diferenciada, opcionalmente restritas a um período
+def grafico_acf_pacf(df, nlags=20, alfa=0.05, intervalo=None, largura=LARGURA):
+    from pipeline.autocorrelacao import acf, pacf
+
+    serie = serie_diaria(df, 'ds', 'y')['y']
+    if intervalo is not None:
+        serie = serie.loc[intervalo[0]:intervalo[1]]
+    diferenciada = np.diff(serie.to_numpy())
+    return alt.vconcat(
+        _correlograma(*acf(diferenciada, nlags, alfa), 'Autocorrelation', largura),
+        _correlograma(*pacf(diferenciada, nlags, alfa), 'Partial Autocorrelation', largura),
+    )
+
+
+# Previsão do modelo ARIMA padrão (vários passos a partir do fim do treino)
+def grafico_arima_padrao(df, order=(5, 1, 0), **opcoes):
+    from pipeline.arima import ARIMADinamico
+
+    serie = serie_diaria(df, 'ds', 'y')['y']
+    treino, teste = serie[serie.index < DATA_CORTE], serie[serie.index >= DATA_CORTE]
+    previsoes = ARIMADinamico(order=order).fit(treino.to_numpy()).forecast_passos(len(teste))
+    return _linhas({
+        'Treino': (treino.index, treino.to_numpy()),
+        'Teste': (teste.index, teste.to_numpy()),
+        'Previsão': (teste.index, previsoes),
+    }, 'IBOVESPA forecasting - Modelo ARIMA padrão', 'Pontos índice IBOVESPA', eixo_x='',
+        cores={**CORES, 'Treino': 'black', 'Previsão': 'red'}, **opcoes)
+
+
+# Previsão do modelo ARIMA dinâmico (um passo à frente, incorporando cada observação de teste)
+def grafico_arima_dinamico(df, order=(5, 1, 0), **opcoes):
+    from pipeline.arima import arima_dinamico
+
+    serie = serie_diaria(df, 'ds', 'y')['y']
+    treino, teste = serie[serie.index < DATA_CORTE], serie[serie.index >= DATA_CORTE]
+    previsoes = arima_dinamico(treino.to_numpy(), teste.to_numpy(), order=order)
+    return _linhas({
+        'Teste': (teste.index, teste.to_numpy()),
+        'Previsão': (teste.index, previsoes),
+    }, 'IBOVESPA forecasting - Modelo ARIMA dinâmico', 'Pontos índice IBOVESPA', eixo_x='',
+        cores={**CORES, 'Previsão': 'red'}, **opcoes)
+
+
+# Formatos dos dados de origem dos gráficos: nome -> função que os monta a partir do armazenamento canônico
+DADOS = {
+    'modelo': carregar_dados_modelo,
+    'arima': carregar_dados_arima,
+}
+
+# Registro dos gráficos: nome -> (formato dos dados, função)
+GRAFICOS = {
+    'historico': ('modelo', grafico_historico),
+    'log': ('modelo', grafico_log),
+    'mm_std': ('modelo', grafico_mm_std),
+    'treino_teste': ('modelo', grafico_treino_teste),
+    'previsao_target': ('modelo', grafico_previsao_xgb),
+    'volume': ('arima', grafico_volume),
+    'dif_min_max': ('arima', grafico_dif_min_max),
+    'serie_diff': ('arima', grafico_serie_diff),
+    'adf_janelas': ('modelo', grafico_adf_janelas),
+    'acf_pacf': ('arima', grafico_acf_pacf),
+    'modelo_arima_padrao': ('arima', grafico_arima_padrao),
+    'modelo_arima_dinamico': ('arima', grafico_arima_dinamico),
+}
+
+
+# Função para montar a especificação Vega-Lite de um gráfico registrado a partir dos dados no seu formato,
+# opcionalmente restrita a um intervalo de datas (inicio, fim)
+def montar_grafico(nome, df, largura=LARGURA, intervalo=None):
+    # Os dados vão embutidos na especificação, sem o limite de 5000 linhas do Altair
+    with alt.data_transformers.enable('default', max_rows=None):
+        # Sem ajuste automático (pad): a largura declarada é a da área de plotagem e os eixos ficam de fora
+        grafico = GRAFICOS[nome][1](df, largura=largura, intervalo=intervalo)
+        return grafico.properties(autosize='pad').to_dict()
@@ -0,0 +1,204 @@
+# Libs
+
+import hashlib
+import html
+import io
+import json
+import logging
+import os
+
+from pipeline.cache import memoizar
+from pipeline.colunar import hash_arquivo
+
+
+# Variantes otimizadas dos gráficos estáticos (Assets/Graficos) em várias larguras.
+#
+# Os gráficos foram salvos pelos notebooks na resolução original (até 1660px e 280KB) e eram
+# decodificados com plt.imread a cada exibição, para o Streamlit codificá-los de novo. Aqui cada
+# gráfico é convertido uma única vez, na etapa de build (python -m pipeline.imagens), em:
+#   WebP (com perdas, qualidade 85) em cada largura;
+#   PNG com paleta de 256 cores (gráficos PNG) ou JPEG progressivo (gráficos JPEG), para os
+#   navegadores sem WebP.
+# O nome de cada arquivo leva o hash do seu conteúdo e o manifest.json liga o gráfico original às
+# variantes. O aplicativo serve os arquivos como estáticos (server.enableStaticServing) em um
+# <picture> com srcset: o navegador escolhe a largura e o formato e o servidor apenas envia os bytes.
+# Gráficos cujo hash não mudou desde o último build não são convertidos de novo.
+
+DIRETORIO_ORIGEM = 'Assets/Graficos'
+DIRETORIO_VARIANTES = 'static/graficos'
+CAMINHO_MANIFESTO = os.path.join(DIRETORIO_VARIANTES, 'manifest.json')
+
+# Endereço dos arquivos de static/ no servidor do Streamlit
+URL_ESTATICOS = 'app/static/graficos'
+
+# Larguras geradas (limitadas à largura original): celular, coluna central do layout e tela de alta densidade
+LARGURAS = (480, 730, 1460)
+LARGURA_COLUNA = 730
+
+_log = logging.getLogger(__name__)
+# Gráficos já avisados como desatualizados, por hash da origem: o aviso não se repete a cada execução
+_avisados = set()
+
+QUALIDADE_WEBP = 85
+QUALIDADE_JPEG = 85
+EXTENSOES = ('.png', '.jpg', '.jpeg')
+
+
+def _hash_bytes(conteudo, tamanho=10):
+    return hashlib.sha256(conteudo).hexdigest()[:tamanho]
+
+
+def _codificar(imagem, formato):
+    saida = io.BytesIO()
+    if formato == 'webp':
+        imagem.save(saida, 'WEBP', quality=QUALIDADE_WEBP, method=6)
+    elif formato == 'png':
+        # Gráficos têm poucas cores: a paleta de 256 cores reduz o arquivo sem diferença visível
+        paleta = imagem.quantize(256, method=2 if imagem.mode == 'RGBA' else 0)
+        paleta.save(saida, 'PNG', optimize=True)
+    else:
+        imagem.convert('RGB').save(saida, 'JPEG', quality=QUALIDADE_JPEG, optimize=True, progressive=True)
+    return saida.getvalue()
+
+
+# Função para gerar as variantes de um gráfico, gravando cada arquivo com o hash do conteúdo no nome
+def gerar_variantes(caminho, destino=DIRETORIO_VARIANTES, larguras=LARGURAS):
+    from PIL import Image
+
+    with open(caminho, 'rb') as arquivo:
+        bruto = arquivo.read()
+    imagem = Image.open(io.BytesIO(bruto))
+    imagem.load()
+    # Canal alfa totalmente opaco (matplotlib com fundo branco) não precisa ser guardado
+    if imagem.mode == 'RGBA' and imagem.getchannel('A').getextrema() == (255, 255):
+        imagem = imagem.convert('RGB')
+    elif imagem.mode not in ('RGB', 'RGBA'):
+        imagem = imagem.convert('RGBA' if 'transparency' in imagem.info else 'RGB')
+
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    alternativo = 'png' if caminho.lower().endswith('.png') else 'jpg'
+    escolhidas = sorted({min(largura, imagem.width) for largura in larguras})
+    variantes = []
+    for largura in escolhidas:
+        altura = round(imagem.height * largura / imagem.width)
+        redimensionada = imagem if largura == imagem.width else imagem.resize((largura, altura), Image.LANCZOS)
+        for formato in ('webp', alternativo):
+            conteudo = _codificar(redimensionada, formato)
+            if largura == imagem.width and formato == alternativo and len(conteudo) >= len(bruto):
+                # Na largura original, o arquivo original já é menor que o recodificado
+                conteudo = bruto
+            arquivo = f'{nome}-{largura}w-{_hash_bytes(conteudo)}.{formato}'
+            with open(os.path.join(destino, arquivo), 'wb') as saida:
+                saida.write(conteudo)
+            variantes.append({'arquivo': arquivo, 'formato': formato, 'largura': largura, 'altura': altura,
+                              'bytes': len(conteudo)})
+    return {'hash': hash_arquivo(caminho), 'largura': imagem.width, 'altura': imagem.height,
+            'bytes': len(bruto), 'variantes': variantes}
+
+
+def _ler_manifesto(caminho=CAMINHO_MANIFESTO):
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+# Função do build: gera as variantes dos gráficos novos ou alterados, grava o manifesto e remove
+# os arquivos de variantes que não pertencem mais a nenhum gráfico
+def construir(origem=DIRETORIO_ORIGEM, destino=DIRETORIO_VARIANTES, larguras=LARGURAS, forcar=False):
+    os.makedirs(destino, exist_ok=True)
+    caminho_manifesto = os.path.join(destino, 'manifest.json')
+    anterior = _ler_manifesto(caminho_manifesto)
+    manifesto = {}
+    for nome in sorted(os.listdir(origem)):
+        if not nome.lower().endswith(EXTENSOES):
+            continue
+        caminho = os.path.join(origem, nome).replace(os.sep, '/')
+        entrada = anterior.get(caminho)
+        existentes = entrada is not None and all(os.path.exists(os.path.join(destino, v['arquivo']))
+                                                 for v in entrada['variantes'])
+        if forcar or not existentes or entrada['hash'] != hash_arquivo(caminho):
+            entrada = gerar_variantes(caminho, destino, larguras)
+        manifesto[caminho] = entrada
+
+    utilizados = {v['arquivo'] for entrada in manifesto.values() for v in entrada['variantes']}
+    for arquivo in os.listdir(destino):
+        if arquivo != 'manifest.json' and arquivo not in utilizados:
+            os.remove(os.path.join(destino, arquivo))
+
+    temporario = caminho_manifesto + '.tmp'
+    with open(temporario, 'w', encoding='utf-8', newline='\n') as saida:
+        json.dump(manifesto, saida, ensure_ascii=False, indent=2)
+        saida.write('\n')
+    os.replace(temporario, caminho_manifesto)
+    return manifesto
+
+
+# Manifesto lido uma vez por versão do arquivo
+@memoizar('manifesto_imagens', max_itens=2)
+def _manifesto_versao(caminho, versao):
+    return _ler_manifesto(caminho)
+
+
+def manifesto(caminho=CAMINHO_MANIFESTO):
+    return _manifesto_versao(caminho, hash_arquivo(caminho)) if os.path.exists(caminho) else {}
+
+
+# Função para montar o <picture> de um gráfico: WebP e formato alternativo com srcset por largura.
+# Devolve None quando o gráfico não tem variantes no manifesto ou quando as variantes são de uma versão
+# anterior do arquivo (build não executado depois da alteração): o aplicativo exibe então o original.
+def html_imagem(caminho, texto_alternativo='', url=URL_ESTATICOS, largura_coluna=LARGURA_COLUNA,
+                caminho_manifesto=CAMINHO_MANIFESTO):
+    entrada = manifesto(caminho_manifesto).get(caminho)
+    if entrada is None:
+        return None
+    if os.path.exists(caminho):
+        atual = hash_arquivo(caminho)
+        if atual != entrada['hash']:
+            if atual not in _avisados:
+                _avisados.add(atual)
+                _log.warning('Variantes desatualizadas de %s: execute python -m pipeline.imagens', caminho)
+            return None
+    por_formato = {}
+    for variante in entrada['variantes']:
+        por_formato.setdefault(variante['formato'], []).append(variante)
+    srcset = {formato: ', '.join(f"{url}/{v['arquivo']} {v['largura']}w" for v in variantes)
+              for formato, variantes in por_formato.items()}
+    alternativo = next(formato for formato in por_formato if formato != 'webp')
+    maior = max(por_formato[alternativo], key=lambda v: v['largura'])
+    # Como no st.image, o gráfico ocupa no máximo a largura original e a largura da coluna
+    exibida = min(entrada['largura'], largura_coluna)
+    tamanhos = f'(max-width: {exibida}px) 100vw, {exibida}px'
+    alt = html.escape(texto_alternativo, quote=True)
+    # O link abre a maior variante em outra aba, no lugar do botão de tela cheia do st.image
+    return (
+        f'<a href="{url}/{maior["arquivo"]}" target="_blank"><picture>'
+        f'<source type="image/webp" srcset="{srcset["webp"]}" sizes="{tamanhos}">'
+        f'<img src="{url}/{maior["arquivo"]}" srcset="{srcset[alternativo]}" sizes="{tamanhos}" '
+        f'width="{maior["largura"]}" height="{maior["altura"]}" alt="{alt}" '
+        f'loading="lazy" decoding="async" style="max-width: 100%; height: auto">'
+        f'</picture></a>'
+    )
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Gera as variantes otimizadas dos gráficos e o manifesto')
+    parser.add_argument('--origem', default=DIRETORIO_ORIGEM)
+    parser.add_argument('--destino', default=DIRETORIO_VARIANTES)
+    parser.add_argument('--larguras', type=int, nargs='+', default=list(LARGURAS))
+    parser.add_argument('--forcar', action='store_true', help='converte de novo mesmo os gráficos sem alteração')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resultado = construir(args.origem, args.destino, tuple(args.larguras), args.forcar)
+    duracao = time.perf_counter() - inicio
+
+    for caminho, entrada in resultado.items():
+        menor = {f: min(v['bytes'] for v in entrada['variantes'] if v['formato'] == f)
+                 for f in {v['formato'] for v in entrada['variantes']}}
+        print(f"{caminho}: {entrada['bytes'] / 1024:.0f}KB ({entrada['largura']}px) -> "
+              + ', '.join(f'{f} a partir de {b / 1024:.0f}KB' for f, b in sorted(menor.items())))
+    print(f'{len(resultado)} gráficos em {duracao:.1f}s')
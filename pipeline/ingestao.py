@@ -0,0 +1,158 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+
+
+# Leitura das exportações de dados históricos da investing.com.
+#
+# Os valores vêm no formato brasileiro ("116.552", "11,79M", "-0,22%", "15.08.2023"). Em vez de
+# montar expressões e chamar pd.eval linha a linha, as colunas são convertidas em matrizes de
+# bytes (uma linha por registro) e os números são montados com operações vetorizadas do NumPy.
+
+COLUNAS_PRECO = ['Último', 'Abertura', 'Máxima', 'Mínima']
+
+# Multiplicadores dos sufixos de volume
+SUFIXOS = {b'K': 1e3, b'M': 1e6, b'B': 1e9}
+
+_ZERO = ord('0')
+
+
+# Função para converter uma coluna de texto em matriz de bytes (n, largura), preenchida com zeros
+def _matriz_bytes(valores):
+    valores = pd.Series(valores, copy=False).to_numpy(dtype=object, na_value='')
+    texto = valores.astype('S') if len(valores) else np.empty(0, dtype='S1')
+    largura = max(texto.dtype.itemsize, 1)
+    return texto.view(np.uint8).reshape(len(texto), largura)
+
+
+# Função para converter números no formato brasileiro: '.' separa milhares e ',' separa decimais.
+# Devolve os valores em float64, com NaN nos campos vazios.
+def converter_numeros(valores, sufixos=False):
+    b = _matriz_bytes(valores)
+    digito = (b >= _ZERO) & (b <= _ZERO + 9)
+    depois_virgula = np.cumsum(b == ord(','), axis=1) > 0
+
+    # A mantissa inteira é montada com o peso 10^k de cada dígito contado da direita
+    posicao = np.cumsum(digito[:, ::-1], axis=1)[:, ::-1] - 1
+    pesos = np.where(digito, 10 ** np.clip(posicao, 0, 18).astype(np.int64), 0)
+    mantissa = (pesos * (b.astype(np.int64) - _ZERO)).sum(axis=1)
+    casas = (digito & depois_virgula).sum(axis=1)
+
+    sinal = np.where((b == ord('-')).any(axis=1), -1.0, 1.0)
+
+    fator = np.ones(len(b))
+    if sufixos:
+        ultimo = b[np.arange(len(b)), np.maximum((b != 0).sum(axis=1) - 1, 0)]
+        for sufixo, multiplicador in SUFIXOS.items():
+            fator[ultimo == ord(sufixo)] = multiplicador
+
+    # Mantissa e fator são inteiros exatos: multiplicar antes de dividir evita erros de arredondamento
+    valores = sinal * (mantissa * fator) / 10.0 ** casas
+    return np.where(digito.any(axis=1), valores, np.nan)
+
+
+# Função para converter o volume ("11,79M", "850,52K") em float64
+def converter_volume(valores):
+    return converter_numeros(valores, sufixos=True)
+
+
+# Função para converter a variação percentual ("-0,22%") em float64
+def converter_percentual(valores):
+    return converter_numeros(valores)
+
+
+# Função para converter datas no formato dd.mm.aaaa em datetime64[D]
+def converter_datas(valores):
+    b = _matriz_bytes(valores)
+    if b.shape[1] < 10 or not ((b[:, 2] == ord('.')) & (b[:, 5] == ord('.'))).all():
+        return pd.to_datetime(pd.Series(valores), format='%d.%m.%Y').to_numpy().astype('datetime64[D]')
+
+    d = b[:, :10].astype(np.int64) - _ZERO
+    dia = d[:, 0] * 10 + d[:, 1]
+    mes = d[:, 3] * 10 + d[:, 4]
+    ano = d[:, 6] * 1000 + d[:, 7] * 100 + d[:, 8] * 10 + d[:, 9]
+    if ((mes < 1) | (mes > 12) | (dia < 1) | (dia > 31)).any():
+        raise ValueError('Data inválida na coluna de datas')
+
+    meses = ((ano - 1970) * 12 + (mes - 1)).astype('datetime64[M]')
+    return meses.astype('datetime64[D]') + (dia - 1).astype('timedelta64[D]')
+
+
+# Função inversa de converter_volume, no formato da exportação: 11790000 -> "11,79M"
+def formatar_volume(valores):
+    valores = np.asarray(valores, dtype=float)
+    sufixos = np.select([valores >= 1e9, valores >= 1e6], ['B', 'M'], 'K')
+    divisores = np.select([valores >= 1e9, valores >= 1e6], [1e9, 1e6], 1e3)
+    return ['' if np.isnan(v) else f'{v:.2f}'.replace('.', ',') + s for v, s in zip(valores / divisores, sufixos)]
+
+
+# Função inversa de converter_percentual: -0.22 -> "-0,22%"
+def formatar_percentual(valores):
+    return ['' if np.isnan(v) else f'{v:.2f}'.replace('.', ',') + '%' for v in np.asarray(valores, dtype=float)]
+
+
+# Função para processar um DataFrame bruto da investing.com (todas as colunas como texto)
+def processar_investing(df_bruto, remover_nulos=True):
+    df = pd.DataFrame({'Data': converter_datas(df_bruto['Data'])})
+    for coluna in COLUNAS_PRECO:
+        # Pontos do índice como inteiros: "116.552" -> 116552
+        df[coluna] = converter_numeros(df_bruto[coluna])
+    df['Vol.'] = converter_volume(df_bruto['Vol.'])
+    if 'Var%' in df_bruto:
+        df['Var%'] = converter_percentual(df_bruto['Var%'])
+
+    if remover_nulos:
+        df = df.dropna().reset_index(drop=True)
+        df[COLUNAS_PRECO + ['Vol.']] = df[COLUNAS_PRECO + ['Vol.']].round().astype(np.int64)
+    return df
+
+
+# Função para ler o CSV bruto apenas como texto, sem conversões do pandas
+def _ler_bruto(caminho, chunksize=None):
+    return pd.read_csv(caminho, sep=',', dtype=str, keep_default_na=False, chunksize=chunksize)
+
+
+# Função para ler em partes exportações muito grandes, processando um bloco de cada vez
+def iterar_investing(caminho, chunksize=100_000, remover_nulos=True):
+    for bloco in _ler_bruto(caminho, chunksize=chunksize):
+        yield processar_investing(bloco, remover_nulos=remover_nulos)
+
+
+# Função para ler e processar uma exportação da investing.com
+def ler_investing(caminho, chunksize=None, remover_nulos=True):
+    if chunksize is None:
+        return processar_investing(_ler_bruto(caminho), remover_nulos=remover_nulos)
+    partes = list(iterar_investing(caminho, chunksize, remover_nulos))
+    return pd.concat(partes, ignore_index=True)
+
+
+# Função para montar o DataFrame do modelo (ibov_modelo.csv): ordem ascendente, sem Var%,
+# com o fechamento do dia seguinte (Amanhã) e o indicador de alta (Target)
+def preparar_modelo(df):
+    df = df.drop(columns=['Var%'], errors='ignore').sort_values('Data', kind='stable')
+    df = df.set_index('Data')
+    amanha = df['Último'].to_numpy()[1:]
+    df = df.iloc[:-1].copy()
+    df['Amanhã'] = amanha
+    df['Target'] = (df['Amanhã'] > df['Último']).astype(np.int64)
+    return df
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Processa a exportação da investing.com no formato do ibov_modelo.csv')
+    parser.add_argument('origem', nargs='?', default='Assets/Base/ibovespa.csv')
+    parser.add_argument('destino', nargs='?', default=None)
+    parser.add_argument('--chunksize', type=int, default=None)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df_modelo = preparar_modelo(ler_investing(args.origem, chunksize=args.chunksize))
+    duracao = time.perf_counter() - inicio
+    print(f'{len(df_modelo)} linhas processadas em {duracao * 1000:.1f}ms')
+
+    if args.destino:
+        df_modelo.to_csv(args.destino)
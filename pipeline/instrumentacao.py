@@ -0,0 +1,272 @@
+# Libs
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+
+from pipeline.cache import consultas_thread, definir_consultas_thread
+from pipeline.colunar import DIRETORIO_CACHE
+
+
+# Medição do tempo de renderização de cada seção do aplicativo.
+#
+# Cada medição registra o tempo de relógio, o tempo de CPU da thread da sessão (o Streamlit executa
+# o script de cada sessão em uma thread própria), a variação de blocos de memória alocados pelo
+# interpretador e as consultas aos caches limitados (pipeline/cache.py) feitas durante a medição,
+# com acertos e falhas por cache. Com o tracemalloc ativo (python -X tracemalloc) também é
+# registrado o pico de bytes alocados, que tem custo alto demais para ficar sempre ligado. O pico do
+# tracemalloc é único no processo: ele só é registrado nas medições que não se sobrepuseram a medições
+# de outras threads (sessões simultâneas), e as demais saem com pico_concorrente em vez de pico_bytes.
+#
+# As seções de uma execução do script são sequenciais: Execucao.secao(nome) encerra a seção anterior
+# e inicia a próxima, sem reindentar o conteúdo das abas. Funções podem ser medidas a cada chamada
+# com o decorador @instrumentar. Os registros vão em JSON, um por linha, para o log
+# Assets/Cache/instrumentacao/medicoes.jsonl e para uma fila em memória compartilhada pelas sessões
+# do processo, resumida em percentis por resumo(). Com INSTRUMENTACAO=0 as medições são desligadas.
+
+DIRETORIO_INSTRUMENTACAO = os.path.join(DIRETORIO_CACHE, 'instrumentacao')
+CAMINHO_LOG = os.path.join(DIRETORIO_INSTRUMENTACAO, 'medicoes.jsonl')
+
+ATIVA = os.environ.get('INSTRUMENTACAO', '1') != '0'
+
+# Registros mantidos em memória para os percentis entre sessões
+MAX_REGISTROS = 10_000
+PERCENTIS = (50, 90, 99)
+
+_recentes = deque(maxlen=MAX_REGISTROS)
+_execucao_thread = threading.local()
+_trava_log = threading.Lock()
+
+# Medições em andamento com o tracemalloc ativo, de todas as threads
+_medicoes_rastreadas = set()
+_trava_rastreadas = threading.Lock()
+_log = None
+
+
+# Logger dos registros: um arquivo JSON lines com rotação, criado na primeira medição.
+# Outro destino pode ser configurado com handlers próprios no logger 'instrumentacao'.
+def _logger():
+    global _log
+    if _log is None:
+        with _trava_log:
+            if _log is None:
+                logger = logging.getLogger('instrumentacao')
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                if not logger.handlers:
+                    os.makedirs(DIRETORIO_INSTRUMENTACAO, exist_ok=True)
+                    handler = RotatingFileHandler(CAMINHO_LOG, maxBytes=10 * (1 << 20), backupCount=3,
+                                                  encoding='utf-8')
+                    handler.setFormatter(logging.Formatter('%(message)s'))
+                    logger.addHandler(handler)
+                _log = logger
+    return _log
+
+
+def _registrar(registro):
+    _recentes.append(registro)
+    _logger().info(json.dumps(registro, ensure_ascii=False))
+
+
+def _pilha():
+    if not hasattr(_execucao_thread, 'pilha'):
+        _execucao_thread.pilha = []
+    return _execucao_thread.pilha
+
+
+class Medicao:
+
+    def __init__(self, nome, tipo='secao', **contexto):
+        self.nome = nome
+        self.tipo = tipo
+        self.contexto = contexto
+        self.registro = None
+        self._pico_internas = 0
+        self._concorrente = False
+
+    def iniciar(self):
+        pilha = _pilha()
+        if not pilha:
+            definir_consultas_thread([])
+        pilha.append(self)
+        self._consulta_inicial = len(consultas_thread())
+        self._rastreando = tracemalloc.is_tracing()
+        if self._rastreando:
+            with _trava_rastreadas:
+                # Medições de outras threads em andamento: o pico de nenhuma delas (nem desta) é confiável
+                self._thread = threading.get_ident()
+                outras = [m for m in _medicoes_rastreadas if m._thread != self._thread]
+                for medicao in outras + ([self] if outras else []):
+                    medicao._concorrente = True
+                _medicoes_rastreadas.add(self)
+                if not self._concorrente:
+                    # O pico até aqui pertence à medição externa, antes de ser zerado para esta
+                    if len(pilha) > 1:
+                        pilha[-2]._pico_internas = max(pilha[-2]._pico_internas, tracemalloc.get_traced_memory()[1])
+                    tracemalloc.reset_peak()
+                self._memoria_inicial = tracemalloc.get_traced_memory()[0]
+        self._blocos = sys.getallocatedblocks()
+        self._cpu = time.thread_time()
+        self._relogio = time.perf_counter()
+        return self
+
+    def encerrar(self):
+        relogio = time.perf_counter() - self._relogio
+        cpu = time.thread_time() - self._cpu
+        blocos = sys.getallocatedblocks() - self._blocos
+        consultas = (consultas_thread() or [])[self._consulta_inicial:]
+        pilha = _pilha()
+        if self in pilha:
+            pilha.remove(self)
+        if not pilha:
+            definir_consultas_thread(None)
+
+        acertos = Counter(nome for nome, acerto in consultas if acerto)
+        falhas = Counter(nome for nome, acerto in consultas if not acerto)
+        self.registro = {
+            'instante': round(time.time(), 3),
+            'tipo': self.tipo,
+            'nome': self.nome,
+            **self.contexto,
+            'relogio_ms': round(relogio * 1000, 3),
+            'cpu_ms': round(cpu * 1000, 3),
+            'blocos_alocados': blocos,
+            'acertos': sum(acertos.values()),
+            'falhas': sum(falhas.values()),
+            'caches': {nome: [acertos[nome], falhas[nome]] for nome in sorted(set(acertos) | set(falhas))},
+        }
+        if self._rastreando:
+            with _trava_rastreadas:
+                _medicoes_rastreadas.discard(self)
+                # Cada medição interna zera o pico do tracemalloc: o pico desta é o maior entre o
+                # observado depois da última medição interna e os das medições internas
+                pico = max(tracemalloc.get_traced_memory()[1], self._pico_internas)
+            if self._concorrente:
+                self.registro['pico_concorrente'] = True
+            else:
+                self.registro['pico_bytes'] = pico - self._memoria_inicial
+            if pilha:
+                pilha[-1]._pico_internas = max(pilha[-1]._pico_internas, pico)
+        _registrar(self.registro)
+        return self.registro
+
+
+# Contexto da execução atual da thread (sessão e aba), incluído nos registros das medições internas
+def _contexto_atual():
+    execucao = getattr(_execucao_thread, 'atual', None)
+    return {} if execucao is None else {'sessao': execucao.sessao, 'aba': execucao.aba}
+
+
+@contextlib.contextmanager
+def medir(nome, tipo='funcao'):
+    if not ATIVA:
+        yield None
+        return
+    medicao = Medicao(nome, tipo, **_contexto_atual()).iniciar()
+    try:
+        yield medicao
+    finally:
+        medicao.encerrar()
+
+
+# Decorador que mede cada chamada da função
+def instrumentar(nome=None):
+    def decorador(funcao):
+        rotulo = nome or funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with medir(rotulo):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+# Medição de uma execução do script, dividida em seções sequenciais
+class Execucao:
+
+    def __init__(self, aba, sessao=None):
+        self.aba = aba
+        self.sessao = sessao
+        self._secao = None
+        self._total = None
+        if ATIVA:
+            # Uma execução interrompida pelo Streamlit (nova interação no meio do script) não é encerrada:
+            # as medições abertas por ela são descartadas
+            _pilha().clear()
+            definir_consultas_thread(None)
+            _execucao_thread.atual = self
+            self._total = Medicao(aba, 'execucao', sessao=sessao, aba=aba).iniciar()
+
+    def secao(self, nome):
+        if not ATIVA:
+            return
+        if self._secao is not None:
+            self._secao.encerrar()
+        self._secao = Medicao(nome, 'secao', sessao=self.sessao, aba=self.aba).iniciar()
+
+    def encerrar(self):
+        if not ATIVA or self._total is None:
+            return
+        if self._secao is not None:
+            self._secao.encerrar()
+            self._secao = None
+        self._total.encerrar()
+        self._total = None
+        if getattr(_execucao_thread, 'atual', None) is self:
+            _execucao_thread.atual = None
+
+
+# Função para resumir os registros em percentis por tipo, aba e nome (por padrão, os registros
+# em memória de todas as sessões do processo)
+def resumo(registros=None, percentis=PERCENTIS):
+    df = pd.DataFrame(list(_recentes) if registros is None else registros)
+    if df.empty:
+        return pd.DataFrame()
+    if 'aba' not in df:
+        df['aba'] = None
+    df['aba'] = df['aba'].fillna('')
+    grupos = df.groupby(['tipo', 'aba', 'nome'], sort=False)
+    resultado = grupos.size().rename('n').to_frame()
+    for coluna in ('relogio_ms', 'cpu_ms'):
+        for q in percentis:
+            resultado[f'{coluna[:-3]}_p{q}_ms'] = grupos[coluna].quantile(q / 100)
+    resultado['blocos_p50'] = grupos['blocos_alocados'].median()
+    acertos = grupos['acertos'].sum()
+    consultas = acertos + grupos['falhas'].sum()
+    resultado['taxa_acerto'] = acertos / consultas.where(consultas > 0)
+    return resultado.round(3)
+
+
+# Função para ler os registros do log (inclusive dos arquivos rotacionados)
+def ler_log(caminho=CAMINHO_LOG):
+    registros = []
+    for arquivo in sorted(f for f in [caminho] + [f'{caminho}.{i}' for i in range(1, 10)] if os.path.exists(f)):
+        with open(arquivo, encoding='utf-8') as entrada:
+            registros.extend(json.loads(linha) for linha in entrada if linha.strip())
+    return registros
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Percentis das medições registradas no log da instrumentação')
+    parser.add_argument('caminho', nargs='?', default=CAMINHO_LOG)
+    parser.add_argument('--tipo', default=None, choices=['execucao', 'secao', 'funcao'])
+    args = parser.parse_args()
+
+    tabela = resumo(ler_log(args.caminho))
+    if args.tipo is not None and not tabela.empty:
+        tabela = tabela.loc[args.tipo]
+    with pd.option_context('display.width', 250, 'display.max_rows', None, 'display.max_columns', None):
+        print(tabela)
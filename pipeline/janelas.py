@@ -0,0 +1,280 @@
+# Libs
+
+from collections import deque
+
+import numpy as np
+
+
+# Estatísticas móveis (média, desvio padrão, mínimo, máximo e média móvel exponencial) do fechamento.
+#
+# Dois modos com os mesmos resultados:
+# - estatisticas_moveis: calcula todas as janelas pedidas sobre a série inteira de forma vetorizada
+#   em O(n) por janela (blocos de van Herk/Gil-Werman para média, desvio, mínimo e máximo,
+#   filtro recursivo para a média exponencial);
+# - EstatisticasMoveis: atualiza todos os indicadores a cada novo pregão em tempo constante por janela
+#   (Welford com remoção do valor que sai da janela e filas monotônicas para mínimo e máximo).
+# Como no pandas (rolling(janela) e ewm(span, adjust=False)), as janelas incompletas valem NaN e o
+# desvio padrão é amostral (ddof=1). Janelas com NaN valem NaN e voltam a ter valor quando o NaN sai
+# da janela. Na média exponencial um NaN repete o valor anterior e apenas reduz o peso do histórico,
+# como ewm com ignore_na=False. Séries (n,) ou lotes (m, n) são aceitos, com as janelas no último eixo.
+
+
+def _blocos(x, janela, preenchimento):
+    # Reorganiza o último eixo em blocos do tamanho da janela, com um bloco extra ao final
+    n = x.shape[-1]
+    blocos = -(-n // janela) + 1
+    completo = np.full(x.shape[:-1] + (blocos * janela,), preenchimento)
+    completo[..., :n] = x
+    return completo.reshape(x.shape[:-1] + (blocos, janela))
+
+
+# Função para calcular as médias e os desvios padrão móveis de várias janelas em O(n) por janela.
+# Como no mínimo e no máximo, cada janela é a união do sufixo de um bloco com o prefixo do seguinte.
+# As somas acumuladas são feitas dentro de cada bloco, em relação ao primeiro valor do bloco, e as duas
+# partes são combinadas pela fórmula de Chan (Welford em paralelo), sem o cancelamento numérico
+# das somas de quadrados acumuladas sobre a série inteira.
+def media_desvio_moveis(x, janelas):
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    resultado = {}
+    for janela in janelas:
+        media = np.full(x.shape, np.nan)
+        desvio = np.full(x.shape, np.nan)
+        if janela <= n:
+            blocos = _blocos(x, janela, 0.0)
+            referencia = np.nan_to_num(blocos[..., :1])
+            c = blocos - referencia
+            contagem = np.arange(1, janela + 1)
+            # Prefixos de cada bloco: posições [0, j]; sufixos: posições [j, janela)
+            soma_p, quad_p = np.cumsum(c, axis=-1), np.cumsum(c * c, axis=-1)
+            soma_s = np.cumsum(c[..., ::-1], axis=-1)[..., ::-1]
+            quad_s = np.cumsum((c * c)[..., ::-1], axis=-1)[..., ::-1]
+            media_p = soma_p / contagem + referencia
+            media_s = soma_s / contagem[::-1] + referencia
+            m2_p = quad_p - soma_p * soma_p / contagem
+            m2_s = quad_s - soma_s * soma_s / contagem[::-1]
+            formato = x.shape[:-1] + (-1,)
+            media_p, m2_p = media_p.reshape(formato), m2_p.reshape(formato)
+            media_s, m2_s = media_s.reshape(formato), m2_s.reshape(formato)
+
+            # Janela que começa na posição i: sufixo de i com n_s valores e prefixo de r = i % janela valores
+            inicio = np.arange(n - janela + 1)
+            n_p = inicio % janela
+            n_s = janela - n_p
+            fim_prefixo = inicio + janela - 1
+            com_prefixo = n_p > 0
+            mp = np.where(com_prefixo, media_p[..., fim_prefixo], 0.0)
+            m2p = np.where(com_prefixo, m2_p[..., fim_prefixo], 0.0)
+            ms, m2s = media_s[..., inicio], m2_s[..., inicio]
+            delta = mp - ms
+            media_janela = ms + delta * n_p / janela
+            m2 = m2s + m2p + delta * delta * n_s * n_p / janela
+
+            media[..., janela - 1:] = media_janela
+            if janela > 1:
+                desvio[..., janela - 1:] = np.sqrt(np.maximum(m2, 0.0) / (janela - 1))
+        resultado[janela] = (media, desvio)
+    return resultado
+
+
+# Função para calcular o mínimo ou o máximo móvel em O(n) por blocos (van Herk/Gil-Werman):
+# o extremo de cada janela combina o sufixo de um bloco com o prefixo do bloco seguinte
+def extremo_movel(x, janela, funcao=np.minimum):
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    saida = np.full(x.shape, np.nan)
+    if janela > n:
+        return saida
+    neutro = np.inf if funcao is np.minimum else -np.inf
+    blocos = -(-n // janela)
+    completo = np.full(x.shape[:-1] + (blocos * janela,), neutro)
+    completo[..., :n] = x
+    formato = x.shape[:-1] + (blocos, janela)
+    prefixo = funcao.accumulate(completo.reshape(formato), axis=-1).reshape(completo.shape)
+    sufixo = funcao.accumulate(completo.reshape(formato)[..., ::-1], axis=-1)[..., ::-1].reshape(completo.shape)
+    saida[..., janela - 1:] = funcao(sufixo[..., :n - janela + 1], prefixo[..., janela - 1:n])
+    return saida
+
+
+# Função para calcular a média móvel exponencial, equivalente a ewm(span, adjust=False).mean()
+def ewma(x, span):
+    from scipy.signal import lfilter
+
+    x = np.asarray(x, dtype=float)
+    if x.shape[-1] == 0:
+        return x.copy()
+    alfa = 2 / (span + 1)
+    nulos = np.isnan(x)
+    if not nulos.any():
+        inicial = (1 - alfa) * x[..., :1]
+        return lfilter([alfa], [1, alfa - 1], x, axis=-1, zi=inicial)[0]
+
+    # Com NaN, o filtro recursivo é aplicado em cada trecho sem NaN e o primeiro valor de cada trecho
+    # é combinado com o último valor anterior, com o peso reduzido pelos NaN do intervalo
+    saida = np.empty_like(x)
+    for linha in np.ndindex(x.shape[:-1]):
+        saida[linha] = _ewma_com_nulos(x[linha], nulos[linha], alfa, lfilter)
+    return saida
+
+
+def _ewma_com_nulos(x, nulos, alfa, lfilter):
+    saida = np.full(len(x), np.nan)
+    validos = np.flatnonzero(~nulos)
+    if not len(validos):
+        return saida
+    # Trechos contíguos de valores válidos: [inicio, fim)
+    quebras = np.flatnonzero(np.diff(validos) > 1) + 1
+    inicios = validos[np.r_[0, quebras]]
+    fins = validos[np.r_[quebras - 1, len(validos) - 1]] + 1
+    anterior = np.nan
+    for inicio, fim in zip(inicios, fins):
+        if np.isnan(anterior):
+            primeiro = x[inicio]
+        else:
+            # Peso do histórico depois de (inicio - fim_anterior) NaN e do novo valor, como no pandas
+            peso = (1 - alfa) ** (inicio - fim_anterior + 1)
+            primeiro = (peso * anterior + alfa * x[inicio]) / (peso + alfa)
+            saida[fim_anterior:inicio] = anterior
+        saida[inicio] = primeiro
+        if fim - inicio > 1:
+            saida[inicio + 1:fim] = lfilter([alfa], [1, alfa - 1], x[inicio + 1:fim],
+                                            zi=[(1 - alfa) * primeiro])[0]
+        anterior, fim_anterior = saida[fim - 1], fim
+    saida[fim_anterior:] = anterior
+    return saida
+
+
+# Função que calcula, em uma passada por tipo de estatística, todas as janelas e spans pedidos
+def estatisticas_moveis(x, janelas=(12,), spans=()):
+    x = np.asarray(x, dtype=float)
+    resultado = {}
+    for janela, (media, desvio) in media_desvio_moveis(x, janelas).items():
+        resultado[f'media_{janela}'] = media
+        resultado[f'desvio_{janela}'] = desvio
+        resultado[f'min_{janela}'] = extremo_movel(x, janela, np.minimum)
+        resultado[f'max_{janela}'] = extremo_movel(x, janela, np.maximum)
+    for span in spans:
+        resultado[f'ewma_{span}'] = ewma(x, span)
+    return resultado
+
+
+class _Janela:
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self.valores = deque()
+        # Média e soma dos quadrados dos desvios dos valores válidos da janela (os NaN ficam de fora)
+        self.validos = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        # Filas monotônicas de (posição, valor) dos valores válidos: o primeiro elemento é sempre o extremo
+        self.minimos = deque()
+        self.maximos = deque()
+
+    # Welford: inclusão e remoção de um valor válido
+    def _incluir(self, valor):
+        self.validos += 1
+        delta = valor - self.media
+        self.media += delta / self.validos
+        self.m2 += delta * (valor - self.media)
+
+    def _retirar(self, valor):
+        self.validos -= 1
+        if self.validos == 0:
+            self.media, self.m2 = 0.0, 0.0
+            return
+        delta = valor - self.media
+        self.media -= delta / self.validos
+        self.m2 -= delta * (valor - self.media)
+
+    def adicionar(self, posicao, valor):
+        self.valores.append(valor)
+        if len(self.valores) > self.tamanho:
+            antigo = self.valores.popleft()
+            if antigo == antigo:
+                self._retirar(antigo)
+        limite = posicao - self.tamanho
+        while self.minimos and self.minimos[0][0] <= limite:
+            self.minimos.popleft()
+        while self.maximos and self.maximos[0][0] <= limite:
+            self.maximos.popleft()
+        if valor != valor:
+            return
+        self._incluir(valor)
+
+        while self.minimos and self.minimos[-1][1] >= valor:
+            self.minimos.pop()
+        self.minimos.append((posicao, valor))
+        while self.maximos and self.maximos[-1][1] <= valor:
+            self.maximos.pop()
+        self.maximos.append((posicao, valor))
+
+    def estatisticas(self):
+        if self.validos < self.tamanho:
+            return np.nan, np.nan, np.nan, np.nan
+        desvio = np.sqrt(max(self.m2, 0.0) / (self.tamanho - 1)) if self.tamanho > 1 else np.nan
+        return self.media, desvio, self.minimos[0][1], self.maximos[0][1]
+
+
+# Estatísticas móveis atualizadas a cada nova observação, em tempo constante por janela
+class EstatisticasMoveis:
+
+    def __init__(self, janelas=(12,), spans=()):
+        self.janelas = [_Janela(janela) for janela in janelas]
+        self.spans = list(spans)
+        self.ewma = [np.nan] * len(self.spans)
+        # Peso do histórico na média exponencial: 1 após cada valor válido, reduzido a cada NaN
+        self.pesos = [1.0] * len(self.spans)
+        self.n = 0
+
+    # Função para iniciar o estado a partir do histórico, processando apenas o trecho que as janelas enxergam
+    @classmethod
+    def a_partir_de(cls, x, janelas=(12,), spans=()):
+        x = np.asarray(x, dtype=float)
+        estado = cls(janelas, spans)
+        inicio = max(0, len(x) - max(janelas, default=0))
+        estado.n = inicio
+        for valor in x[inicio:]:
+            estado._adicionar(valor, atualizar_ewma=False)
+        if len(x):
+            estado.ewma = [ewma(x, span)[-1] for span in estado.spans]
+            validos = np.flatnonzero(~np.isnan(x))
+            nulos_finais = len(x) - 1 - validos[-1] if len(validos) else 0
+            estado.pesos = [(1 - 2 / (span + 1)) ** nulos_finais for span in estado.spans]
+        return estado
+
+    def _adicionar(self, valor, atualizar_ewma=True):
+        valor = float(valor)
+        for janela in self.janelas:
+            janela.adicionar(self.n, valor)
+        if atualizar_ewma:
+            for i, span in enumerate(self.spans):
+                self._atualizar_ewma(i, 2 / (span + 1), valor)
+        self.n += 1
+
+    # Mesma recursão do ewm(adjust=False) do pandas: um NaN mantém a média e reduz o peso do histórico
+    def _atualizar_ewma(self, i, alfa, valor):
+        if self.ewma[i] != self.ewma[i]:
+            if valor == valor:
+                self.ewma[i], self.pesos[i] = valor, 1.0
+            return
+        self.pesos[i] *= 1 - alfa
+        if valor == valor:
+            self.ewma[i] = (self.pesos[i] * self.ewma[i] + alfa * valor) / (self.pesos[i] + alfa)
+            self.pesos[i] = 1.0
+
+    # Função para incorporar uma nova observação e devolver os indicadores atualizados
+    def update(self, valor):
+        self._adicionar(valor)
+        return self.valores()
+
+    # Função para consultar os indicadores atuais
+    def valores(self):
+        resultado = {}
+        for janela in self.janelas:
+            media, desvio, minimo, maximo = janela.estatisticas()
+            resultado.update({f'media_{janela.tamanho}': media, f'desvio_{janela.tamanho}': desvio,
+                              f'min_{janela.tamanho}': minimo, f'max_{janela.tamanho}': maximo})
+        for span, valor in zip(self.spans, self.ewma):
+            resultado[f'ewma_{span}'] = valor
+        return resultado
@@ -0,0 +1,147 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+
+
+# Erro percentual absoluto ponderado
+def calc_wmape(y_true, y_pred):
+    return np.abs(y_true - y_pred).sum() / np.abs(y_true).sum()
+
+
+# Erro absoluto médio
+def calc_mae(y_true, y_pred):
+    return np.abs(y_true - y_pred).sum() / len(y_true)
+
+
+# Raiz do erro quadrático médio
+def calc_rmse(y_true, y_pred):
+    return np.sqrt(np.mean((y_true - y_pred) ** 2))
+
+
+# Função para calcular as três métricas reportadas na aba ARIMA para uma única previsão
+def calc_metricas(y_true, y_pred):
+    metricas = avaliar_lote(y_true, y_pred).iloc[0]
+    return {nome: float(metricas[nome]) for nome in ('WMAPE', 'RMSE', 'MAE')}
+
+
+# Métricas de avaliação em lote, calculadas a partir de somas acumuladas.
+#
+# As previsões chegam como um array (m, n): m linhas (modelos, horizontes ou origens) contra os
+# valores reais (n,) ou (m, n). Em uma única passada são obtidas as somas necessárias para WMAPE,
+# RMSE, MAE, MASE e acurácia de direção, no total e por período (mês, ano, ...). Como as métricas
+# dependem apenas dessas somas, o AcumuladorMetricas recebe os dados em blocos, para backtests que
+# não cabem na memória, e chega ao mesmo resultado do cálculo com tudo de uma vez.
+
+ESTATISTICAS = ('n', 'erro_abs', 'erro_quad', 'real_abs', 'n_direcao', 'acertos_direcao')
+METRICAS = ('WMAPE', 'RMSE', 'MAE', 'MASE', 'acuracia_direcao', 'n')
+
+
+# Função para calcular a escala do MASE: erro médio do Naive (sazonal) dentro do treino, por linha
+def escala_mase(treino, sazonalidade=1):
+    treino = np.asarray(treino, dtype=float)
+    diferencas = np.abs(treino[..., sazonalidade:] - treino[..., :-sazonalidade])
+    return np.nanmean(diferencas, axis=-1)
+
+
+# Função para obter as métricas a partir das somas (estatísticas no primeiro eixo)
+def metricas_das_somas(somas, escala=None):
+    n, erro_abs, erro_quad, real_abs, n_direcao, acertos = somas
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mae = erro_abs / n
+        escala = np.nan if escala is None else np.reshape(escala, np.shape(escala) + (1,) * (mae.ndim - np.ndim(escala)))
+        return {
+            'WMAPE': erro_abs / real_abs,
+            'RMSE': np.sqrt(erro_quad / n),
+            'MAE': mae,
+            'MASE': mae / escala,
+            'acuracia_direcao': acertos / n_direcao,
+            'n': n.astype(int),
+        }
+
+
+class AcumuladorMetricas:
+
+    def __init__(self, nomes=None, escala=None):
+        self.nomes = None if nomes is None else list(nomes)
+        self.escala = escala
+        # Somas no formato (estatísticas, linhas, períodos)
+        self.somas = None
+        self.periodos = []
+        self._indice = {}
+        self._ultimo_real = None
+
+    # Função para acrescentar um bloco de previsões. `anterior` é o último valor conhecido no momento
+    # de cada previsão (referência da direção); por padrão é o valor real do período anterior.
+    def update(self, y_true, y_pred, anterior=None, periodos=None):
+        y_pred = np.atleast_2d(np.asarray(y_pred, dtype=float))
+        y_true = np.broadcast_to(np.asarray(y_true, dtype=float), y_pred.shape)
+        if anterior is None:
+            anterior = self._anteriores(y_true)
+        anterior = np.broadcast_to(np.asarray(anterior, dtype=float), y_pred.shape)
+
+        # Passada única sobre o bloco: todas as estatísticas de uma vez
+        erro = y_pred - y_true
+        validos = ~np.isnan(erro)
+        erro_abs = np.where(validos, np.abs(erro), 0.0)
+        direcao = validos & ~np.isnan(anterior)
+        acertos = direcao & (np.sign(y_true - anterior) == np.sign(y_pred - anterior))
+        estatisticas = np.stack([validos, erro_abs, erro_abs ** 2, np.where(validos, np.abs(y_true), 0.0),
+                                 direcao, acertos]).astype(float)
+
+        codigos = self._codigos(periodos, y_pred.shape[-1])
+        k = len(self.periodos)
+        if self.somas is None:
+            self.somas = np.zeros((len(ESTATISTICAS), y_pred.shape[0], k))
+        elif self.somas.shape[2] < k:
+            self.somas = np.pad(self.somas, ((0, 0), (0, 0), (0, k - self.somas.shape[2])))
+
+        # Soma por (estatística, linha, período) com um único bincount
+        q, m, n = estatisticas.shape
+        posicao = (np.arange(q * m)[:, None] * k + codigos).ravel()
+        self.somas += np.bincount(posicao, weights=estatisticas.ravel(), minlength=q * m * k).reshape(q, m, k)
+        return self
+
+    def _anteriores(self, y_true):
+        anterior = np.empty_like(y_true)
+        ultimo = self._ultimo_real
+        anterior[:, 0] = np.nan if ultimo is None or len(ultimo) != len(y_true) else ultimo
+        anterior[:, 1:] = y_true[:, :-1]
+        self._ultimo_real = y_true[:, -1].copy()
+        return anterior
+
+    def _codigos(self, periodos, n):
+        if periodos is None:
+            periodos = np.zeros(n, dtype=int) if not self.periodos else np.full(n, self.periodos[0])
+        unicos, inversos = np.unique(np.asarray(periodos), return_inverse=True)
+        for periodo in unicos.tolist():
+            if periodo not in self._indice:
+                self._indice[periodo] = len(self.periodos)
+                self.periodos.append(periodo)
+        return np.array([self._indice[p] for p in unicos.tolist()], dtype=np.int64)[inversos]
+
+    def _indice_linhas(self):
+        return pd.Index(self.nomes if self.nomes is not None else range(self.somas.shape[1]), name='modelo')
+
+    # Métricas gerais, uma linha por modelo
+    def resultado(self):
+        metricas = metricas_das_somas(self.somas.sum(axis=2), self.escala)
+        return pd.DataFrame(metricas, index=self._indice_linhas())[list(METRICAS)]
+
+    # Métricas por período, com índice (modelo, período)
+    def resultado_por_periodo(self):
+        metricas = metricas_das_somas(self.somas, self.escala)
+        indice = pd.MultiIndex.from_product([self._indice_linhas(), self.periodos], names=['modelo', 'periodo'])
+        df = pd.DataFrame({nome: valores.ravel() for nome, valores in metricas.items()}, index=indice)
+        return df[list(METRICAS)].sort_index()
+
+
+# Função para avaliar de uma vez as previsões (m, n) de vários modelos.
+# Com `treino` é calculada a escala do MASE; com `periodos` (um rótulo por coluna) também são
+# devolvidas as métricas por período.
+def avaliar_lote(y_true, y_pred, nomes=None, treino=None, sazonalidade=1, anterior=None, periodos=None):
+    escala = None if treino is None else escala_mase(treino, sazonalidade)
+    acumulador = AcumuladorMetricas(nomes, escala).update(y_true, y_pred, anterior, periodos)
+    if periodos is None:
+        return acumulador.resultado()
+    return acumulador.resultado(), acumulador.resultado_por_periodo()
@@ -0,0 +1,116 @@
+# Libs
+
+import numpy as np
+
+
+# Modelos Naive da aba ARIMA (Naive, SeasonalNaive, WindowAverage e SeasonalWindowAverage)
+# calculados diretamente em NumPy.
+#
+# Todas as funções aceitam uma série (n,) ou um lote de séries (m, n) e devolvem as previsões
+# de todos os horizontes de uma vez, no formato (h,) ou (m, h). As versões `*_origens` calculam
+# as previsões de várias origens em uma única operação, no formato (..., n_origens, h).
+
+
+def _como_lote(y):
+    y = np.asarray(y, dtype=float)
+    if y.ndim not in (1, 2):
+        raise ValueError('A série deve ter uma ou duas dimensões (n,) ou (m, n)')
+    return y
+
+
+def _validar_origens(y, origens, minimo):
+    origens = np.asarray(origens, dtype=np.intp).ravel()
+    if origens.size and (origens.min() < minimo or origens.max() > y.shape[-1]):
+        raise ValueError(f'As origens devem estar entre {minimo} e {y.shape[-1]}')
+    return origens
+
+
+# Repete o último valor observado
+def naive(y, h):
+    return naive_origens(y, [_como_lote(y).shape[-1]], h)[..., 0, :]
+
+
+# Repete o último ciclo sazonal observado
+def seasonal_naive(y, h, season_length=7):
+    return seasonal_naive_origens(y, [_como_lote(y).shape[-1]], h, season_length)[..., 0, :]
+
+
+# Repete a média das últimas `window_size` observações
+def window_average(y, h, window_size=7):
+    return window_average_origens(y, [_como_lote(y).shape[-1]], h, window_size)[..., 0, :]
+
+
+# Repete, para cada posição do ciclo, a média dos últimos `window_size` ciclos
+def seasonal_window_average(y, h, season_length=7, window_size=3):
+    n = _como_lote(y).shape[-1]
+    return seasonal_window_average_origens(y, [n], h, season_length, window_size)[..., 0, :]
+
+
+# Previsões das origens: a origem o usa as observações y[..., :o] e prevê y[..., o:o + h]
+def naive_origens(y, origens, h):
+    y = _como_lote(y)
+    origens = _validar_origens(y, origens, 1)
+    ultimo = y[..., origens - 1]
+    return np.broadcast_to(ultimo[..., None], ultimo.shape + (h,)).copy()
+
+
+def seasonal_naive_origens(y, origens, h, season_length=7):
+    y = _como_lote(y)
+    origens = _validar_origens(y, origens, season_length)
+    posicao = np.arange(h) % season_length
+    indices = origens[:, None] - season_length + posicao[None, :]
+    return y[..., indices]
+
+
+def window_average_origens(y, origens, h, window_size=7):
+    y = _como_lote(y)
+    origens = _validar_origens(y, origens, window_size)
+    # Soma acumulada com zero inicial: a média da janela vem de uma única subtração por origem
+    acumulada = np.concatenate([np.zeros(y.shape[:-1] + (1,)), np.cumsum(y, axis=-1)], axis=-1)
+    media = (acumulada[..., origens] - acumulada[..., origens - window_size]) / window_size
+    return np.broadcast_to(media[..., None], media.shape + (h,)).copy()
+
+
+def seasonal_window_average_origens(y, origens, h, season_length=7, window_size=3):
+    y = _como_lote(y)
+    origens = _validar_origens(y, origens, season_length * window_size)
+    # Índices (origens, ciclos, posição no ciclo) dos últimos window_size ciclos de cada origem
+    ciclos = np.arange(window_size, 0, -1) * season_length
+    indices = origens[:, None, None] - ciclos[None, :, None] + np.arange(season_length)[None, None, :]
+    medias = y[..., indices].mean(axis=-2)
+    return medias[..., np.arange(h) % season_length]
+
+
+# Função para gerar as previsões dos quatro modelos com os parâmetros utilizados no notebook
+def prever_naive(y, h, season_length=7, window_size=3, window_size_average=7):
+    return {
+        'Naive': naive(y, h),
+        'SeasonalNaive': seasonal_naive(y, h, season_length),
+        'WindowAverage': window_average(y, h, window_size_average),
+        'SeasWA': seasonal_window_average(y, h, season_length, window_size),
+    }
+
+
+if __name__ == '__main__':
+    import time
+
+    from pipeline.dados import carregar_serie_arima, separar_treino_teste
+    from pipeline.metricas import avaliar_lote
+
+    treino, teste = separar_treino_teste(carregar_serie_arima())
+    h = len(teste)
+
+    inicio = time.perf_counter()
+    previsoes = prever_naive(treino.y.values, h)
+    duracao = time.perf_counter() - inicio
+
+    # Métricas dos quatro modelos em uma única passada
+    metricas = avaliar_lote(teste.y.values, np.stack(list(previsoes.values())), nomes=list(previsoes),
+                            treino=treino.y.values)
+    for model_, linha in metricas.iterrows():
+        print(f'{model_} WMAPE: {linha["WMAPE"]:.2%}')
+        print(f'{model_} Test RMSE: %.2f' % linha['RMSE'])
+        print(f'{model_} MAE: %.2f' % linha['MAE'])
+        print(f'{model_} MASE: %.2f' % linha['MASE'])
+        print('\n')
+    print(f'Tempo: {duracao * 1000:.2f}ms (h = {h})')
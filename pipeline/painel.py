@@ -0,0 +1,256 @@
+# Libs
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pipeline.metricas import avaliar_lote
+
+
+# Modelos Naive, ARIMA e XGB rodando sobre várias séries (tickers) de uma vez.
+#
+# As séries ficam empilhadas em um único array (m tickers, n dias) alinhado a um calendário diário
+# comum, com o último valor observado repetido nos dias sem pregão (como em serie_diaria) e NaN
+# antes do início de cada série. Os modelos Naive são vetorizados sobre o lote inteiro; ARIMA e XGB
+# rodam por ticker em um pool de processos que lê o painel de um bloco de memória compartilhada.
+# As métricas são calculadas por ticker e agregadas sobre todas as previsões com o avaliar_lote.
+
+
+class PainelSeries:
+
+    def __init__(self, tickers, datas, valores):
+        self.tickers = list(tickers)
+        self.indice = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.datas = np.asarray(datas, dtype='datetime64[D]')
+        self.valores = np.ascontiguousarray(valores, dtype=float)
+        self.valores.flags.writeable = False
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __getitem__(self, ticker):
+        return self.valores[self.indice[ticker]]
+
+    # Função para montar o painel a partir de um DataFrame no formato longo (ticker, data, valor)
+    @classmethod
+    def de_frame(cls, df, coluna_ticker='ticker', coluna_data='Data', coluna_valor='Último'):
+        codigos, tickers = pd.factorize(df[coluna_ticker], sort=True)
+        datas = np.asarray(df[coluna_data], dtype='datetime64[D]')
+        return cls._alinhar(tickers, codigos, datas, np.asarray(df[coluna_valor], dtype=float))
+
+    # Função para montar o painel a partir de um dicionário ticker -> pd.Series indexada por data
+    @classmethod
+    def de_series(cls, series):
+        tickers = list(series)
+        codigos = np.concatenate([np.full(len(s), i) for i, s in enumerate(series.values())])
+        datas = np.concatenate([np.asarray(s.index, dtype='datetime64[D]') for s in series.values()])
+        valores = np.concatenate([np.asarray(s, dtype=float) for s in series.values()])
+        return cls._alinhar(tickers, codigos, datas, valores)
+
+    @classmethod
+    def _alinhar(cls, tickers, codigos, datas, valores):
+        # Calendário diário comum e posição de cada observação na grade (ticker, dia)
+        calendario = np.arange(datas.min(), datas.max() + 1)
+        colunas = (datas - calendario[0]).astype(np.int64)
+        grade = np.full((len(tickers), len(calendario)), np.nan)
+        grade[codigos, colunas] = valores
+
+        # Preenchimento para frente de todas as séries de uma vez: índice da última observação de cada célula
+        posicoes = np.where(np.isnan(grade), 0, np.arange(len(calendario)))
+        np.maximum.accumulate(posicoes, axis=1, out=posicoes)
+        preenchida = grade[np.arange(len(tickers))[:, None], posicoes]
+        # Antes da primeira observação de cada ticker o valor continua ausente
+        return cls(tickers, calendario, preenchida)
+
+    # Função para separar treino e teste pela data de corte
+    def separar(self, data_corte):
+        corte = int(np.searchsorted(self.datas, np.datetime64(data_corte, 'D')))
+        return self.valores[:, :corte], self.valores[:, corte:]
+
+
+# Função para gerar um painel sintético com m tickers, a partir de retornos reamostrados de uma série real.
+# Cada ticker começa em uma data diferente para simular inícios de negociação distintos.
+def painel_sintetico(m, serie, semente=0, inicio_maximo=0.3):
+    gerador = np.random.default_rng(semente)
+    serie = serie.dropna()
+    retornos = np.diff(np.log(serie.to_numpy()))
+    n = len(serie)
+    sorteados = gerador.choice(retornos, size=(m, n - 1)) * gerador.uniform(0.5, 2.0, size=(m, 1))
+    niveis = gerador.uniform(10, 200, size=(m, 1))
+    valores = niveis * np.exp(np.concatenate([np.zeros((m, 1)), np.cumsum(sorteados, axis=1)], axis=1))
+    inicios = gerador.integers(0, int(inicio_maximo * n) + 1, size=m)
+    valores[np.arange(n)[None, :] < inicios[:, None]] = np.nan
+    return PainelSeries([f'T{i:04d}' for i in range(m)], serie.index.to_numpy(), valores)
+
+
+# Modelos Naive vetorizados sobre o painel: usam apenas o fim do treino, onde todas as séries têm dados
+def _naive_lote(treino, h):
+    from pipeline.naive import prever_naive
+
+    return prever_naive(treino[:, -21:], h)
+
+
+# Modelos rodados por ticker: cada função recebe o treino (sem os NaN iniciais) e o teste
+def _arima_dinamico(treino, teste, order=(5, 1, 0), reajuste=None):
+    from pipeline.arima import arima_dinamico
+
+    return arima_dinamico(treino, teste, order=order, reajuste=reajuste)
+
+
+def _xgb_defasagens(treino, teste, defasagens=5, **parametros):
+    import xgboost as xgb
+
+    # Previsão de um passo com as defasagens observadas, como no ARIMA dinâmico, em escala de retorno
+    serie = np.concatenate([treino, teste])
+    log_serie = np.log(serie)
+    retornos = np.diff(log_serie)
+    janelas = sliding_window_view(retornos, defasagens + 1)
+    x, y = janelas[:, :-1], janelas[:, -1]
+    # A linha j prevê o retorno do dia j + defasagens + 1 da série
+    corte = len(treino) - defasagens - 1
+    modelo = xgb.XGBRegressor(**parametros)
+    modelo.fit(x[:corte], y[:corte])
+    previsto = np.asarray(modelo.predict(x[corte:]), dtype=float)
+    return np.exp(log_serie[len(treino) - 1:-1] + previsto)
+
+
+MODELOS_POR_TICKER = {
+    'arima_dinamico': _arima_dinamico,
+    'xgb': _xgb_defasagens,
+}
+
+NOMES_NAIVE = ('Naive', 'SeasonalNaive', 'WindowAverage', 'SeasWA')
+
+
+# Variáveis do processo de trabalho, preenchidas pelo inicializador do pool
+_painel_worker = None
+_shm_worker = None
+
+
+def _iniciar_worker(nome, formato):
+    global _painel_worker, _shm_worker
+    warnings.filterwarnings('ignore')
+    _shm_worker = shared_memory.SharedMemory(name=nome)
+    _painel_worker = np.ndarray(formato, dtype=np.float64, buffer=_shm_worker.buf)
+    _painel_worker.flags.writeable = False
+
+
+def _executar_ticker(valores, i, corte, modelo, parametros):
+    linha = valores[i]
+    treino, teste = linha[:corte], linha[corte:]
+    treino = treino[np.argmax(~np.isnan(treino)):]
+    try:
+        return i, modelo, np.asarray(MODELOS_POR_TICKER[modelo](treino, teste, **parametros), dtype=float), 'ok'
+    except Exception as erro:
+        # Qualquer falha do modelo (statsmodels, xgboost...) fica registrada no ticker, que recebe previsões
+        # ausentes (linha NaN nas métricas), em vez de interromper o painel inteiro
+        return i, modelo, np.full(len(teste), np.nan), f'erro: {type(erro).__name__}: {erro}'
+
+
+def _tarefa_worker(i, corte, modelo, parametros):
+    return _executar_ticker(_painel_worker, i, corte, modelo, parametros)
+
+
+# Função principal: roda os modelos pedidos em todos os tickers e devolve as métricas por ticker e agregadas.
+# Tickers com menos de `minimo` observações no treino são ignorados.
+def avaliar_painel(painel, data_corte, modelos=NOMES_NAIVE + tuple(MODELOS_POR_TICKER), parametros=None,
+                   minimo=60, n_jobs=None):
+    parametros = parametros or {}
+    treino, teste = painel.separar(data_corte)
+    corte = treino.shape[1]
+    selecionados = np.flatnonzero((~np.isnan(treino)).sum(axis=1) >= minimo)
+    previsoes, status = {}, {}
+
+    naive = [m for m in modelos if m in NOMES_NAIVE]
+    if naive:
+        lote = _naive_lote(treino[selecionados], teste.shape[1])
+        previsoes.update({m: lote[m] for m in naive})
+
+    por_ticker = [m for m in modelos if m in MODELOS_POR_TICKER]
+    tarefas = [(int(i), corte, m, parametros.get(m, {})) for m in por_ticker for i in selecionados]
+    if tarefas:
+        n_jobs = n_jobs or os.cpu_count() or 1
+        if n_jobs == 1:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                resultados = [_executar_ticker(painel.valores, *t) for t in tarefas]
+        else:
+            resultados = _executar_em_paralelo(painel.valores, tarefas, n_jobs)
+        posicao = {int(i): j for j, i in enumerate(selecionados)}
+        for m in por_ticker:
+            previsoes[m] = np.full((len(selecionados), teste.shape[1]), np.nan)
+        for i, m, valores, situacao in resultados:
+            previsoes[m][posicao[i]] = valores
+            status[m, painel.tickers[i]] = situacao
+
+    return _consolidar(painel, selecionados, teste[selecionados], previsoes, status)
+
+
+def _executar_em_paralelo(valores, tarefas, n_jobs):
+    shm = shared_memory.SharedMemory(create=True, size=valores.nbytes)
+    try:
+        compartilhado = np.ndarray(valores.shape, dtype=np.float64, buffer=shm.buf)
+        compartilhado[:] = valores
+        del compartilhado
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_iniciar_worker,
+                                 initargs=(shm.name, valores.shape)) as pool:
+            # Tarefas agrupadas para reduzir a comunicação entre processos
+            resultados = list(pool.map(_tarefa_worker_tupla, tarefas, chunksize=max(1, len(tarefas) // (4 * n_jobs))))
+    finally:
+        shm.close()
+        shm.unlink()
+    return resultados
+
+
+def _tarefa_worker_tupla(tarefa):
+    return _tarefa_worker(*tarefa)
+
+
+# Função para calcular as métricas de todos os modelos em uma única passada: as previsões de cada
+# modelo são achatadas em uma linha e cada ticker é um período, de modo que o resultado geral é o
+# agregado sobre todas as previsões e o resultado por período traz as métricas de cada ticker
+def _consolidar(painel, selecionados, teste, previsoes, status):
+    tickers = np.asarray(painel.tickers, dtype=object)[selecionados]
+    n = teste.shape[1]
+    # Direção medida contra o dia anterior do próprio ticker, sem atravessar a fronteira entre séries
+    anterior = np.concatenate([np.full((len(tickers), 1), np.nan), teste[:, :-1]], axis=1)
+    agregado, por_ticker = avaliar_lote(teste.ravel(), np.stack([v.ravel() for v in previsoes.values()]),
+                                        nomes=list(previsoes), anterior=anterior.ravel(),
+                                        periodos=np.repeat(tickers, n))
+    # Sem treino não há escala para o MASE
+    agregado, por_ticker = agregado.drop(columns='MASE'), por_ticker.drop(columns='MASE')
+    por_ticker = por_ticker.rename_axis(['modelo', 'ticker']).reset_index()
+    por_ticker['status'] = [status.get(chave, 'ok') for chave in zip(por_ticker['modelo'], por_ticker['ticker'])]
+    agregado.insert(0, 'tickers', por_ticker[por_ticker['n'] > 0].groupby('modelo').size()
+                    .reindex(agregado.index, fill_value=0))
+    agregado['falhas'] = (por_ticker['status'] != 'ok').groupby(por_ticker['modelo']).sum().reindex(agregado.index)
+    colunas = ['ticker', 'modelo'] + [c for c in por_ticker.columns if c not in ('ticker', 'modelo')]
+    return por_ticker[colunas], agregado.reset_index()
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from pipeline.dados import DATA_CORTE, carregar_serie_arima
+
+    parser = argparse.ArgumentParser(description='Modelos Naive, ARIMA e XGB sobre um painel de tickers')
+    parser.add_argument('--tickers', type=int, default=20, help='número de tickers sintéticos')
+    parser.add_argument('--modelos', nargs='+', default=list(NOMES_NAIVE + tuple(MODELOS_POR_TICKER)))
+    parser.add_argument('--corte', default=DATA_CORTE)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    painel = painel_sintetico(args.tickers, carregar_serie_arima()['y'])
+    t0 = time.perf_counter()
+    por_ticker, agregado = avaliar_painel(painel, args.corte, modelos=args.modelos, n_jobs=args.n_jobs)
+    duracao = time.perf_counter() - t0
+
+    print(por_ticker.groupby('modelo')[['WMAPE', 'RMSE', 'MAE']].median().to_string())
+    print(agregado.to_string(index=False))
+    print(f'Tempo: {duracao:.2f}s ({len(painel)} tickers, {painel.valores.shape[1]} dias)')
@@ -0,0 +1,143 @@
+# Libs
+
+import threading
+
+import numpy as np
+
+from pipeline.cache import CacheLimitado, memoizar
+from pipeline.dados import versao_dados
+
+
+# Modelos ajustados para o serviço de previsão (servico.py).
+#
+# Cada modelo é identificado por uma versão formada pelo nome, pela configuração e pelo hash dos
+# dados de treino (armazenamento canônico). O modelo é ajustado uma única vez por versão e guardado em um
+# cache LRU: quando os dados mudam, a primeira consulta depois de VALIDADE_VERSAO segundos ajusta a nova
+# versão e a antiga acaba removida do cache.
+# No ajuste, as previsões de todos os horizontes até o máximo já são calculadas, de modo que cada
+# consulta apenas recorta os primeiros h valores.
+# Os dois modelos respondem na mesma unidade e no mesmo calendário: fechamento em pontos, um valor por
+# dia útil (segunda a sexta) a partir do último pregão dos dados.
+
+UNIDADE = 'pontos'
+CALENDARIO = 'dias úteis'
+
+HORIZONTE_ARIMA = 30
+HORIZONTE_XGB = 5
+
+# Segundos em que a versão dos dados é reaproveitada entre os lotes de consultas: uma atualização dos
+# dados passa a ser atendida por um modelo novo em até esse intervalo
+VALIDADE_VERSAO = 1.0
+
+
+class ModeloArima:
+
+    nome = 'arima'
+    horizonte = HORIZONTE_ARIMA
+    configuracao = 'order=5,1,0'
+
+    def __init__(self, versao):
+        from pipeline.arima import ARIMADinamico
+        from pipeline.dados import carregar_serie_arima
+
+        serie = carregar_serie_arima()['y']
+        self.versao = versao
+        self.modelo = ARIMADinamico(order=(5, 1, 0)).fit(serie.to_numpy())
+        self.origem = serie.index[-1].date()
+        # A série do ARIMA é diária (dias sem pregão preenchidos), em milhares de pontos: a previsão vai até o
+        # h-ésimo dia útil e são mantidos apenas os passos que caem em dias úteis, convertidos para pontos
+        inicio = np.datetime64(self.origem, 'D')
+        self.datas = np.busday_offset(inicio, np.arange(1, self.horizonte + 1), roll='forward')
+        passos = (self.datas - inicio).astype(np.int64)
+        self.valores = self.modelo.forecast_passos(int(passos[-1]))[passos - 1] * 1000
+
+
+class ModeloXgb:
+
+    nome = 'xgb'
+    horizonte = HORIZONTE_XGB
+    configuracao = 'defasagens=5'
+
+    def __init__(self, versao):
+        import xgboost as xgb
+
+        from pipeline.caracteristicas import caracteristicas_arquivo
+
+        matriz = caracteristicas_arquivo(horizonte=self.horizonte)
+        self.versao = versao
+        self.origem = matriz.datas[-1].astype(object)
+        # Características do último pregão, ponto de partida das previsões
+        ultima = matriz.matriz(remover_nulos=False)[0][-1:]
+        # Modelo direto por horizonte: o modelo h prevê o fechamento h pregões à frente
+        self.modelos = []
+        self.valores = np.empty(self.horizonte)
+        for h in range(1, self.horizonte + 1):
+            x, y, _ = matriz.matriz(h)
+            modelo = xgb.XGBRegressor()
+            modelo.fit(x, y)
+            self.modelos.append(modelo)
+            self.valores[h - 1] = float(modelo.predict(ultima)[0])
+        self.datas = np.busday_offset(np.datetime64(self.origem, 'D'), np.arange(1, self.horizonte + 1),
+                                      roll='forward')
+
+
+CONSTRUTORES = {classe.nome: classe for classe in (ModeloArima, ModeloXgb)}
+
+# Cache LRU dos modelos ajustados, indexado pela versão
+_modelos = CacheLimitado('modelos', max_itens=4)
+_travas = {}
+_trava_global = threading.Lock()
+
+
+# Versão dos dados guardada por VALIDADE_VERSAO segundos, em vez de conferir as fontes e o armazenamento
+# a cada lote de consultas
+@memoizar('versao_dados_servico', max_itens=1, ttl=VALIDADE_VERSAO)
+def _versao_dados():
+    return versao_dados()
+
+
+# Função para calcular a versão atual de um modelo a partir da configuração e do hash dos dados
+def versao_modelo(nome):
+    classe = CONSTRUTORES[nome]
+    return f'{nome}-{classe.configuracao}-{_versao_dados()[:12]}'
+
+
+# Função para obter o modelo da versão atual, ajustando-o na primeira consulta.
+# Consultas simultâneas da mesma versão esperam um único ajuste.
+def obter_modelo(nome):
+    versao = versao_modelo(nome)
+    modelo = _modelos.get(versao)
+    if modelo is not None:
+        return modelo
+    with _trava_global:
+        trava = _travas.setdefault(versao, threading.Lock())
+    try:
+        with trava:
+            modelo = _modelos.get(versao)
+            if modelo is None:
+                modelo = _modelos.set(versao, CONSTRUTORES[nome](versao))
+    finally:
+        # Depois do ajuste a versão é atendida pelo cache: a trava só existe enquanto o ajuste está em curso
+        with _trava_global:
+            if _travas.get(versao) is trava:
+                del _travas[versao]
+    return modelo
+
+
+# Função para montar a resposta da previsão de h passos
+def prever(nome, h=1):
+    if nome not in CONSTRUTORES:
+        raise KeyError(nome)
+    modelo = obter_modelo(nome)
+    if not 1 <= h <= modelo.horizonte:
+        raise ValueError(f'O horizonte do modelo {nome} deve estar entre 1 e {modelo.horizonte}')
+    return {
+        'modelo': nome,
+        'versao': modelo.versao,
+        'origem': str(modelo.origem),
+        'h': h,
+        'unidade': UNIDADE,
+        'calendario': CALENDARIO,
+        'previsoes': [{'data': str(data), 'valor': round(float(valor), 4)}
+                      for data, valor in zip(modelo.datas[:h], modelo.valores[:h])],
+    }
@@ -0,0 +1,261 @@
+# Libs
+
+import itertools
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pipeline.metricas import avaliar_lote
+
+
+# Seleção da ordem (p, d, q) do ARIMA por busca em grade.
+#
+# 1. As séries diferenciadas (uma por d) e as matrizes de defasagens usadas na triagem são calculadas
+#    uma única vez e copiadas para um bloco de memória compartilhada; os processos do pool só criam
+#    visões NumPy somente leitura sobre esse bloco.
+# 2. Triagem: cada candidato recebe um AIC aproximado pelo método de Hannan-Rissanen (dois mínimos
+#    quadrados sobre as defasagens), e os candidatos muito piores que o melhor do mesmo d são podados
+#    antes da estimação por máxima verossimilhança, que é a etapa cara.
+# 3. Os candidatos restantes são ajustados em paralelo (statsmodels, com as estimativas de Hannan-Rissanen
+#    como ponto de partida e limite de iterações). Ajustes que não convergem ou que falham são marcados
+#    no status do candidato e descartados, sem interromper a busca.
+# 4. Cada modelo ajustado é avaliado fora da amostra com a previsão dinâmica de um passo
+#    (ARIMADinamico.walk_forward com os parâmetros estimados), e a grade é ordenada pelo critério pedido.
+# Os critérios de informação só são comparáveis entre candidatos com o mesmo d.
+
+CRITERIOS = ('aic', 'bic', 'WMAPE')
+
+# Diferença máxima de AIC aproximado, em relação ao melhor candidato do mesmo d, para seguir na busca
+MARGEM_PODA = 20.0
+
+
+def _defasagens(w, ordem):
+    # Linhas t = ordem, ..., n - 1 com as colunas [w_t, w_(t-1), ..., w_(t-ordem)]
+    return sliding_window_view(w, ordem + 1)[:, ::-1]
+
+
+# Função para montar, para cada d, a série diferenciada (centralizada) e os resíduos de um AR longo,
+# que são as variáveis defasadas usadas pelo Hannan-Rissanen
+def preparar_arrays(treino, ds, ordem_longa=None):
+    treino = np.asarray(treino, dtype=float)
+    arrays = {}
+    for d in ds:
+        w = np.diff(treino, n=d)
+        m = ordem_longa or min(int(10 * np.log10(len(w))), len(w) // 4)
+        centrada = w - w.mean()
+        matriz = _defasagens(centrada, m)
+        coef, *_ = np.linalg.lstsq(matriz[:, 1:], matriz[:, 0], rcond=None)
+        residuos = np.full(len(w), np.nan)
+        residuos[m:] = matriz[:, 0] - matriz[:, 1:] @ coef
+        arrays[f'w{d}'] = w
+        arrays[f'residuos{d}'] = residuos
+    return arrays
+
+
+# Estimativas de Hannan-Rissanen de um candidato: regressão de w_t sobre p defasagens de w e
+# q defasagens dos resíduos do AR longo, nas linhas a partir de `inicio`
+def hannan_rissanen(w, residuos, p, q, inicio):
+    centrada = w - w.mean()
+    n = len(w)
+    colunas = [centrada[inicio - i:n - i] for i in range(1, p + 1)]
+    colunas += [residuos[inicio - j:n - j] for j in range(1, q + 1)]
+    alvo = centrada[inicio:]
+    if colunas:
+        x = np.column_stack(colunas)
+        coef, *_ = np.linalg.lstsq(x, alvo, rcond=None)
+        erro = alvo - x @ coef
+    else:
+        coef, erro = np.empty(0), alvo
+    return coef[:p], coef[p:], float(erro @ erro)
+
+
+def _inicio_comum(arrays, d, p_max, q_max):
+    residuos = arrays[f'residuos{d}']
+    return int(np.argmax(~np.isnan(residuos))) + max(p_max, q_max)
+
+
+# Função da triagem: AIC aproximado de todos os candidatos, na mesma amostra para cada d
+def triagem(arrays, candidatos):
+    p_max = max(p for p, _, _ in candidatos)
+    q_max = max(q for _, _, q in candidatos)
+    linhas = []
+    for p, d, q in candidatos:
+        w, residuos = arrays[f'w{d}'], arrays[f'residuos{d}']
+        inicio = _inicio_comum(arrays, d, p_max, q_max)
+        _, _, ssr = hannan_rissanen(w, residuos, p, q, inicio)
+        nobs = len(w) - inicio
+        k = p + q + 1 + (d == 0)
+        linhas.append({'p': p, 'd': d, 'q': q, 'aic_aprox': nobs * np.log(ssr / nobs) + 2 * k})
+    tabela = pd.DataFrame(linhas)
+    tabela['delta_aprox'] = tabela['aic_aprox'] - tabela.groupby('d')['aic_aprox'].transform('min')
+    return tabela
+
+
+def _parametros_iniciais(w, residuos, p, d, q):
+    # Ponto de partida do otimizador; descartado se a parte AR não for estacionária ou a MA não for inversível
+    inicio = int(np.argmax(~np.isnan(residuos))) + max(p, q)
+    ar, ma, ssr = hannan_rissanen(w, residuos, p, q, inicio)
+    for coef in (ar, ma):
+        sinal = -1 if coef is ar else 1
+        if len(coef) and np.any(np.abs(np.roots(np.r_[1, sinal * coef][::-1])) <= 1):
+            return None
+    constante = [w.mean()] if d == 0 else []
+    return np.r_[constante, ar, ma, ssr / (len(w) - inicio)]
+
+
+# Ajuste de um candidato por máxima verossimilhança e avaliação fora da amostra
+def avaliar_candidato(arrays, teste, p, d, q, maxiter=50):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    from pipeline.arima import ARIMADinamico
+
+    inicio = time.perf_counter()
+    linha = {'p': p, 'd': d, 'q': q}
+    w, residuos = arrays[f'w{d}'], arrays[f'residuos{d}']
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            # Diferenciação simples: o modelo ARMA é ajustado direto sobre a série diferenciada compartilhada
+            modelo = ARIMA(np.asarray(w), order=(p, 0, q), trend='c' if d == 0 else 'n')
+            resultado = modelo.fit(start_params=_parametros_iniciais(w, residuos, p, d, q),
+                                   method_kwargs={'maxiter': maxiter})
+        if not resultado.mle_retvals.get('converged', True):
+            linha['status'] = 'nao_convergiu'
+        else:
+            params = dict(zip(resultado.model.param_names, resultado.params))
+            treino = arrays['treino']
+            previsoes = ARIMADinamico(order=(p, d, q), params=params).fit(treino).walk_forward(teste)
+            metricas = avaliar_lote(teste, previsoes).iloc[0]
+            linha.update(aic=resultado.aic, bic=resultado.bic, WMAPE=metricas['WMAPE'], RMSE=metricas['RMSE'],
+                         MAE=metricas['MAE'], status='ok')
+    except Exception as erro:
+        # Falhas numéricas do statsmodels (LinAlgError, ValueError, IndexError, OverflowError...) ficam
+        # registradas no candidato em vez de interromper a busca
+        linha['status'] = f'erro: {type(erro).__name__}: {erro}'
+    linha['tempo'] = time.perf_counter() - inicio
+    return linha
+
+
+# Variáveis do processo de trabalho, preenchidas pelo inicializador do pool
+_arrays_worker = None
+_shm_worker = None
+
+
+def _iniciar_worker(nome, disposicao):
+    global _arrays_worker, _shm_worker
+    warnings.filterwarnings('ignore')
+    _shm_worker = shared_memory.SharedMemory(name=nome)
+    _arrays_worker = {}
+    for chave, (inicio, tamanho) in disposicao.items():
+        visao = np.ndarray((tamanho,), dtype=np.float64, buffer=_shm_worker.buf, offset=inicio * 8)
+        visao.flags.writeable = False
+        _arrays_worker[chave] = visao
+
+
+def _tarefa_worker(p, d, q, maxiter):
+    return avaliar_candidato(_arrays_worker, _arrays_worker['teste'], p, d, q, maxiter)
+
+
+def _compartilhar(arrays):
+    # Copia todos os arrays para um único bloco, registrando a posição e o tamanho de cada um
+    disposicao, posicao = {}, 0
+    for chave, valores in arrays.items():
+        disposicao[chave] = (posicao, len(valores))
+        posicao += len(valores)
+    shm = shared_memory.SharedMemory(create=True, size=max(posicao, 1) * 8)
+    bloco = np.ndarray((posicao,), dtype=np.float64, buffer=shm.buf)
+    for chave, (inicio, tamanho) in disposicao.items():
+        bloco[inicio:inicio + tamanho] = arrays[chave]
+    del bloco
+    return shm, disposicao
+
+
+# Função principal da busca em grade
+def buscar_ordem(treino, teste, ps=range(0, 6), ds=(1,), qs=range(0, 3), criterio='aic',
+                 margem=MARGEM_PODA, maxiter=50, n_jobs=None):
+    if criterio not in CRITERIOS:
+        raise ValueError(f'Critério desconhecido: {criterio}. Opções: {CRITERIOS}')
+    treino = np.ascontiguousarray(np.asarray(treino, dtype=float).ravel())
+    teste = np.ascontiguousarray(np.asarray(teste, dtype=float).ravel())
+    candidatos = list(itertools.product(ps, ds, qs))
+
+    arrays = preparar_arrays(treino, ds)
+    arrays.update(treino=treino, teste=teste)
+
+    tabela = triagem(arrays, candidatos)
+    podados = tabela['delta_aprox'] > margem
+    # Os candidatos mais promissores são ajustados primeiro
+    restantes = tabela.loc[~podados].sort_values('aic_aprox')[['p', 'd', 'q']].itertuples(index=False)
+    restantes = [tuple(int(v) for v in c) for c in restantes]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(restantes) == 1:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            resultados = [avaliar_candidato(arrays, teste, *c, maxiter) for c in restantes]
+    else:
+        resultados = _executar_em_paralelo(arrays, restantes, maxiter, n_jobs)
+
+    avaliados = pd.DataFrame(resultados, columns=['p', 'd', 'q', 'aic', 'bic', 'WMAPE', 'RMSE', 'MAE',
+                                                  'status', 'tempo'])
+    tabela = tabela.merge(avaliados, on=['p', 'd', 'q'], how='left')
+    tabela.loc[podados, 'status'] = 'podado'
+    return tabela.sort_values(['status', criterio], key=lambda c: c != 'ok' if c.name == 'status' else c,
+                              ignore_index=True)
+
+
+def _executar_em_paralelo(arrays, candidatos, maxiter, n_jobs):
+    shm, disposicao = _compartilhar(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_iniciar_worker,
+                                 initargs=(shm.name, disposicao)) as pool:
+            futuros = {pool.submit(_tarefa_worker, *c, maxiter): c for c in candidatos}
+            resultados = []
+            for futuro in as_completed(futuros):
+                try:
+                    resultados.append(futuro.result())
+                except Exception as erro:
+                    # Processo de trabalho encerrado durante o ajuste (falta de memória, falha nativa)
+                    p, d, q = futuros[futuro]
+                    resultados.append({'p': p, 'd': d, 'q': q, 'status': f'erro: {type(erro).__name__}: {erro}'})
+    finally:
+        shm.close()
+        shm.unlink()
+    return resultados
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from pipeline.dados import carregar_serie_arima, carregar_serie_modelo, separar_treino_teste
+
+    parser = argparse.ArgumentParser(description='Busca em grade da ordem (p, d, q) do ARIMA')
+    parser.add_argument('--p', type=int, nargs=2, default=(0, 5), metavar=('MIN', 'MAX'))
+    parser.add_argument('--d', type=int, nargs='+', default=[1])
+    parser.add_argument('--q', type=int, nargs=2, default=(0, 2), metavar=('MIN', 'MAX'))
+    parser.add_argument('--criterio', default='aic', choices=CRITERIOS)
+    parser.add_argument('--margem', type=float, default=MARGEM_PODA)
+    parser.add_argument('--maxiter', type=int, default=50)
+    parser.add_argument('--completa', action='store_true', help='utilizar a série de 2003 a 2023 (ibov_modelo.csv)')
+    parser.add_argument('--corte', default='2022-01-01')
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    serie = carregar_serie_modelo() if args.completa else carregar_serie_arima()
+    treino, teste = separar_treino_teste(serie, args.corte)
+
+    t0 = time.perf_counter()
+    tabela = buscar_ordem(treino.y.values, teste.y.values, ps=range(args.p[0], args.p[1] + 1), ds=args.d,
+                          qs=range(args.q[0], args.q[1] + 1), criterio=args.criterio, margem=args.margem,
+                          maxiter=args.maxiter, n_jobs=args.n_jobs)
+    duracao = time.perf_counter() - t0
+
+    pd.set_option('display.width', 200)
+    print(tabela.to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+    print(f'Tempo: {duracao:.2f}s ({len(tabela)} candidatos, {(tabela.status == "podado").sum()} podados)')
@@ -0,0 +1,83 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+
+
+# Paginação da tabela de dados exibida no aplicativo.
+#
+# Em vez de enviar o DataFrame inteiro ao navegador a cada execução, a tabela guarda as colunas
+# ordenadas pela data uma única vez e responde a pedidos de página e de período por busca binária
+# (np.searchsorted) sobre o array de datas. Apenas as linhas da página visível viram DataFrame.
+# Montada a partir da representação compacta (pipeline/compacto.py), a tabela usa os mesmos arrays,
+# já ordenados, e os formatadores geram os textos de exibição só para as linhas da página.
+
+TAMANHO_PAGINA = 50
+
+
+class TabelaPaginada:
+
+    def __init__(self, df, coluna_data='Data', colunas=None, formatadores=None):
+        datas = np.asarray(df[coluna_data]).astype('datetime64[D]')
+        ordem = np.argsort(datas, kind='stable')
+        self.coluna_data = coluna_data
+        self.colunas = [c for c in (colunas or df.columns) if c != coluna_data]
+        self.datas = datas[ordem]
+        self.valores = {c: np.asarray(df[c])[ordem] for c in self.colunas}
+        self.formatadores = formatadores or {}
+
+    # Função para montar a tabela sobre uma representação compacta, sem copiar as colunas
+    @classmethod
+    def de_compacto(cls, compacto, formatadores=None):
+        tabela = cls.__new__(cls)
+        tabela.coluna_data = 'Data'
+        tabela.colunas = list(compacto.colunas)
+        tabela.datas = compacto.datas
+        tabela.valores = dict(compacto.colunas)
+        tabela.formatadores = formatadores or {}
+        return tabela
+
+    def __len__(self):
+        return len(self.datas)
+
+    def __sizeof__(self):
+        return self.datas.nbytes + sum(v.nbytes for v in self.valores.values())
+
+    @property
+    def inicio(self):
+        return self.datas[0].astype(object)
+
+    @property
+    def fim(self):
+        return self.datas[-1].astype(object)
+
+    # Função para localizar as posições [esquerda, direita) do período pedido no array ordenado
+    def intervalo(self, inicio=None, fim=None):
+        esquerda = 0 if inicio is None else int(np.searchsorted(self.datas, np.datetime64(inicio, 'D'), side='left'))
+        direita = len(self) if fim is None else int(np.searchsorted(self.datas, np.datetime64(fim, 'D'), side='right'))
+        return esquerda, max(esquerda, direita)
+
+    # Função para contar as linhas e as páginas do período
+    def contar(self, inicio=None, fim=None, tamanho=TAMANHO_PAGINA):
+        esquerda, direita = self.intervalo(inicio, fim)
+        linhas = direita - esquerda
+        return linhas, max(1, -(-linhas // tamanho))
+
+    # Função para montar o DataFrame de uma página (numerada a partir de 1) do período.
+    # Com decrescente=True as datas mais recentes aparecem primeiro, como no CSV original.
+    def pagina(self, numero=1, tamanho=TAMANHO_PAGINA, inicio=None, fim=None, decrescente=True):
+        esquerda, direita = self.intervalo(inicio, fim)
+        deslocamento = (numero - 1) * tamanho
+        if decrescente:
+            fatia = slice(max(esquerda, direita - deslocamento - tamanho), max(esquerda, direita - deslocamento))
+            passo = -1
+        else:
+            fatia = slice(min(direita, esquerda + deslocamento), min(direita, esquerda + deslocamento + tamanho))
+            passo = 1
+
+        indice = pd.DatetimeIndex(self.datas[fatia][::passo], name=self.coluna_data)
+        colunas = {}
+        for c in self.colunas:
+            valores = self.valores[c][fatia][::passo]
+            colunas[c] = self.formatadores[c](valores) if c in self.formatadores else valores
+        return pd.DataFrame(colunas, index=indice)
@@ -0,0 +1,46 @@
+# Libs
+
+import numpy as np
+
+# Variáveis de características e target do modelo da aba XGB
+CARACTERISTICAS = ["Abertura", "Máxima", "Mínima", "Vol."]
+TARGET = 'Último'
+
+# Proporção dos dados utilizada no treino
+PROPORCAO_TREINO = .85
+
+
+# Função para separar treino e teste pela proporção utilizada no notebook (85% e 15%)
+def separar_treino_teste(df, proporcao=PROPORCAO_TREINO):
+    corte = int(proporcao * len(df))
+    return df.iloc[:corte, :], df.iloc[corte:, :]
+
+
+# Função para criar e treinar o modelo
+def treinar_xgb(treino, caracteristicas=CARACTERISTICAS, target=TARGET, **parametros):
+    import xgboost as xgb
+
+    modelo = xgb.XGBRegressor(**parametros)
+    modelo.fit(treino[caracteristicas], treino[target])
+    return modelo
+
+
+# Função que reproduz a previsão da aba XGB: treino em 85% dos dados e previsão nos 15% restantes
+def prever_xgb(df, proporcao=PROPORCAO_TREINO, caracteristicas=CARACTERISTICAS, target=TARGET):
+    treino, teste = separar_treino_teste(df, proporcao)
+    modelo = treinar_xgb(treino, caracteristicas, target)
+    previsoes = np.asarray(modelo.predict(teste[caracteristicas]), dtype=float)
+    return treino, teste, previsoes
+
+
+# Função para treinar e prever o fechamento h dias à frente com as características defasadas
+# (pipeline/caracteristicas.py), na mesma divisão temporal de 85% e 15%
+def prever_xgb_horizonte(matriz, h=1, caracteristicas=None, proporcao=PROPORCAO_TREINO, **parametros):
+    import xgboost as xgb
+
+    x, y, datas = matriz.matriz(h, caracteristicas)
+    corte = int(proporcao * len(x))
+    modelo = xgb.XGBRegressor(**parametros)
+    modelo.fit(x[:corte], y[:corte])
+    previsoes = np.asarray(modelo.predict(x[corte:]), dtype=float)
+    return datas[corte:], y[corte:], previsoes
@@ -0,0 +1,164 @@
+# Libs
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from pipeline.previsao import CONSTRUTORES, obter_modelo, prever
+
+
+# Serviço HTTP (ASGI) de previsão com os modelos ARIMA e XGB, ao lado do app.py.
+#
+# Execução:  uvicorn servico:app --port 8000
+# Rotas:
+#   GET /previsao?modelo=arima&h=5  previsões de 1 a h passos, em JSON
+#   GET /modelos                    versões carregadas e estatísticas dos caches
+#   GET /saude                      verificação simples
+#
+# Os modelos são ajustados na inicialização e guardados no cache LRU de pipeline/previsao.py, indexado
+# pela versão do modelo. As requisições de previsão entram em uma fila e são atendidas em lotes: todas
+# as que chegam enquanto o lote anterior é processado dividem uma única consulta ao modelo por versão,
+# e o JSON de cada (versão, h) é montado uma única vez e reutilizado. O h é validado antes de entrar na
+# fila, de modo que só respostas de sucesso são guardadas e o número de chaves é limitado pelos horizontes.
+# As previsões dos dois modelos são fechamentos em pontos, um por dia útil (campos unidade e calendario).
+
+MAX_LOTE = 256
+
+CABECALHOS_JSON = [(b'content-type', b'application/json')]
+
+
+# Função para enviar uma resposta completa
+async def _responder(send, status, corpo):
+    cabecalhos = CABECALHOS_JSON + [(b'content-length', str(len(corpo)).encode())]
+    await send({'type': 'http.response.start', 'status': status, 'headers': cabecalhos})
+    await send({'type': 'http.response.body', 'body': corpo})
+
+
+def _json(dados):
+    return json.dumps(dados, ensure_ascii=False).encode()
+
+
+class ServicoPrevisao:
+
+    def __init__(self, max_lote=MAX_LOTE):
+        self.max_lote = max_lote
+        self.fila = None
+        self.tarefa = None
+        # JSON já montado por (versão, h), apenas das versões atuais dos modelos
+        self.respostas = {}
+        # Versão atual de cada modelo
+        self.versoes = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        rota = scope['path']
+        if rota == '/previsao':
+            status, corpo = await self._previsao(parse_qs(scope['query_string'].decode()))
+        elif rota == '/modelos':
+            status, corpo = 200, _json(await asyncio.to_thread(self._modelos))
+        elif rota == '/saude':
+            status, corpo = 200, b'{"status": "ok"}'
+        else:
+            status, corpo = 404, _json({'erro': f'Rota não encontrada: {rota}'})
+        await _responder(send, status, corpo)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                await self.iniciar()
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                await self.encerrar()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # Função para ajustar os modelos uma única vez e iniciar o processamento da fila
+    async def iniciar(self):
+        for nome in CONSTRUTORES:
+            await asyncio.to_thread(obter_modelo, nome)
+        self.fila = asyncio.Queue()
+        self.tarefa = asyncio.create_task(self._processar_fila())
+
+    async def encerrar(self):
+        if self.tarefa is not None:
+            self.tarefa.cancel()
+
+    async def _previsao(self, parametros):
+        nome = parametros.get('modelo', ['arima'])[0]
+        if nome not in CONSTRUTORES:
+            return 400, _json({'erro': f'Modelo desconhecido: {nome}', 'modelos': list(CONSTRUTORES)})
+        try:
+            h = int(parametros.get('h', ['1'])[0])
+        except ValueError:
+            return 400, _json({'erro': 'O parâmetro h deve ser um inteiro'})
+        horizonte = CONSTRUTORES[nome].horizonte
+        if not 1 <= h <= horizonte:
+            return 400, _json({'erro': f'O horizonte do modelo {nome} deve estar entre 1 e {horizonte}'})
+
+        futuro = asyncio.get_running_loop().create_future()
+        await self.fila.put((nome, h, futuro))
+        return await futuro
+
+    # Tarefa que atende as requisições em lotes
+    async def _processar_fila(self):
+        while True:
+            lote = [await self.fila.get()]
+            while len(lote) < self.max_lote and not self.fila.empty():
+                lote.append(self.fila.get_nowait())
+            try:
+                await self._atender_lote(lote)
+            except Exception as erro:
+                for *_, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_result((500, _json({'erro': str(erro)})))
+
+    async def _atender_lote(self, lote):
+        # Uma única consulta (versão atual, ajuste se os dados mudaram) por modelo presente no lote
+        nomes = {nome for nome, _, _ in lote}
+        modelos = dict(zip(nomes, await asyncio.gather(*(asyncio.to_thread(obter_modelo, n) for n in nomes))))
+        for nome, h, futuro in lote:
+            chave = (modelos[nome].versao, h)
+            resposta = self.respostas.get(chave)
+            if resposta is None:
+                try:
+                    resposta = (200, _json(prever(nome, h)))
+                    self.respostas[chave] = resposta
+                except ValueError as erro:
+                    resposta = (400, _json({'erro': str(erro)}))
+            futuro.set_result(resposta)
+        # Quando um modelo muda de versão, as respostas da versão anterior são descartadas
+        for nome, modelo in modelos.items():
+            anterior = self.versoes.get(nome)
+            if anterior != modelo.versao:
+                self.versoes[nome] = modelo.versao
+                self.respostas = {c: r for c, r in self.respostas.items() if c[0] != anterior}
+
+    def _modelos(self):
+        from pipeline.cache import estatisticas_caches
+
+        return {
+            'modelos': {nome: {'versao': obter_modelo(nome).versao, 'horizonte': classe.horizonte}
+                        for nome, classe in CONSTRUTORES.items()},
+            'caches': estatisticas_caches().to_dict(orient='records'),
+        }
+
+
+app = ServicoPrevisao()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='Serviço HTTP de previsão com os modelos ARIMA e XGB')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning', access_log=False)
@@ -0,0 +1,40 @@
+# Libs
+
+import warnings
+
+import numpy as np
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+
+from pipeline.arima import ARIMADinamico
+
+
+def _passeio(n=400, semente=1):
+    return 1000 + np.cumsum(np.random.default_rng(semente).normal(0, 5, n))
+
+
+# Previsões de um passo com os parâmetros do treino iguais às do statsmodels (apply + predict)
+@pytest.mark.parametrize('order', [(5, 1, 0), (1, 1, 1), (2, 0, 1)])
+def test_walk_forward_igual_ao_statsmodels(order):
+    y = _passeio()
+    treino, teste = y[:300], y[300:]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        resultado = ARIMA(treino, order=order).fit()
+        esperado = resultado.apply(y).predict(start=len(treino), end=len(y) - 1)
+        modelo = ARIMADinamico(order=order).fit(treino)
+
+    assert [modelo.params[nome] for nome in resultado.model.param_names] == pytest.approx(resultado.params)
+    np.testing.assert_allclose(modelo.walk_forward(teste), esperado, rtol=1e-9)
+
+
+# Previsão de h passos a partir do fim do treino igual ao forecast do statsmodels
+@pytest.mark.parametrize('order', [(5, 1, 0), (1, 1, 1)])
+def test_forecast_passos_igual_ao_statsmodels(order):
+    treino = _passeio(300, semente=2)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        resultado = ARIMA(treino, order=order).fit()
+        modelo = ARIMADinamico(order=order, params=dict(zip(resultado.model.param_names, resultado.params)))
+        modelo.fit(treino)
+    np.testing.assert_allclose(modelo.forecast_passos(15), resultado.forecast(15), rtol=1e-9)
@@ -0,0 +1,54 @@
+# Libs
+
+import numpy as np
+import pytest
+from statsmodels.tsa.stattools import acf as acf_statsmodels
+from statsmodels.tsa.stattools import pacf as pacf_statsmodels
+
+from pipeline.autocorrelacao import acf, janelas, pacf
+
+# O acf do statsmodels avisa da mudança futura do tipo de retorno; a tupla atual é a usada aqui
+pytestmark = pytest.mark.filterwarnings('ignore::FutureWarning')
+
+
+def _serie(n=500, semente=8):
+    gerador = np.random.default_rng(semente)
+    ruido = gerador.normal(0, 1, n)
+    # AR(2) com média diferente de zero
+    y = np.empty(n)
+    y[:2] = ruido[:2]
+    for t in range(2, n):
+        y[t] = 0.6 * y[t - 1] - 0.3 * y[t - 2] + ruido[t]
+    return y + 10
+
+
+# ACF e intervalo de Bartlett iguais ao statsmodels com acf(fft=True, adjusted=False)
+def test_acf_igual_ao_statsmodels():
+    y = _serie()
+    correlacao, intervalo = acf(y, nlags=30, alfa=0.05)
+    esperado, esperado_intervalo = acf_statsmodels(y, nlags=30, alpha=0.05, fft=True, adjusted=False)
+    np.testing.assert_allclose(correlacao, esperado, atol=1e-12)
+    np.testing.assert_allclose(intervalo, esperado_intervalo, atol=1e-12)
+
+
+# PACF e intervalo iguais ao statsmodels com pacf(method='ldb')
+def test_pacf_igual_ao_statsmodels():
+    y = _serie()
+    parcial, intervalo = pacf(y, nlags=30, alfa=0.05)
+    esperado, esperado_intervalo = pacf_statsmodels(y, nlags=30, alpha=0.05, method='ldb')
+    np.testing.assert_allclose(parcial, esperado, atol=1e-12)
+    np.testing.assert_allclose(intervalo, esperado_intervalo, atol=1e-12)
+
+
+# No lote de janelas móveis, cada linha é igual à função aplicada à janela isolada
+@pytest.mark.parametrize('funcao, referencia', [
+    (acf, lambda x, nlags: acf_statsmodels(x, nlags=nlags, fft=True, adjusted=False)),
+    (pacf, lambda x, nlags: pacf_statsmodels(x, nlags=nlags, method='ldb')),
+])
+def test_lote_de_janelas(funcao, referencia):
+    y = _serie(400)
+    lote = janelas(y, 120, passo=37)
+    resultado = funcao(lote, nlags=10)
+    assert resultado.shape == (len(lote), 11)
+    for linha, janela in zip(resultado, lote):
+        np.testing.assert_allclose(linha, referencia(janela, 10), atol=1e-12)
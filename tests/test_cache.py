@@ -0,0 +1,81 @@
+# Libs
+
+import numpy as np
+
+from pipeline import cache as modulo_cache
+from pipeline.cache import CacheLimitado, memoizar
+
+
+def _array(kb):
+    return np.zeros(kb * 1024, dtype=np.uint8)
+
+
+# Acima do teto de bytes sai o item usado há mais tempo (a consulta renova o item)
+def test_remocao_por_bytes_em_ordem_lru():
+    cache = CacheLimitado('teste_bytes', max_bytes=3 * 1024)
+    for chave in 'abc':
+        cache.set(chave, _array(1))
+    assert cache.get('a') is not None
+    cache.set('d', _array(1))
+    assert 'b' not in cache and all(chave in cache for chave in 'acd')
+    assert cache.estatisticas()['bytes'] == 3 * 1024 and cache.remocoes == 1
+
+    # Um item grande remove quantos forem necessários
+    cache.set('e', _array(2))
+    assert [chave for chave in 'acde' if chave in cache] == ['d', 'e']
+
+
+# Itens maiores que o cache inteiro são devolvidos sem serem guardados
+def test_item_maior_que_o_cache():
+    cache = CacheLimitado('teste_grande', max_bytes=1024)
+    cache.set('a', _array(1))
+    valor = cache.set('b', _array(2))
+    assert len(valor) == 2048 and 'b' not in cache and 'a' in cache
+
+
+# Substituir uma chave não conta os bytes duas vezes
+def test_substituicao_atualiza_bytes():
+    cache = CacheLimitado('teste_substituicao', max_bytes=4 * 1024)
+    cache.set('a', _array(1))
+    cache.set('a', _array(3))
+    assert len(cache) == 1 and cache.estatisticas()['bytes'] == 3 * 1024
+
+
+def test_limite_de_itens():
+    cache = CacheLimitado('teste_itens', max_itens=2)
+    for chave in 'abc':
+        cache.set(chave, chave)
+    assert 'a' not in cache and len(cache) == 2
+
+
+# Itens mais velhos que o ttl expiram na consulta seguinte
+def test_expiracao_por_ttl(monkeypatch):
+    agora = [100.0]
+    monkeypatch.setattr(modulo_cache.time, 'monotonic', lambda: agora[0])
+    cache = CacheLimitado('teste_ttl', ttl=10)
+    cache.set('a', 1)
+    agora[0] += 10
+    assert cache.get('a') == 1
+    agora[0] += 0.5
+    assert cache.get('a', 'ausente') == 'ausente'
+    estatisticas = cache.estatisticas()
+    assert [estatisticas[nome] for nome in ('acertos', 'falhas', 'expirados', 'itens')] == [1, 1, 1, 0]
+
+
+# O memoizar chama a função uma vez por conteúdo dos argumentos e volta a chamá-la depois do ttl
+def test_memoizar_com_ttl(monkeypatch):
+    agora = [0.0]
+    monkeypatch.setattr(modulo_cache.time, 'monotonic', lambda: agora[0])
+    chamadas = []
+
+    @memoizar('teste_memoizar', ttl=1)
+    def dobro(valores):
+        chamadas.append(1)
+        return valores * 2
+
+    assert dobro(np.arange(3)).tolist() == [0, 2, 4]
+    dobro(np.arange(3))
+    assert len(chamadas) == 1
+    agora[0] += 2
+    dobro(np.arange(3))
+    assert len(chamadas) == 2
@@ -0,0 +1,20 @@
+# Libs
+
+import numpy as np
+import pytest
+
+from pipeline.caracteristicas import construir_caracteristicas
+from pipeline.dados import carregar_dados_modelo
+
+
+# Séries mais curtas que o período do retorno: a coluna fica ausente, com o tamanho da série
+@pytest.mark.parametrize('n', [3, 21, 22])
+def test_retornos_com_serie_curta(n):
+    df = carregar_dados_modelo().tail(n)
+    frame = construir_caracteristicas(df, retornos=(1, 5, 21)).frame()
+    fechamento = np.log(df.sort_values('Data')['Último'].to_numpy(dtype=float))
+    assert len(frame) == n
+    for k in (1, 5, 21):
+        esperado = np.full(n, np.nan)
+        esperado[k:] = fechamento[k:] - fechamento[:max(n - k, 0)]
+        np.testing.assert_allclose(frame[f'retorno_{k}'].to_numpy(), esperado, rtol=1e-6)
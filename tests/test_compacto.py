@@ -0,0 +1,26 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+
+from pipeline.compacto import FORMATADORES, OHLCVCompacto
+
+
+def _dados(variacoes):
+    return pd.DataFrame({
+        'Data': pd.date_range('2020-01-01', periods=len(variacoes)),
+        'Último': np.arange(len(variacoes)) + 100000,
+        'Var%': variacoes,
+    })
+
+
+# Var% em int16 enquanto cabe (±327,67%) e em int32 acima disso, sem perder valores nem os ausentes
+def test_variacao_usa_int32_fora_do_intervalo_do_int16():
+    compacto = OHLCVCompacto.de_frame(_dados([327.67, np.nan, -327.67]))
+    assert compacto['Var%'].dtype == np.int16
+
+    variacoes = [500.25, np.nan, -327.68]
+    compacto = OHLCVCompacto.de_frame(_dados(variacoes))
+    assert compacto['Var%'].dtype == np.int32
+    np.testing.assert_array_equal(compacto.valores('Var%'), variacoes)
+    assert FORMATADORES['Var%'](compacto['Var%']) == ['500,25%', '', '-327,68%']
@@ -0,0 +1,53 @@
+# Libs
+
+import os
+
+import numpy as np
+
+from pipeline.atualizacao import atualizar
+from pipeline.consolidacao import abrir_canonico, consolidar
+
+EXPORTACAO = 'Assets/Base/ibovespa.csv'
+
+
+# Função para gravar uma exportação com as linhas do arquivo original a partir de `inicio` (mais recentes primeiro)
+def _exportacao(destino, inicio, alterar=None):
+    with open(EXPORTACAO, 'rb') as arquivo:
+        linhas = arquivo.read().split(b'\n')
+    corpo = linhas[1 + inicio:40]
+    if alterar is not None:
+        corpo = [alterar(linha) for linha in corpo]
+    destino.write_bytes(b'\n'.join([linhas[0]] + corpo))
+    # Nova data de modificação: o hash das fontes fica em cache pela data de modificação e pelo tamanho
+    os.utime(destino, ns=(0, destino.stat().st_mtime_ns + 10**9))
+    return str(destino)
+
+
+# Quando uma fonte muda, a próxima abertura consolida de novo em vez de manter o armazenamento antigo
+def test_abrir_canonico_consolida_fonte_alterada(tmp_path):
+    fonte = _exportacao(tmp_path / 'fonte.csv', 0)
+    diretorio = str(tmp_path / 'armazem')
+    assert abrir_canonico(diretorio, [fonte]).ler()['Último'].iloc[-1] == 116552
+
+    _exportacao(tmp_path / 'fonte.csv', 0, lambda linha: linha.replace(b'"116.552"', b'"116.553"'))
+    armazem = abrir_canonico(diretorio, [fonte])
+    assert armazem.ler()['Último'].iloc[-1] == 116553
+    assert armazem.versao == 2
+
+
+# A atualização acrescenta os dias novos (inclusive sem volume) e registra o hash da fonte atualizada
+def test_atualizar_mantem_dias_sem_volume(tmp_path):
+    fonte = _exportacao(tmp_path / 'fonte.csv', 3)
+    diretorio = str(tmp_path / 'armazem')
+    consolidar([fonte], diretorio)
+
+    # Exportação mais recente, com três dias novos e o volume de 14/08/2023 ausente
+    _exportacao(tmp_path / 'fonte.csv', 0, lambda linha: linha.replace(b'"11,20M"', b'""'))
+    alteracao = atualizar(fonte, diretorio, fontes=[fonte])
+    assert alteracao['linhas'] == 3
+
+    armazem = abrir_canonico(diretorio, [fonte])
+    assert armazem.versao == alteracao['versao']
+    novas = armazem.ler(inicio='2023-08-11')
+    assert list(novas['Data'].dt.strftime('%Y-%m-%d')) == ['2023-08-11', '2023-08-14', '2023-08-15']
+    assert np.isnan(novas['Vol.'].iloc[1])
@@ -0,0 +1,68 @@
+# Libs
+
+import numpy as np
+import pytest
+
+from pipeline import downsampling
+from pipeline.downsampling import lttb, minmax
+
+
+# LTTB de referência (Steinarsson, 2013), ponto a ponto em Python puro
+def _lttb_referencia(x, y, n_saida):
+    n = len(x)
+    passo = (n - 2) / (n_saida - 2)
+    escolhidos = [0]
+    a = 0
+    for i in range(n_saida - 2):
+        inicio, fim = int(i * passo) + 1, int((i + 1) * passo) + 1
+        proximo_inicio, proximo_fim = fim, min(int((i + 2) * passo) + 1, n)
+        if i == n_saida - 3:
+            proximo_inicio, proximo_fim = n - 1, n
+        media_x = sum(x[proximo_inicio:proximo_fim]) / (proximo_fim - proximo_inicio)
+        media_y = sum(y[proximo_inicio:proximo_fim]) / (proximo_fim - proximo_inicio)
+        maior, escolhido = -1.0, inicio
+        for j in range(inicio, min(fim, n - 1)):
+            area = abs((x[a] - media_x) * (y[j] - y[a]) - (x[a] - x[j]) * (media_y - y[a]))
+            if area > maior:
+                maior, escolhido = area, j
+        escolhidos.append(escolhido)
+        a = escolhido
+    return np.array(escolhidos + [n - 1])
+
+
+def _serie(n, semente):
+    gerador = np.random.default_rng(semente)
+    # Passeio aleatório sem trechos constantes: neles as áreas empatam e a escolha depende do arredondamento
+    return np.arange(n, dtype=float), np.cumsum(gerador.normal(0, 1, n))
+
+
+# Caminho vetorizado (faixas curtas) e laço (faixas longas) iguais ao LTTB de referência
+@pytest.mark.parametrize('n, n_saida', [(50, 10), (1000, 97), (5000, 700), (5000, 30), (20_000, 40)])
+def test_lttb_igual_a_referencia(n, n_saida):
+    x, y = _serie(n, n_saida)
+    np.testing.assert_array_equal(lttb(x, y, n_saida), _lttb_referencia(x.tolist(), y.tolist(), n_saida))
+
+
+# Os dois caminhos internos escolhem os mesmos pontos, independentemente do limite entre eles
+@pytest.mark.parametrize('tamanho_faixa', [1, 10 ** 9])
+def test_lttb_vetorizado_igual_ao_laco(monkeypatch, tamanho_faixa):
+    x, y = _serie(8000, 3)
+    esperado = _lttb_referencia(x.tolist(), y.tolist(), 300)
+    monkeypatch.setattr(downsampling, 'TAMANHO_FAIXA_LACO', tamanho_faixa)
+    np.testing.assert_array_equal(lttb(x, y, 300), esperado)
+
+
+# Datas são tratadas como nanossegundos, com o mesmo resultado dos valores numéricos
+def test_lttb_com_datas():
+    x, y = _serie(3000, 9)
+    datas = np.datetime64('2003-10-15') + x.astype('timedelta64[D]')
+    np.testing.assert_array_equal(lttb(datas, y, 200), lttb(x, y, 200))
+
+
+# O min/max mantém o menor e o maior valor de cada faixa
+def test_minmax_mantem_extremos():
+    x, y = _serie(1000, 4)
+    indices = minmax(x, y, 102)
+    faixas = np.array_split(np.arange(1, 999), 50)
+    for faixa in faixas:
+        assert faixa[np.argmin(y[faixa])] in indices and faixa[np.argmax(y[faixa])] in indices
@@ -0,0 +1,47 @@
+# Libs
+
+import numpy as np
+import pytest
+from statsmodels.tsa.adfvalues import mackinnonp
+from statsmodels.tsa.stattools import adfuller
+
+from pipeline import estacionariedade
+from pipeline.estacionariedade import adf, adf_janelas
+
+
+def _passeio(n=600, semente=5):
+    return 1000 + np.cumsum(np.random.default_rng(semente).normal(0, 5, n))
+
+
+# O adfuller avisa da mudança futura do tipo de retorno; a tupla atual é a usada aqui
+pytestmark = pytest.mark.filterwarnings('ignore::FutureWarning')
+
+
+# Cada janela com defasagens fixas reproduz o adfuller sobre a mesma janela
+def test_adf_janelas_igual_ao_adfuller():
+    y = _passeio()
+    resultado = adf_janelas(y, janela=200, lags=(0, 3), passo=97)
+    for linha in resultado.to_dict('records'):
+        estatistica, p_valor, _, nobs, criticos = adfuller(y[linha['inicio']:linha['fim']], maxlag=linha['lag'],
+                                                           autolag=None, regression='c')
+        assert linha['estatistica'] == pytest.approx(estatistica, rel=1e-8)
+        assert linha['p_valor'] == pytest.approx(p_valor, rel=1e-8)
+        assert linha['nobs'] == nobs
+        assert [linha[f'critico_{nivel}'] for nivel in criticos] == pytest.approx(list(criticos.values()))
+
+
+# Escolha da ordem por AIC igual à do adfuller
+def test_adf_autolag_igual_ao_adfuller():
+    y = np.diff(_passeio(semente=11))
+    estatistica, p_valor, lag, _, _, _ = adfuller(y, autolag='AIC', regression='c')
+    resultado = adf(y)
+    assert resultado['lag'] == lag
+    assert resultado['estatistica'] == pytest.approx(estatistica, rel=1e-8)
+    assert resultado['p_valor'] == pytest.approx(p_valor, rel=1e-8)
+
+
+# O p-valor em lote (tabelas internas) e o mackinnonp público coincidem, inclusive nos extremos
+def test_p_valores_igual_ao_mackinnonp():
+    estatisticas = np.linspace(-25, 5, 601)
+    esperado = [mackinnonp(t, regression='c', N=1) for t in estatisticas]
+    assert estacionariedade._p_valores(estatisticas) == pytest.approx(esperado, rel=1e-12, abs=1e-300)
@@ -0,0 +1,40 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+
+from pipeline.colunar import _converter_coluna, ler_tabela
+from pipeline.consolidacao import abrir_canonico
+from pipeline.exportacao import construir_exportacao
+
+CAMINHO_IBOV = 'Assets/DataFrames/ibov.csv'
+
+
+# O CSV exportado reproduz o de origem linha a linha (inclusive os campos vazios de Vol.)
+def test_csv_exportado_reproduz_origem(tmp_path):
+    caminhos = construir_exportacao(CAMINHO_IBOV, diretorio=tmp_path)
+    with open(caminhos['csv'], encoding='utf-8') as exportado, open(CAMINHO_IBOV, encoding='utf-8') as origem:
+        assert exportado.read().splitlines() == origem.read().splitlines()
+
+
+def test_valores_ausentes_como_texto_vazio():
+    df = ler_tabela(CAMINHO_IBOV)
+    origem = pd.read_csv(CAMINHO_IBOV)
+    ausentes = origem['Vol.'].isna().to_numpy()
+    assert ausentes.any()
+    assert (df['Vol.'][ausentes] == '').all()
+    assert (df['Vol.'][~ausentes] == origem['Vol.'][~ausentes]).all()
+
+
+# Coluna de texto com tipo object (como no pandas 2.x): os ausentes não podem virar 'nan' ou 'None'
+def test_converter_coluna_object_com_ausentes():
+    serie = pd.Series(['11,79M', None, np.nan], dtype=object)
+    assert _converter_coluna(serie).tolist() == ['11,79M', '', '']
+
+
+# A exportação do armazenamento canônico (usada pelo aplicativo) guarda os mesmos valores, com os ausentes vazios
+def test_csv_exportado_do_armazenamento(tmp_path):
+    armazem = abrir_canonico()
+    caminhos = construir_exportacao(armazem, diretorio=tmp_path)
+    exportado = pd.read_csv(caminhos['csv'], parse_dates=['Data'])
+    pd.testing.assert_frame_equal(exportado, armazem.ler(), check_dtype=False)
@@ -0,0 +1,66 @@
+# Libs
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.ingestao import ler_investing, preparar_modelo
+
+CAMINHO_BASE = 'Assets/Base/ibovespa.csv'
+CAMINHO_MODELO = 'Assets/DataFrames/ibov_modelo.csv'
+COLUNAS = ['Último', 'Abertura', 'Máxima', 'Mínima', 'Vol.']
+MULTIPLICADORES = {'K': 1000, 'M': 10 ** 6, 'B': 10 ** 9}
+
+
+# Valor exato do texto da exportação ("32.617" -> 32617, "11,79M" -> 11790000)
+def _exato(texto):
+    texto = texto.replace('.', '').replace(',', '.')
+    if texto[-1] in MULTIPLICADORES:
+        return int(Decimal(texto[:-1]) * MULTIPLICADORES[texto[-1]])
+    return int(Decimal(texto))
+
+
+# Caminho antigo dos notebooks: float em milhares de pontos * 1000, ou pd.eval do volume, truncado por astype(int)
+def _antigo(texto):
+    if texto[-1] in MULTIPLICADORES:
+        return int(float(texto[:-1].replace(',', '.')) * MULTIPLICADORES[texto[-1]])
+    return int(float(texto) * 1000)
+
+
+@pytest.fixture(scope='module')
+def comparacao():
+    bruto = pd.read_csv(CAMINHO_BASE, dtype=str, keep_default_na=False)
+    bruto = bruto[(bruto[COLUNAS] != '').all(axis=1)]
+    bruto.index = pd.to_datetime(bruto['Data'], format='%d.%m.%Y')
+    novo = preparar_modelo(ler_investing(CAMINHO_BASE))
+    antigo = pd.read_csv(CAMINHO_MODELO, parse_dates=['Data']).set_index('Data')
+    return bruto.loc[novo.index], novo, antigo
+
+
+# O parser por bytes devolve o valor exato de todas as células da exportação
+def test_parser_igual_ao_texto_da_exportacao(comparacao):
+    bruto, novo, _ = comparacao
+    for coluna in COLUNAS:
+        assert novo[coluna].tolist() == [_exato(texto) for texto in bruto[coluna]]
+
+
+# O ibov_modelo.csv tem as mesmas linhas; as células diferentes são exatamente as truncadas pelo caminho
+# antigo, uma unidade abaixo do valor da exportação
+def test_diferencas_para_o_csv_sao_as_truncagens(comparacao):
+    bruto, novo, antigo = comparacao
+    assert novo.index.equals(antigo.index)
+    assert (novo['Target'] == antigo['Target']).all()
+    diferentes = 0
+    for coluna in COLUNAS:
+        assert antigo[coluna].tolist() == [_antigo(texto) for texto in bruto[coluna]]
+        diferenca = novo[coluna] - antigo[coluna]
+        assert set(np.unique(diferenca)) <= {0, 1}
+        diferentes += int((diferenca != 0).sum())
+    assert 0 < diferentes < 500
+
+
+# A leitura em partes chega ao mesmo resultado da leitura de uma vez
+def test_leitura_em_partes():
+    pd.testing.assert_frame_equal(ler_investing(CAMINHO_BASE, chunksize=777), ler_investing(CAMINHO_BASE))
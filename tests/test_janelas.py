@@ -0,0 +1,70 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.janelas import EstatisticasMoveis, estatisticas_moveis
+
+JANELAS = (5, 12)
+SPANS = (5, 10)
+
+
+# Passeio aleatório com NaN no início, isolados, em sequência e no final
+def _serie_com_lacunas():
+    gerador = np.random.default_rng(7)
+    x = 1000 + np.cumsum(gerador.normal(0, 5, 400))
+    x[[0, 1, 30, 31, 32, 33, 34, 35, 90, 200, 201, 260, 399]] = np.nan
+    return x
+
+
+def _pandas(x):
+    serie = pd.Series(x)
+    esperado = {}
+    for janela in JANELAS:
+        janelas = serie.rolling(janela)
+        esperado.update({f'media_{janela}': janelas.mean(), f'desvio_{janela}': janelas.std(),
+                         f'min_{janela}': janelas.min(), f'max_{janela}': janelas.max()})
+    for span in SPANS:
+        esperado[f'ewma_{span}'] = serie.ewm(span=span, adjust=False).mean()
+    return {nome: valores.to_numpy() for nome, valores in esperado.items()}
+
+
+@pytest.mark.parametrize('lacunas', [False, True])
+def test_lote_igual_ao_pandas(lacunas):
+    x = _serie_com_lacunas()
+    if not lacunas:
+        x = np.nan_to_num(x, nan=1000.0)
+    resultado = estatisticas_moveis(x, JANELAS, SPANS)
+    for nome, esperado in _pandas(x).items():
+        np.testing.assert_allclose(resultado[nome], esperado, rtol=1e-9, atol=1e-9, err_msg=nome)
+
+
+def test_lote_em_matriz_igual_por_linha():
+    x = _serie_com_lacunas()
+    matriz = np.stack([x, x[::-1], np.nan_to_num(x, nan=0.0)])
+    resultado = estatisticas_moveis(matriz, JANELAS, SPANS)
+    for i, linha in enumerate(matriz):
+        for nome, valores in estatisticas_moveis(linha, JANELAS, SPANS).items():
+            np.testing.assert_allclose(resultado[nome][i], valores, rtol=1e-12, err_msg=nome)
+
+
+def test_incremental_igual_ao_pandas():
+    x = _serie_com_lacunas()
+    estado = EstatisticasMoveis(JANELAS, SPANS)
+    passos = [estado.update(valor) for valor in x]
+    for nome, esperado in _pandas(x).items():
+        obtido = np.array([passo[nome] for passo in passos])
+        np.testing.assert_allclose(obtido, esperado, rtol=1e-9, atol=1e-9, err_msg=nome)
+
+
+# O estado iniciado pelo histórico (que pode terminar em NaN) continua igual ao lote
+@pytest.mark.parametrize('corte', [100, 201, 202, 330])
+def test_incremental_a_partir_do_historico(corte):
+    x = _serie_com_lacunas()
+    estado = EstatisticasMoveis.a_partir_de(x[:corte], JANELAS, SPANS)
+    passos = [estado.update(valor) for valor in x[corte:]]
+    lote = estatisticas_moveis(x, JANELAS, SPANS)
+    for nome, valores in lote.items():
+        obtido = np.array([passo[nome] for passo in passos])
+        np.testing.assert_allclose(obtido, valores[corte:], rtol=1e-9, atol=1e-9, err_msg=nome)
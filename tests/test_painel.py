@@ -0,0 +1,55 @@
+# Libs
+
+import numpy as np
+import pandas as pd
+
+from pipeline import painel as modulo_painel
+from pipeline.metricas import calc_metricas
+from pipeline.painel import PainelSeries, avaliar_painel
+
+
+def _painel():
+    gerador = np.random.default_rng(3)
+    datas = pd.date_range('2020-01-01', periods=300, freq='D')
+    series = {f'T{i}': pd.Series(100 * np.exp(np.cumsum(gerador.normal(0, 0.01, 300))), index=datas)
+              for i in range(3)}
+    return PainelSeries.de_series(series)
+
+
+# Métricas por ticker e agregadas iguais às calculadas diretamente sobre cada série
+def test_metricas_por_ticker_e_agregadas():
+    painel = _painel()
+    treino, teste = painel.separar('2020-10-01')
+    por_ticker, agregado = avaliar_painel(painel, '2020-10-01', modelos=('Naive',), n_jobs=1)
+    previsto = np.repeat(treino[:, -1:], teste.shape[1], axis=1)
+
+    for i, linha in por_ticker.set_index('ticker').iterrows():
+        esperado = calc_metricas(teste[painel.indice[i]], previsto[painel.indice[i]])
+        assert np.allclose([linha[k] for k in esperado], list(esperado.values()))
+    esperado = calc_metricas(teste.ravel(), previsto.ravel())
+    assert np.allclose(agregado.loc[0, list(esperado)].tolist(), list(esperado.values()))
+
+
+# Modelo que repete o último valor observado e falha no ticker cujo teste começa em `valor`
+def _modelo_com_falha(valor):
+    def modelo(treino, teste):
+        if teste[0] == valor:
+            raise RuntimeError('falha simulada')
+        return np.concatenate([treino[-1:], teste[:-1]])
+    return modelo
+
+
+# Uma falha qualquer em um ticker vira uma linha NaN com o erro registrado, sem interromper os demais
+def test_falha_em_um_ticker_nao_interrompe_o_painel(monkeypatch):
+    painel = _painel()
+    corte = '2020-10-01'
+    modelo = _modelo_com_falha(painel.separar(corte)[1][1, 0])
+    monkeypatch.setitem(modulo_painel.MODELOS_POR_TICKER, 'ultimo', modelo)
+
+    por_ticker, agregado = avaliar_painel(painel, corte, modelos=('ultimo',), n_jobs=1)
+
+    falha = por_ticker.set_index('ticker').loc['T1']
+    assert falha['status'] == 'erro: RuntimeError: falha simulada'
+    assert np.isnan(falha['WMAPE']) and falha['n'] == 0
+    assert (por_ticker.set_index('ticker').loc[['T0', 'T2'], 'status'] == 'ok').all()
+    assert agregado.set_index('modelo').loc['ultimo', ['tickers', 'falhas']].tolist() == [2, 1]
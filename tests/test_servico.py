@@ -0,0 +1,59 @@
+# Libs
+
+import asyncio
+import json
+
+import pytest
+
+from pipeline.previsao import CONSTRUTORES, prever
+from servico import ServicoPrevisao
+
+
+# Requisição GET direta ao aplicativo ASGI: devolve (status, JSON)
+async def _get(servico, rota, consulta=''):
+    mensagens = []
+
+    async def receber():
+        return {'type': 'http.request', 'body': b''}
+
+    async def enviar(mensagem):
+        mensagens.append(mensagem)
+
+    escopo = {'type': 'http', 'method': 'GET', 'path': rota, 'query_string': consulta.encode()}
+    await servico(escopo, receber, enviar)
+    return mensagens[0]['status'], json.loads(mensagens[1]['body'])
+
+
+# Executa as requisições ao mesmo tempo, em um único lote, com o serviço iniciado
+def _executar(*requisicoes):
+    async def principal():
+        servico = ServicoPrevisao()
+        await servico.iniciar()
+        try:
+            return await asyncio.gather(*(_get(servico, *requisicao) for requisicao in requisicoes))
+        finally:
+            await servico.encerrar()
+
+    return asyncio.run(principal())
+
+
+# A resposta do serviço é a mesma previsão da chamada direta, para todos os modelos e horizontes
+def test_resposta_igual_a_previsao_direta():
+    consultas = [(nome, h) for nome, classe in CONSTRUTORES.items() for h in sorted({1, 2, classe.horizonte})]
+    respostas = _executar(*(('/previsao', f'modelo={nome}&h={h}') for nome, h in consultas))
+    for (nome, h), (status, corpo) in zip(consultas, respostas):
+        assert status == 200
+        assert corpo == prever(nome, h)
+        assert len(corpo['previsoes']) == h
+
+
+# Requisições repetidas no mesmo lote recebem a mesma resposta
+def test_requisicoes_repetidas_no_lote():
+    respostas = _executar(*([('/previsao', 'modelo=xgb&h=3')] * 5))
+    assert all(resposta == respostas[0] for resposta in respostas)
+
+
+@pytest.mark.parametrize('consulta', ['modelo=arima&h=0', 'modelo=xgb&h=6', 'modelo=arima&h=x', 'modelo=prophet'])
+def test_parametros_invalidos(consulta):
+    (status, corpo), = _executar(('/previsao', consulta))
+    assert status == 400 and 'erro' in corpo